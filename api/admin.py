@@ -1,5 +1,7 @@
 from django.contrib import admin
-from .models import PatientToken
+from django.db import transaction
+from django.utils import timezone
+from .models import PatientToken, PatientSession, TokenRevocationVersion
 
 
 @admin.register(PatientToken)
@@ -10,6 +12,30 @@ class PatientTokenAdmin(admin.ModelAdmin):
     readonly_fields = ('jti', 'created_at', 'last_used_at', 'revoked_at')
     ordering = ('-created_at',)
     
+    def save_model(self, request, obj, form, change):
+        super().save_model(request, obj, form, change)
+        # Workers cache revoked access tokens by revocation version
+        if change and 'is_revoked' in form.changed_data:
+            transaction.on_commit(TokenRevocationVersion.bump)
+    
+    # Authentication only looks tokens up in the revoked set, so a deleted row would leave its
+    # token valid until it expires: unexpired tokens are revoked instead, expired ones deleted
+    def delete_model(self, request, obj):
+        if obj.expires_at > timezone.now():
+            if not obj.is_revoked:
+                obj.revoke('Deleted in admin')
+        else:
+            super().delete_model(request, obj)
+    
+    def delete_queryset(self, request, queryset):
+        now = timezone.now()
+        with transaction.atomic():
+            if queryset.filter(expires_at__gt=now, is_revoked=False).update(
+                is_revoked=True, revoked_at=now, revocation_reason='Deleted in admin'
+            ):
+                transaction.on_commit(TokenRevocationVersion.bump)
+            queryset.filter(expires_at__lte=now).delete()
+    
     fieldsets = (
         ('Token Info', {
             'fields': ('jti', 'token_type', 'expires_at')
@@ -28,3 +54,12 @@ class PatientTokenAdmin(admin.ModelAdmin):
             'classes': ('collapse',)
         }),
     )
+
+
+@admin.register(PatientSession)
+class PatientSessionAdmin(admin.ModelAdmin):
+    list_display = ('personal_number', 'session_id', 'device_name', 'token_count', 'is_revoked', 'last_used_at', 'created_at')
+    list_filter = ('is_revoked', 'created_at')
+    search_fields = ('personal_number', 'session_id')
+    readonly_fields = ('session_id', 'created_at', 'last_used_at', 'token_count', 'revoked_at')
+    ordering = ('-created_at',)
@@ -1,14 +1,20 @@
 """
 Custom JWT authentication for patient API access.
 """
+import hashlib
 import logging
-from django.utils import timezone
+import time
+from datetime import datetime, timezone as dt_timezone
+from django.conf import settings
 from rest_framework.authentication import BaseAuthentication
 from rest_framework.exceptions import AuthenticationFailed
 from rest_framework_simplejwt.tokens import AccessToken
 from rest_framework_simplejwt.exceptions import InvalidToken, TokenError
 
+from .cache import get_cache
 from .models import PatientToken
+from .revocation import is_possibly_revoked
+from .token_usage import record_token_use
 
 logger = logging.getLogger(__name__)
 
@@ -16,7 +22,10 @@ logger = logging.getLogger(__name__)
 class PatientJWTAuthentication(BaseAuthentication):
     """
     Custom JWT authentication that validates tokens against the PatientToken model.
-    Checks for token revocation and updates last_used_at timestamp.
+    Expiry is checked from the signed claims and revocation against the in-memory
+    revoked set (see revocation), so PatientToken is only queried for revoked tokens.
+    Records the last_used_at timestamp (written behind, see token_usage).
+    Verified tokens are cached until they expire, so a repeated token costs a hash and a lookup.
     """
     
     def authenticate(self, request):
@@ -32,43 +41,30 @@ class PatientJWTAuthentication(BaseAuthentication):
         token_string = auth_header.split(' ')[1]
         
         try:
-            # Decode and validate the token structure
-            access_token = AccessToken(token_string)
+            access_token = self.verify_token(token_string)
             jti = access_token.get('jti')
             
             if not jti:
                 raise AuthenticationFailed('Token does not contain JTI claim')
             
-            # Check if token exists in database and is not revoked
-            try:
-                patient_token = PatientToken.objects.get(
-                    jti=jti,
-                    token_type='access'
-                )
-            except PatientToken.DoesNotExist:
-                logger.warning(f"Token with jti {jti} not found in database")
-                raise AuthenticationFailed('Token not found or invalid')
-            
-            # Check if token is revoked
-            if patient_token.is_revoked:
-                logger.warning(f"Revoked token used: jti={jti}, reason={patient_token.revocation_reason}")
-                raise AuthenticationFailed('Token has been revoked')
+            # Expiry was verified by AccessToken; confirm possible revocations against the database
+            if is_possibly_revoked(jti):
+                patient_token = PatientToken.objects.filter(jti=jti, token_type='access').first()
+                if patient_token is None or patient_token.is_revoked:
+                    reason = patient_token.revocation_reason if patient_token else 'not found'
+                    logger.warning(f"Revoked token used: jti={jti}, reason={reason}")
+                    raise AuthenticationFailed('Token has been revoked')
             
-            # Check if token is expired
-            if patient_token.expires_at < timezone.now():
-                logger.warning(f"Expired token used: jti={jti}, expired_at={patient_token.expires_at}")
-                raise AuthenticationFailed('Token has expired')
-            
-            # Update last used timestamp
-            patient_token.last_used_at = timezone.now()
-            patient_token.save(update_fields=['last_used_at'])
+            # Update last used timestamp, coarsely and off the request path
+            record_token_use(jti, session_id=access_token.get('session_id'))
             
             # Create a patient data object from token claims
             patient_data = {
                 'personal_number': access_token.get('personal_number'),
                 'mobile_phone': access_token.get('mobile_phone'),
+                'partner_id': access_token.get('partner_id'),
                 'jti': jti,
-                'token_created_at': patient_token.created_at,
+                'token_created_at': datetime.fromtimestamp(access_token['iat'], tz=dt_timezone.utc) if 'iat' in access_token else None,
             }
             
             logger.debug(f"Successfully authenticated patient: {patient_data['personal_number']}")
@@ -84,6 +80,20 @@ class PatientJWTAuthentication(BaseAuthentication):
             logger.error(f"Authentication error: {str(e)}", exc_info=True)
             raise AuthenticationFailed('Authentication failed')
     
+    def verify_token(self, token_string):
+        """
+        Decode and validate the token, or return it from the verified token cache.
+        Entries expire with the token, so a cached token is always still within its lifetime.
+        """
+        size = settings.VERIFIED_TOKEN_CACHE_SIZE
+        cache = get_cache('verified_tokens', maxsize=size, ttl=None if size else 0)
+        key = hashlib.sha256(token_string.encode()).digest()
+        access_token = cache.get(key)
+        if access_token is None:
+            access_token = AccessToken(token_string)
+            cache.set(key, access_token, ttl=access_token['exp'] - time.time())
+        return access_token
+    
     def authenticate_header(self, request):
         """
         Return a string to be used as the value of the WWW-Authenticate
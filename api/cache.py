@@ -0,0 +1,187 @@
+"""
+Process-local caches for data read from the OpenERP database.
+
+Every cache entry can carry tags such as ``patient:<personal_number>``,
+``product:<id>`` or ``catalog``. Evicting a tag drops every entry carrying it
+from every registered cache. Tags are evicted by the NOTIFY listener in
+``api.listener``, which lets patient-facing caches use long TTLs safely.
+"""
+import logging
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+# Registry of named caches, so a single tag eviction reaches all of them
+_caches = {}
+_registry_lock = threading.Lock()
+
+_MISSING = object()
+
+
+class LocalCache:
+    """
+    Thread-safe bounded LRU cache with an optional TTL and tag-based eviction.
+    A ttl of 0 disables the cache: lookups always miss and nothing is stored.
+    """
+
+    def __init__(self, name, maxsize=1024, ttl=None):
+        self.name = name
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()  # key -> (expires_at, value, tags)
+        self._tags = {}  # tag -> set of keys
+        # Incremented by every eviction, so values built from data read before it are not stored
+        self.generation = 0
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self):
+        return self.ttl != 0
+
+    def get(self, key, default=None):
+        if not self.enabled:
+            return default
+        with self._lock:
+            entry = self._data.get(key, _MISSING)
+            if entry is _MISSING:
+                return default
+            expires_at, value, tags = entry
+            if expires_at is not None and expires_at < time.monotonic():
+                self._discard(key)
+                return default
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value, tags=(), ttl=None, generation=None):
+        """
+        Store value under key. ttl overrides the cache's TTL for this entry.
+        If generation (read before building value) is given and an eviction
+        happened since, value may predate the change and is not stored.
+        """
+        if not self.enabled:
+            return
+        ttl = ttl if ttl is not None else self.ttl
+        expires_at = time.monotonic() + ttl if ttl else None
+        tags = frozenset(tags)
+        with self._lock:
+            if generation is not None and generation != self.generation:
+                logger.debug(f"Cache '{self.name}' not storing {key!r}: evicted while it was built")
+                return
+            self._discard(key)
+            self._data[key] = (expires_at, value, tags)
+            for tag in tags:
+                self._tags.setdefault(tag, set()).add(key)
+            while len(self._data) > self.maxsize:
+                self._discard(next(iter(self._data)))
+
+    def get_or_set(self, key, builder, tags=()):
+        """
+        Return the cached value for key, or call builder() and cache its result.
+        tags may be a callable taking the built value, for tags that depend on it.
+        """
+        value = self.get(key, _MISSING)
+        if value is _MISSING:
+            generation = self.generation
+            value = builder()
+            self.set(key, value, tags(value) if callable(tags) else tags, generation=generation)
+        return value
+
+    def delete(self, key):
+        with self._lock:
+            self._discard(key)
+
+    def evict_tag(self, tag):
+        """Drop every entry carrying tag. Returns the number of entries dropped."""
+        with self._lock:
+            self.generation += 1
+            keys = self._tags.pop(tag, ())
+            for key in list(keys):
+                self._discard(key)
+            return len(keys)
+
+    def clear(self):
+        with self._lock:
+            self.generation += 1
+            self._data.clear()
+            self._tags.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+    def _discard(self, key):
+        """Remove key and its tag index entries. Caller must hold the lock."""
+        entry = self._data.pop(key, _MISSING)
+        if entry is _MISSING:
+            return
+        for tag in entry[2]:
+            keys = self._tags.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._tags[tag]
+
+
+def get_cache(name, maxsize=1024, ttl=None):
+    """
+    Get (or create) a named process-local cache.
+    The first call for a given name fixes its size and TTL.
+    """
+    cache = _caches.get(name)
+    if cache is None:
+        with _registry_lock:
+            cache = _caches.get(name)
+            if cache is None:
+                cache = _caches[name] = LocalCache(name, maxsize=maxsize, ttl=ttl)
+    if cache.enabled:
+        # Imported here to avoid a circular import (listener -> cache)
+        from .listener import ensure_listener_started
+        ensure_listener_started()
+    return cache
+
+
+def evict_tags(*tags):
+    """Evict the given tags from every registered cache."""
+    evicted = 0
+    for cache in list(_caches.values()):
+        for tag in tags:
+            evicted += cache.evict_tag(tag)
+    logger.debug(f"evict_tags({', '.join(tags)}) dropped {evicted} entr(ies)")
+    return evicted
+
+
+def clear_all():
+    """Clear every registered cache, e.g. after notifications may have been missed."""
+    for cache in list(_caches.values()):
+        cache.clear()
+    logger.info(f"Cleared {len(_caches)} local cache(s)")
+
+
+def patient_tag(personal_number):
+    return f'patient:{personal_number}'
+
+
+def product_tag(product_id):
+    return f'product:{product_id}'
+
+
+CATALOG_TAG = 'catalog'
+
+
+def patient_cache_ttl():
+    return settings.OERP_CACHE['patient_ttl']
+
+
+def catalog_cache_ttl():
+    return settings.OERP_CACHE['catalog_ttl']
+
+
+def pivot_cache_ttl():
+    return settings.OERP_CACHE['pivot_ttl']
+
+
+def catalog_response_cache_ttl():
+    return settings.OERP_CACHE['catalog_response_ttl']
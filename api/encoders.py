@@ -0,0 +1,216 @@
+"""
+Output-only encoders compiled from serializer field declarations.
+
+Views used to build response serializers with ``data=...`` and call
+``is_valid()`` on data produced by this API, which runs full inbound
+validation (Decimal quantization, datetime parsing, ...) on every row before
+``to_representation`` runs again. An encoder walks the declared fields once,
+picks a conversion per field type and then turns instances (dicts or
+``api.records`` records) straight into primitive data.
+
+The output matches the validate-then-represent path for valid data:
+CharFields are stripped like ``to_internal_value`` does, missing fields get
+their default (None if nullable) or are omitted, and OerpSerializerMixin's
+False-for-null conversion is applied.
+
+With a lang, each `<name>`/`<name>_geo` pair (and the pairs a serializer
+declares in localized_fields) is output once as `<name>`, in that language.
+
+Usage:
+    return Response(encode(LabOrdersSerializer, {'labOrders': orders, 'totalLabOrders': len(orders)}))
+"""
+import threading
+from collections.abc import Mapping
+
+from rest_framework import serializers
+from rest_framework.fields import empty
+
+from .serializers import OerpSerializerMixin, localized_field_pairs
+
+_encoders = {}
+_plans = {}
+_lock = threading.Lock()
+
+_MISSING = object()
+
+
+def encode(serializer_class, instance, many=False, fields=None, lang=None):
+    """
+    Encode instance (or a list of instances if many) with serializer_class's fields.
+    Equivalent to serializer_class(instance, many=many).data without running DRF per field.
+    fields optionally restricts the output to a set of (top-level) field names.
+    lang ('ka_GE' or 'en_US') returns every bilingual field once, in that language
+    (see serializers.localized_field_pairs), including in nested serializers.
+    """
+    encoder = get_encoder(serializer_class, fields, lang)
+    if many:
+        return [encoder(item) for item in instance]
+    return encoder(instance)
+
+
+def get_encoder(serializer_class, fields=None, lang=None):
+    """
+    Get the encoder function of a serializer class. Full encoders are compiled
+    once per language and cached; encoders of a fieldset are cheap filters of the cached plan.
+    """
+    if fields is not None:
+        return _make_encoder(tuple(step for step in _get_plan(serializer_class, lang) if step[0] in fields))
+    key = (serializer_class, lang)
+    encoder = _encoders.get(key)
+    if encoder is None:
+        plan = _get_plan(serializer_class, lang)
+        with _lock:
+            encoder = _encoders.get(key)
+            if encoder is None:
+                encoder = _encoders[key] = _make_encoder(plan)
+    return encoder
+
+
+def _get_plan(serializer_class, lang=None):
+    key = (serializer_class, lang)
+    plan = _plans.get(key)
+    if plan is None:
+        with _lock:
+            plan = _plans.get(key)
+            if plan is None:
+                plan = _plans[key] = _compile_plan(serializer_class(), lang)
+    return plan
+
+
+def _compile_serializer(serializer, lang=None):
+    """Build the encoder of a (bound) serializer instance from its fields."""
+    return _make_encoder(_compile_plan(serializer, lang))
+
+
+def _compile_plan(serializer, lang=None):
+    """Build the (name, source, convert, default, fix_false) steps of a serializer's fields."""
+    nullable = type(serializer).oerp_nullable_fields() if isinstance(serializer, OerpSerializerMixin) else ()
+
+    plan = []
+    for name, field in serializer.fields.items():
+        if field.write_only:
+            continue
+        if field.source == '*':
+            raise ValueError(f"{type(serializer).__name__}.{name}: source='*' is not supported by encoders")
+        # Missing values: the default if there is one, else None for nullable fields (as DRF's get_attribute)
+        if field.default is not empty:
+            default = field.default
+        elif field.allow_null:
+            default = None
+        else:
+            default = _MISSING
+        plan.append((
+            name,
+            field.source,
+            _compile_field(field, lang),
+            default,
+            name in nullable,
+        ))
+    if lang is not None:
+        plan = _localize_plan(plan, localized_field_pairs(type(serializer)), lang)
+    return tuple(plan)
+
+
+def _localize_plan(plan, pairs, lang):
+    """
+    Merge the steps of each bilingual field pair into a single step, placed where
+    the first of its fields was. Its source is a (preferred, fallback) tuple.
+    """
+    steps = {step[0]: step for step in plan}
+    owners = {}
+    for out, (en, ka) in pairs.items():
+        if en in steps and ka in steps:
+            owners.update(dict.fromkeys((out, en, ka), out))
+
+    localized = []
+    done = set()
+    for step in plan:
+        out = owners.get(step[0])
+        if out is None:
+            localized.append(step)
+            continue
+        if out in done:
+            continue
+        done.add(out)
+        en, ka = pairs[out]
+        preferred, fallback = (steps[ka], steps[en]) if lang == 'ka_GE' else (steps[en], steps[ka])
+        base = steps.get(out, steps[en])
+        localized.append((out, (preferred[1], fallback[1]), base[2], base[3], base[4]))
+    return localized
+
+
+def _is_blank(value):
+    return value is None or value is False or value is _MISSING or value == ''
+
+
+def _make_encoder(plan):
+    localized = any(type(step[1]) is tuple for step in plan)
+
+    def encode_instance(instance):
+        if isinstance(instance, Mapping):
+            get = instance.get
+        else:
+            def get(key, default):
+                return getattr(instance, key, default)
+
+        data = {}
+        for name, source, convert, default, fix_false in plan:
+            if localized and type(source) is tuple:
+                # Preferred language, falling back to the other one when blank
+                value = get(source[0], _MISSING)
+                if _is_blank(value):
+                    other = get(source[1], _MISSING)
+                    if not _is_blank(other):
+                        value = other
+            else:
+                value = get(source, _MISSING)
+            if value is _MISSING:
+                if default is _MISSING:
+                    continue
+                value = default() if callable(default) else default
+            if fix_false and value is False:
+                value = None
+            data[name] = None if value is None else convert(value)
+        return data
+
+    return encode_instance
+
+
+def _identity(value):
+    return value
+
+
+def _strip(value):
+    return str(value).strip()
+
+
+def _compile_field(field, lang=None):
+    """Pick the conversion of a single field's (non-None) value."""
+    if isinstance(field, serializers.ListSerializer):
+        child = _compile_serializer(field.child, lang)
+        return lambda value: [child(item) for item in value]
+    if isinstance(field, serializers.Serializer):
+        return _compile_serializer(field, lang)
+    if isinstance(field, serializers.ListField):
+        child = _compile_child(field.child, lang)
+        if child is _identity:
+            return list
+        return lambda value: [None if item is None else child(item) for item in value]
+    if isinstance(field, serializers.DictField):
+        child = _compile_child(field.child, lang)
+        return lambda value: {str(key): None if item is None else child(item) for key, item in value.items()}
+    if type(field) is serializers.CharField:
+        return _strip if field.trim_whitespace else str
+    if type(field) is serializers.IntegerField:
+        return int
+    if type(field) is serializers.FloatField:
+        return float
+    # Decimal, date/time, boolean, UUID, ... fields keep DRF's own representation
+    return field.to_representation
+
+
+def _compile_child(child, lang=None):
+    # ListField/DictField without a child declaration pass values through unchanged
+    if type(child).__name__ == '_UnvalidatedField':
+        return _identity
+    return _compile_field(child, lang)
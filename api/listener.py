@@ -0,0 +1,105 @@
+"""
+Postgres LISTEN/NOTIFY based cache invalidation.
+
+Triggers installed by ``manage.py install_cache_triggers`` send the affected
+cache tag (e.g. ``patient:01234567890``, ``product:42`` or ``catalog``) as the
+payload on the configured channel. Each worker process runs one listener
+thread on a dedicated connection to the ``openerp`` database and evicts the
+tag from its local caches, so all workers stay consistent.
+"""
+import logging
+import os
+import select
+import threading
+import time
+
+import psycopg2
+import psycopg2.extensions
+from django.conf import settings
+
+from .cache import clear_all, evict_tags
+
+logger = logging.getLogger(__name__)
+
+# Seconds between select() wake-ups and between reconnect attempts
+POLL_TIMEOUT = 5
+RECONNECT_DELAY = 10
+
+_listener_thread = None
+_listener_pid = None
+_listener_lock = threading.Lock()
+
+
+def _connect():
+    """Open a dedicated autocommit connection to the OpenERP database."""
+    db = settings.DATABASES['openerp']
+    conn = psycopg2.connect(
+        dbname=db['NAME'],
+        user=db['USER'],
+        password=db['PASSWORD'],
+        host=db['HOST'],
+        port=db['PORT'],
+        application_name='modulo_api_cache_listener',
+    )
+    conn.set_isolation_level(psycopg2.extensions.ISOLATION_LEVEL_AUTOCOMMIT)
+    return conn
+
+
+def _listen_forever(channel):
+    while True:
+        conn = None
+        try:
+            conn = _connect()
+            with conn.cursor() as cursor:
+                cursor.execute(f'LISTEN "{channel}"')
+            # Anything could have changed while we were not listening
+            clear_all()
+            logger.info(f"Cache invalidation listener subscribed to '{channel}'")
+
+            while True:
+                if select.select([conn], [], [], POLL_TIMEOUT) == ([], [], []):
+                    continue
+                conn.poll()
+                tags = set()
+                while conn.notifies:
+                    tags.add(conn.notifies.pop(0).payload)
+                tags.discard('')
+                if tags:
+                    evict_tags(*tags)
+        except Exception as e:
+            logger.error(f"Cache invalidation listener error: {e}")
+            # Notifications may have been lost, so nothing cached can be trusted
+            clear_all()
+            time.sleep(RECONNECT_DELAY)
+        finally:
+            if conn is not None:
+                try:
+                    conn.close()
+                except Exception:
+                    pass
+
+
+def ensure_listener_started():
+    """
+    Start the listener thread for this process if it is enabled and not running.
+    Called lazily on first cache use rather than at import time, so the thread
+    is created inside each worker process and not in a pre-fork master.
+    """
+    global _listener_thread, _listener_pid
+
+    config = settings.OERP_CACHE
+    # Threads do not survive fork(), so a thread started by a parent process does not count
+    if not config['listener'] or _listener_pid == os.getpid():
+        return
+
+    with _listener_lock:
+        if _listener_pid == os.getpid():
+            return
+        _listener_pid = os.getpid()
+        _listener_thread = threading.Thread(
+            target=_listen_forever,
+            args=(config['channel'],),
+            name='oerp-cache-listener',
+            daemon=True,
+        )
+        _listener_thread.start()
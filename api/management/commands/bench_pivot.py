@@ -0,0 +1,132 @@
+"""
+Benchmark the single-pass pivot engine against the previous pandas implementation.
+
+Usage:
+    python manage.py bench_pivot
+    python manage.py bench_pivot --orders 20 100 400 --parameters 30 --repeat 200
+
+Runs on synthetic patient histories shaped like generate_pivot_table() cursor
+rows, so it needs neither database. pandas is only required for this command.
+"""
+import random
+import time
+from collections import OrderedDict
+from datetime import date, timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+
+from api.pivot import pivot_parameter_rows
+
+
+def make_history(orders, parameters, seed=0):
+    """
+    Build cursor-like rows (laborder_id, date, param_id_uom, parameter, orderby, value)
+    for one patient, ordered by date like the SQL in generate_pivot_table().
+    """
+    rnd = random.Random(seed)
+    params = [
+        (f'{100 + i}/{rnd.randint(1, 20)}', f'Parameter {i},unit', i + 1)
+        for i in range(parameters)
+    ]
+    rows = []
+    day = date(2020, 1, 1)
+    laborder_id = 10000
+    for _ in range(orders):
+        day += timedelta(days=rnd.randint(7, 60))
+        laborder_id += rnd.randint(1, 5000)
+        # Not every order contains every parameter of the category
+        for param_id_uom, parameter, orderby in rnd.sample(params, k=max(1, int(parameters * rnd.uniform(0.7, 1.0)))):
+            roll = rnd.random()
+            if roll < 0.05:
+                value = None
+            elif roll < 0.15:
+                value = rnd.choice(['negative', 'positive', 'trace'])
+            else:
+                value = f'{rnd.uniform(0.1, 300):.4f}'
+            rows.append((laborder_id, day, param_id_uom, parameter, orderby, value))
+    return rows
+
+
+def pandas_pivot(rows, max_results):
+    """The pandas.pivot_table implementation previously used by generate_pivot_table()."""
+    import pandas as pd
+
+    raw_df = pd.DataFrame(rows, columns=['laborder_id', 'date', 'param_id_uom', 'parameter', 'orderby', 'value'])
+    pivot_df = pd.pivot_table(
+        raw_df,
+        values='value',
+        index=['param_id_uom', 'parameter', 'orderby'],
+        columns=['laborder_id', 'date'],
+        aggfunc=lambda x: x,
+        fill_value='-'
+    )
+    pivot_df = pivot_df.iloc[:, -max_results:]
+    if pivot_df.empty:
+        return [], []
+
+    columns_list = []
+    laborder_id_map = {}
+    for idx, (laborder_id, day) in enumerate(pivot_df.columns):
+        columns_list.append({'laborderId': int(laborder_id), 'date': str(day)})
+        laborder_id_map[laborder_id] = idx
+
+    pivot_dict = pivot_df.where(pd.notnull(pivot_df), None).to_dict(orient='index', into=OrderedDict)
+    rows_list = []
+    for (param_id_uom, parameter_name, orderby), param_data in pivot_dict.items():
+        values = {}
+        for (laborder_id, day), value in param_data.items():
+            values[f'col_{laborder_id_map[laborder_id]}'] = value
+        rows_list.append({
+            'parameterIdUom': param_id_uom,
+            'parameter': parameter_name,
+            'orderby': int(orderby) if orderby is not None else 999,
+            'values': values
+        })
+    return columns_list, rows_list
+
+
+def timeit(func, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+class Command(BaseCommand):
+    help = 'Compare the single-pass pivot engine with the pandas pivot_table implementation'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--orders', type=int, nargs='+', default=[10, 50, 200],
+                            help='Patient history sizes (number of lab orders) to benchmark')
+        parser.add_argument('--parameters', type=int, default=25,
+                            help='Parameters per category (default: 25, roughly a CBC)')
+        parser.add_argument('--max-results', type=int, default=5)
+        parser.add_argument('--repeat', type=int, default=50)
+
+    def handle(self, *args, **options):
+        try:
+            import pandas  # noqa: F401
+        except ImportError:
+            raise CommandError('pandas is required to benchmark against the previous implementation')
+
+        max_results = options['max_results']
+        repeat = options['repeat']
+
+        self.stdout.write(f"{'orders':>8} {'rows':>8} {'pandas ms':>10} {'single-pass ms':>15} {'speedup':>8}")
+        for orders in options['orders']:
+            history = make_history(orders, options['parameters'], seed=orders)
+
+            expected = pandas_pivot(history, max_results)
+            actual = pivot_parameter_rows(history, max_results)
+            if actual != expected:
+                raise CommandError(f'Pivot output differs from pandas for a history of {orders} orders')
+
+            pandas_time = timeit(lambda: pandas_pivot(history, max_results), repeat)
+            single_pass_time = timeit(lambda: pivot_parameter_rows(history, max_results), repeat)
+
+            self.stdout.write(
+                f'{orders:>8} {len(history):>8} {pandas_time * 1000:>10.2f} '
+                f'{single_pass_time * 1000:>15.3f} {pandas_time / single_pass_time:>7.1f}x'
+            )
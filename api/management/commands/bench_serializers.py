@@ -0,0 +1,141 @@
+"""
+Benchmark the output-only encoders against validating response serializers.
+
+Usage:
+    python manage.py bench_serializers
+    python manage.py bench_serializers --orders 1000 --repeat 20
+
+Builds a synthetic patient history (lab orders, parameter stats and a pivot
+table) and a synthetic lab test catalog, checks that every path produces the
+same output and times:
+- validate: Serializer(data=...).is_valid() then .data (the previous view code)
+- represent: Serializer(instance).data (to_representation only)
+- encoder: api.encoders.encode()
+Needs neither database.
+"""
+import random
+import time
+from datetime import datetime, timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+
+from api.encoders import encode
+from api.management.commands.bench_pivot import make_history
+from api.pivot import pivot_parameter_rows
+from api.serializers import LabOrdersSerializer, LabOrderStatsSerializer, PivotTableResponseSerializer, \
+    LabTestsSerializer
+from api.utils import LabOrderRow, LabOrderStatRow
+
+
+def make_lab_orders(orders, seed=0):
+    rnd = random.Random(seed)
+    rows = []
+    day = datetime(2020, 1, 1, 9, 30)
+    for idx in range(orders):
+        day += timedelta(days=rnd.randint(1, 20), minutes=rnd.randint(0, 600))
+        row = LabOrderRow(
+            100000 + idx, f'LO/{100000 + idx}', 'done', day, rnd.randint(1, 200), rnd.randint(1, 40),
+            'Biochemistry', 'ბიოქიმია', day + timedelta(hours=5), None, None, day, day + timedelta(hours=6),
+            rnd.random() < 0.8, 'Glucose,გლუკოზა,GLU, Cholesterol,ქოლესტერინი,CHOL', None, None,
+        )
+        row.pdf_files = [{
+            'uuid': f'{idx:08x}-0000-0000-0000-000000000000',
+            'store_fname': f'{idx}.pdf',
+            'name': f'result_{idx}.pdf',
+            'comment': '',
+            'url': f'https://example.com/{idx}.pdf',
+        }]
+        rows.append(row)
+    return rows
+
+
+def make_stats(history):
+    return [
+        LabOrderStatRow(laborder_id, 12, 'Biochemistry', 'ბიოქიმია', date, param_id_uom, parameter, value, orderby)
+        for laborder_id, date, param_id_uom, parameter, orderby, value in history
+    ]
+
+
+def make_labtests(count, seed=0):
+    rnd = random.Random(seed)
+    return [{
+        'id': idx,
+        'lis_code': f'L{idx}',
+        'ss_code': False,
+        'name': f'Lab test {idx}',
+        'name_geo': f'ანალიზი {idx}',
+        'active': True,
+        'list_price': round(rnd.uniform(5, 300), 2),
+        'web_category_id': rnd.randint(1, 30),
+        'preparation_notes': False,
+        'preparation_notes_geo': 'უზმოზე',
+        'country_id': 81,
+        'country_name': 'Georgia',
+        'country_name_geo': 'საქართველო',
+        'subtests': [{'id': idx * 10 + sub, 'name': f'Subtest {sub}', 'name_geo': f'ქვეტესტი {sub}', 'sequence': sub}
+                     for sub in range(rnd.randint(0, 4))],
+        'has_pdf': rnd.random() < 0.3,
+        # web_notes/web_notes_geo left out: missing nullable fields are rendered as null
+        'seo_keywords': False,
+    } for idx in range(count)]
+
+
+def validate_path(serializer_class, data):
+    serializer = serializer_class(data=data)
+    if not serializer.is_valid():
+        raise CommandError(f'{serializer_class.__name__} rejected the benchmark data: {serializer.errors}')
+    return serializer.data
+
+
+def timeit(func, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+class Command(BaseCommand):
+    help = 'Compare output-only encoders with validating response serializers'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--orders', type=int, default=500, help='Lab orders in the patient history (default: 500)')
+        parser.add_argument('--parameters', type=int, default=25, help='Parameters per lab order (default: 25)')
+        parser.add_argument('--labtests', type=int, default=1000, help='Lab tests in the catalog (default: 1000)')
+        parser.add_argument('--repeat', type=int, default=10)
+
+    def handle(self, *args, **options):
+        orders = options['orders']
+        repeat = options['repeat']
+        history = make_history(orders, options['parameters'], seed=orders)
+        lab_orders = make_lab_orders(orders, seed=orders)
+        stats = make_stats(history)
+        columns, rows = pivot_parameter_rows(history, 50)
+        labtests = make_labtests(options['labtests'])
+
+        cases = [
+            ('laborders', LabOrdersSerializer, {'labOrders': lab_orders, 'totalLabOrders': len(lab_orders)}),
+            ('laborders/stats', LabOrderStatsSerializer, {'stats': stats, 'totalRecords': len(stats)}),
+            ('pivot (50 columns)', PivotTableResponseSerializer, {
+                'categoryId': 12, 'categoryName': 'Biochemistry', 'patientId': 1,
+                'columns': columns, 'rows': rows, 'totalRows': len(rows),
+            }),
+            ('labtests', LabTestsSerializer, {'results': labtests}),
+        ]
+
+        self.stdout.write(f'{orders} orders, {len(stats)} parameter results, {len(labtests)} lab tests')
+        self.stdout.write(f"{'endpoint':<20} {'validate ms':>12} {'represent ms':>13} {'encoder ms':>11} {'speedup':>8}")
+        for label, serializer_class, data in cases:
+            expected = validate_path(serializer_class, data)
+            if encode(serializer_class, data) != expected:
+                raise CommandError(f'Encoder output differs from the validating serializer for {label}')
+
+            validate_time = timeit(lambda: validate_path(serializer_class, data), repeat)
+            represent_time = timeit(lambda: serializer_class(data).data, repeat)
+            encoder_time = timeit(lambda: encode(serializer_class, data), repeat)
+
+            self.stdout.write(
+                f'{label:<20} {validate_time * 1000:>12.1f} {represent_time * 1000:>13.1f} '
+                f'{encoder_time * 1000:>11.1f} {validate_time / encoder_time:>7.1f}x'
+            )
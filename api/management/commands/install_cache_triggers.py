@@ -0,0 +1,154 @@
+"""
+Install (or remove) the NOTIFY triggers used for cache invalidation.
+
+Usage:
+    python manage.py install_cache_triggers
+    python manage.py install_cache_triggers --uninstall
+"""
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connections, transaction
+
+FUNCTION_PREFIX = 'modulo_api_notify'
+
+# One trigger function per table. Each emits the cache tags affected by a row change.
+TRIGGER_FUNCTIONS = {
+    'inno_laborder': """
+        CREATE OR REPLACE FUNCTION {function}() RETURNS trigger AS $$
+        DECLARE
+            pid integer;
+            inno text;
+        BEGIN
+            FOR pid IN
+                SELECT DISTINCT p FROM unnest(ARRAY[
+                    CASE WHEN TG_OP <> 'DELETE' THEN NEW.partner_id END,
+                    CASE WHEN TG_OP <> 'INSERT' THEN OLD.partner_id END
+                ]) AS p WHERE p IS NOT NULL
+            LOOP
+                SELECT inno_id INTO inno FROM res_partner WHERE id = pid;
+                IF inno IS NOT NULL THEN
+                    PERFORM pg_notify('{channel}', 'patient:' || inno);
+                END IF;
+            END LOOP;
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql;
+    """,
+    # Results and parameter rows can change without touching their order's write_date
+    'inno_laborder_parameter': """
+        CREATE OR REPLACE FUNCTION {function}() RETURNS trigger AS $$
+        DECLARE
+            lid integer;
+            inno text;
+        BEGIN
+            FOR lid IN
+                SELECT DISTINCT l FROM unnest(ARRAY[
+                    CASE WHEN TG_OP <> 'DELETE' THEN NEW.laborder_id END,
+                    CASE WHEN TG_OP <> 'INSERT' THEN OLD.laborder_id END
+                ]) AS l WHERE l IS NOT NULL
+            LOOP
+                SELECT rp.inno_id INTO inno
+                FROM inno_laborder lo JOIN res_partner rp ON rp.id = lo.partner_id
+                WHERE lo.id = lid;
+                IF inno IS NOT NULL THEN
+                    PERFORM pg_notify('{channel}', 'patient:' || inno);
+                END IF;
+            END LOOP;
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql;
+    """,
+    'modulo_document_registry': """
+        CREATE OR REPLACE FUNCTION {function}() RETURNS trigger AS $$
+        DECLARE
+            inno text;
+            rec record;
+        BEGIN
+            IF TG_OP = 'DELETE' THEN
+                rec := OLD;
+            ELSE
+                rec := NEW;
+            END IF;
+            IF rec.res_model = 'inno.laborder' THEN
+                SELECT rp.inno_id INTO inno
+                FROM inno_laborder lo JOIN res_partner rp ON rp.id = lo.partner_id
+                WHERE lo.id = rec.res_id;
+                IF inno IS NOT NULL THEN
+                    PERFORM pg_notify('{channel}', 'patient:' || inno);
+                END IF;
+            END IF;
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql;
+    """,
+    'product_product': """
+        CREATE OR REPLACE FUNCTION {function}() RETURNS trigger AS $$
+        BEGIN
+            IF TG_OP = 'DELETE' THEN
+                PERFORM pg_notify('{channel}', 'product:' || OLD.id);
+            ELSE
+                PERFORM pg_notify('{channel}', 'product:' || NEW.id);
+            END IF;
+            -- Listings can gain or lose products, so they are invalidated as a whole
+            PERFORM pg_notify('{channel}', 'catalog');
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql;
+    """,
+    'web_product_category': """
+        CREATE OR REPLACE FUNCTION {function}() RETURNS trigger AS $$
+        BEGIN
+            PERFORM pg_notify('{channel}', 'catalog');
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql;
+    """,
+    # Pivot category names and abbreviations
+    'product_category': """
+        CREATE OR REPLACE FUNCTION {function}() RETURNS trigger AS $$
+        BEGIN
+            PERFORM pg_notify('{channel}', 'catalog');
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql;
+    """,
+}
+
+
+class Command(BaseCommand):
+    help = 'Install NOTIFY triggers on the OpenERP database for cache invalidation'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--uninstall',
+            action='store_true',
+            help='Drop the triggers and trigger functions instead of installing them',
+        )
+
+    def handle(self, *args, **options):
+        channel = settings.OERP_CACHE['channel']
+
+        with transaction.atomic(using='openerp'), connections['openerp'].cursor() as cursor:
+            for table, function_sql in TRIGGER_FUNCTIONS.items():
+                function = f'{FUNCTION_PREFIX}_{table}'
+                trigger = f'{function}_trg'
+
+                cursor.execute(f'DROP TRIGGER IF EXISTS {trigger} ON {table}')
+                if options['uninstall']:
+                    cursor.execute(f'DROP FUNCTION IF EXISTS {function}()')
+                    self.stdout.write(f'Removed cache invalidation trigger from {table}')
+                    continue
+
+                cursor.execute(function_sql.format(function=function, channel=channel))
+                cursor.execute(
+                    f'CREATE TRIGGER {trigger} '
+                    f'AFTER INSERT OR UPDATE OR DELETE ON {table} '
+                    f'FOR EACH ROW EXECUTE PROCEDURE {function}()'
+                )
+                self.stdout.write(f'Installed cache invalidation trigger on {table}')
+
+        if not options['uninstall']:
+            self.stdout.write(self.style.SUCCESS(
+                f"Triggers notify channel '{channel}'. "
+                f"Enable OERP_CACHE_LISTENER in the workers to consume them."
+            ))
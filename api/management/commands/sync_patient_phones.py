@@ -0,0 +1,58 @@
+"""
+Build or update the local patient phone index used by check_patient_exists().
+
+Usage:
+    python manage.py sync_patient_phones --create-index  # once, indexes res_partner.write_date
+    python manage.py sync_patient_phones --full          # once, after migrating
+    python manage.py sync_patient_phones                 # incremental, from cron (e.g. every minute)
+    python manage.py sync_patient_phones --prune         # drop deleted partners, from cron (e.g. daily)
+
+Requests never sync the index. check_patient_exists() falls back to OpenERP
+while the last successful sync is older than PHONE_INDEX['max_age'] seconds
+or the last sync failed, so run the incremental sync more often than that.
+"""
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from api.utils import sync_patient_phone_index, prune_patient_phone_index
+
+WRITE_DATE_INDEX = 'modulo_api_res_partner_write_date'
+
+
+class Command(BaseCommand):
+    help = 'Sync the local patient phone index from res_partner.mobile'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--full',
+            action='store_true',
+            help='Rebuild the whole index instead of syncing partners changed since the last sync',
+        )
+        parser.add_argument(
+            '--create-index',
+            action='store_true',
+            help='Create the res_partner.write_date index used by incremental syncs, then exit',
+        )
+        parser.add_argument(
+            '--prune',
+            action='store_true',
+            help='Drop the entries of partners deleted from res_partner instead of syncing (checks every indexed partner)',
+        )
+
+    def handle(self, *args, **options):
+        if options['create_index']:
+            # CONCURRENTLY cannot run in a transaction; the openerp connection autocommits
+            with connections['openerp'].cursor() as cursor:
+                cursor.execute(
+                    f'CREATE INDEX CONCURRENTLY IF NOT EXISTS {WRITE_DATE_INDEX} ON res_partner (write_date)'
+                )
+            self.stdout.write(self.style.SUCCESS(f'Created index {WRITE_DATE_INDEX} on res_partner'))
+            return
+
+        if options['prune']:
+            partners = prune_patient_phone_index()
+            self.stdout.write(self.style.SUCCESS(f'Removed phone numbers of {partners} deleted partner(s)'))
+            return
+
+        partners = sync_patient_phone_index(full=options['full'])
+        self.stdout.write(self.style.SUCCESS(f'Indexed phone numbers of {partners} partner(s)'))
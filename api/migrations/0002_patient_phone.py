@@ -0,0 +1,29 @@
+# Generated by Django 5.2.7 on 2026-10-19 08:09
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PatientPhone',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('partner_id', models.IntegerField(db_index=True, help_text='OpenERP res_partner ID')),
+                ('personal_number', models.CharField(help_text='Patient personal identification number (res_partner.inno_id)', max_length=11)),
+                ('phone', models.CharField(help_text='Normalized mobile phone number (digits only, without country code)', max_length=32)),
+                ('partner_write_date', models.DateTimeField(db_index=True, help_text='res_partner.write_date the entry was derived from')),
+            ],
+            options={
+                'verbose_name': 'Patient Phone',
+                'verbose_name_plural': 'Patient Phones',
+                'db_table': 'patient_phones',
+                'indexes': [models.Index(fields=['personal_number', 'phone'], name='patient_pho_persona_57a210_idx')],
+            },
+        ),
+    ]
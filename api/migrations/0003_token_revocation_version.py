@@ -0,0 +1,24 @@
+# Generated by Django 5.2.7 on 2026-10-19 08:09
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0002_patient_phone'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TokenRevocationVersion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('version', models.BigIntegerField(default=0, help_text='Incremented on every access token revocation')),
+            ],
+            options={
+                'verbose_name': 'Token Revocation Version',
+                'db_table': 'token_revocation_version',
+            },
+        ),
+    ]
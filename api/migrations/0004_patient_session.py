@@ -0,0 +1,51 @@
+# Generated by Django 5.2.7 on 2026-10-19 08:09
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0003_token_revocation_version'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PatientSession',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('session_id', models.UUIDField(help_text="Session identifier shared by the session's access and refresh tokens", unique=True)),
+                ('personal_number', models.CharField(help_text='Patient personal identification number (11 digits)', max_length=11)),
+                ('device_name', models.CharField(blank=True, help_text='Device/browser name (e.g., "Chrome on Windows", "Safari on iPhone")', max_length=200, null=True)),
+                ('client_ip', models.GenericIPAddressField(blank=True, help_text='IP address from which the session was created', null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True, help_text='When the session was created')),
+                ('last_used_at', models.DateTimeField(blank=True, help_text='Last time a token of this session was issued or used', null=True)),
+                ('expires_at', models.DateTimeField(help_text="When the session's latest token expires")),
+                ('token_count', models.PositiveIntegerField(default=0, help_text='Number of tokens issued in this session')),
+                ('is_revoked', models.BooleanField(default=False, help_text='Whether this session has been revoked')),
+                ('revoked_at', models.DateTimeField(blank=True, help_text='When the session was revoked', null=True)),
+            ],
+            options={
+                'verbose_name': 'Patient Session',
+                'verbose_name_plural': 'Patient Sessions',
+                'db_table': 'patient_sessions',
+                'indexes': [models.Index(fields=['personal_number', 'is_revoked', 'expires_at'], name='patient_ses_persona_b9d8ca_idx')],
+            },
+        ),
+        # Sessions issued before this migration, aggregated once from their tokens
+        migrations.RunSQL(
+            sql="""
+                INSERT INTO patient_sessions (
+                    session_id, personal_number, device_name, client_ip, created_at,
+                    last_used_at, expires_at, token_count, is_revoked, revoked_at
+                )
+                SELECT session_id, MAX(personal_number), MAX(device_name), MAX(client_ip), MIN(created_at),
+                       MAX(last_used_at), MAX(expires_at), COUNT(*),
+                       SUM(CASE WHEN is_revoked THEN 0 ELSE 1 END) = 0, MAX(revoked_at)
+                FROM patient_tokens
+                WHERE session_id IS NOT NULL
+                GROUP BY session_id
+            """,
+            reverse_sql=migrations.RunSQL.noop,
+        ),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 5.2.7 on 2026-10-19 08:09
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0004_patient_session'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PatientPhoneSync',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('watermark', models.DateTimeField(blank=True, help_text='Latest res_partner.write_date read by a sync', null=True)),
+                ('synced_at', models.DateTimeField(blank=True, help_text='When the last successful sync finished', null=True)),
+                ('last_error', models.TextField(blank=True, default='', help_text='Error of the last sync, empty if it succeeded')),
+            ],
+            options={
+                'verbose_name': 'Patient Phone Sync',
+                'db_table': 'patient_phone_sync',
+            },
+        ),
+    ]
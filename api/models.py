@@ -1,5 +1,5 @@
-from django.db import models
-from django.db.models import Max, Min, Count
+from django.db import models, transaction
+from django.db.models import F
 
 from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
@@ -84,41 +84,139 @@ class PatientToken(models.Model):
         if reason:
             self.revocation_reason = reason
         self.save(update_fields=['is_revoked', 'revoked_at', 'revocation_reason'])
+        # Refresh tokens are always checked against the database, only access tokens are cached as revoked
+        if self.token_type == 'access':
+            transaction.on_commit(TokenRevocationVersion.bump)
     
     def is_valid(self):
         """Check if token is still valid (not expired and not revoked)."""
         return not self.is_revoked and self.expires_at > timezone.now()
     
     @classmethod
+    @transaction.atomic
     def revoke_all_for_patient(cls, personal_number, reason=None):
-        """Revoke all tokens for a specific patient."""
+        """Revoke all tokens and sessions for a specific patient."""
         tokens = cls.objects.filter(
             personal_number=personal_number,
             is_revoked=False
         )
         now = timezone.now()
-        tokens.update(
+        count = tokens.update(
             is_revoked=True,
             revoked_at=now,
             revocation_reason=reason or 'Bulk revocation'
         )
-        return tokens.count()
+        PatientSession.objects.filter(
+            personal_number=personal_number,
+            is_revoked=False
+        ).update(is_revoked=True, revoked_at=now)
+        if count:
+            transaction.on_commit(TokenRevocationVersion.bump)
+        return count
     
     @classmethod
+    @transaction.atomic
     def revoke_session(cls, personal_number, session_id, reason=None):
         """Revoke all tokens for a specific session belonging to a patient."""
+        now = timezone.now()
+        # Nothing to revoke unless the session exists and is still active
+        if not PatientSession.objects.filter(
+            session_id=session_id,
+            personal_number=personal_number,
+            is_revoked=False
+        ).update(is_revoked=True, revoked_at=now):
+            return 0
+        
         tokens = cls.objects.filter(
             personal_number=personal_number,
             session_id=session_id,
             is_revoked=False
         )
-        now = timezone.now()
-        tokens.update(
+        count = tokens.update(
             is_revoked=True,
             revoked_at=now,
             revocation_reason=reason or 'Session revoked'
         )
-        return tokens.count()
+        if count:
+            transaction.on_commit(TokenRevocationVersion.bump)
+        return count
+
+
+class PatientSession(models.Model):
+    """
+    One row per login session, maintained alongside its PatientToken rows.
+    Created when tokens are issued, updated on refresh and token use, and
+    revoked together with the session's tokens, so listing a patient's
+    sessions reads one indexed row per session instead of aggregating
+    the whole token history.
+    """
+    session_id = models.UUIDField(unique=True, help_text=_(
+        'Session identifier shared by the session\'s access and refresh tokens'
+    ))
+    personal_number = models.CharField(max_length=11, help_text=_(
+        'Patient personal identification number (11 digits)'
+    ))
+    device_name = models.CharField(max_length=200, blank=True, null=True, help_text=_(
+        'Device/browser name (e.g., "Chrome on Windows", "Safari on iPhone")'
+    ))
+    client_ip = models.GenericIPAddressField(null=True, blank=True, help_text=_(
+        'IP address from which the session was created'
+    ))
+    
+    # Timestamps
+    created_at = models.DateTimeField(auto_now_add=True, help_text=_(
+        'When the session was created'
+    ))
+    last_used_at = models.DateTimeField(null=True, blank=True, help_text=_(
+        'Last time a token of this session was issued or used'
+    ))
+    expires_at = models.DateTimeField(help_text=_(
+        'When the session\'s latest token expires'
+    ))
+    token_count = models.PositiveIntegerField(default=0, help_text=_(
+        'Number of tokens issued in this session'
+    ))
+    
+    # Revocation
+    is_revoked = models.BooleanField(default=False, help_text=_(
+        'Whether this session has been revoked'
+    ))
+    revoked_at = models.DateTimeField(null=True, blank=True, help_text=_(
+        'When the session was revoked'
+    ))
+    
+    class Meta:
+        db_table = 'patient_sessions'
+        verbose_name = _('Patient Session')
+        verbose_name_plural = _('Patient Sessions')
+        indexes = [
+            models.Index(fields=['personal_number', 'is_revoked', 'expires_at']),
+        ]
+    
+    def __str__(self):
+        return f"Session {self.session_id} for {self.personal_number}"
+    
+    @classmethod
+    def record_tokens(cls, session_id, token_count, expires_at=None, last_used_at=None):
+        """
+        Add newly issued tokens to an existing session.
+        
+        Args:
+            session_id: Session identifier
+            token_count: Number of tokens issued
+            expires_at: Expiry of the session's newest refresh token, if one was issued
+            last_used_at: Time of the refresh (default: now)
+        
+        Returns:
+            int: Number of sessions updated (0 if the session does not exist)
+        """
+        updates = {
+            'token_count': F('token_count') + token_count,
+            'last_used_at': last_used_at or timezone.now(),
+        }
+        if expires_at is not None:
+            updates['expires_at'] = expires_at
+        return cls.objects.filter(session_id=session_id).update(**updates)
     
     @classmethod
     def get_active_sessions(cls, personal_number):
@@ -128,15 +226,106 @@ class PatientToken(models.Model):
         """
         sessions = cls.objects.filter(
             personal_number=personal_number,
-            session_id__isnull=False,  # Only sessions with session_id
             is_revoked=False,
             expires_at__gt=timezone.now()
-        ).values('session_id').annotate(
-            created_at=Min('created_at'),
-            last_used_at=Max('last_used_at'),
-            device_name=Max('device_name'),
-            client_ip=Max('client_ip'),
-            token_count=Count('id')
-        ).order_by('-last_used_at')
+        ).values(
+            'session_id', 'created_at', 'last_used_at', 'device_name', 'client_ip', 'token_count'
+        ).order_by(F('last_used_at').desc(nulls_last=True))
         
         return list(sessions)
+
+
+class TokenRevocationVersion(models.Model):
+    """
+    Single-row counter incremented whenever access tokens are revoked.
+    Workers keep the revoked access tokens in memory (see api/revocation.py)
+    and only reload them from PatientToken when this version changes.
+    """
+    version = models.BigIntegerField(default=0, help_text=_(
+        'Incremented on every access token revocation'
+    ))
+    
+    class Meta:
+        db_table = 'token_revocation_version'
+        verbose_name = _('Token Revocation Version')
+    
+    def __str__(self):
+        return f"Token revocation version {self.version}"
+    
+    @classmethod
+    def current(cls):
+        """Return the current revocation version (0 before the first revocation)."""
+        return cls.objects.filter(pk=1).values_list('version', flat=True).first() or 0
+    
+    @classmethod
+    def bump(cls):
+        """Increment the revocation version and make this process reload its revoked tokens."""
+        if not cls.objects.filter(pk=1).update(version=F('version') + 1):
+            obj, created = cls.objects.get_or_create(pk=1, defaults={'version': 1})
+            if not created:
+                cls.objects.filter(pk=1).update(version=F('version') + 1)
+        
+        from .revocation import mark_stale
+        mark_stale()
+
+
+class PatientPhone(models.Model):
+    """
+    Local index of normalized patient mobile phone numbers.
+    Derived from OpenERP res_partner.mobile (which may hold several numbers
+    separated by comma, semicolon or period) and synced incrementally by
+    res_partner.write_date (see PatientPhoneSync), so check_patient_exists()
+    can use an indexed equality lookup instead of splitting every matching
+    partner's mobile.
+    """
+    partner_id = models.IntegerField(db_index=True, help_text=_(
+        'OpenERP res_partner ID'
+    ))
+    personal_number = models.CharField(max_length=11, help_text=_(
+        'Patient personal identification number (res_partner.inno_id)'
+    ))
+    phone = models.CharField(max_length=32, help_text=_(
+        'Normalized mobile phone number (digits only, without country code)'
+    ))
+    partner_write_date = models.DateTimeField(db_index=True, help_text=_(
+        'res_partner.write_date the entry was derived from'
+    ))
+    
+    class Meta:
+        db_table = 'patient_phones'
+        verbose_name = _('Patient Phone')
+        verbose_name_plural = _('Patient Phones')
+        indexes = [
+            models.Index(fields=['personal_number', 'phone']),
+        ]
+    
+    def __str__(self):
+        return f"{self.personal_number}: {self.phone}"
+
+
+class PatientPhoneSync(models.Model):
+    """
+    State of the PatientPhone index (single row), written by
+    `manage.py sync_patient_phones`. check_patient_exists() only trusts the
+    index while the last sync succeeded recently enough.
+    """
+    watermark = models.DateTimeField(null=True, blank=True, help_text=_(
+        'Latest res_partner.write_date read by a sync'
+    ))
+    synced_at = models.DateTimeField(null=True, blank=True, help_text=_(
+        'When the last successful sync finished'
+    ))
+    last_error = models.TextField(blank=True, default='', help_text=_(
+        'Error of the last sync, empty if it succeeded'
+    ))
+    
+    class Meta:
+        db_table = 'patient_phone_sync'
+        verbose_name = _('Patient Phone Sync')
+    
+    def __str__(self):
+        return f"Patient phone index synced at {self.synced_at}"
+    
+    @classmethod
+    def get(cls):
+        return cls.objects.get_or_create(pk=1)[0]
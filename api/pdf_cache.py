@@ -0,0 +1,109 @@
+"""
+Content-addressed on-disk cache of lab test PDFs.
+
+Each PDF is decoded from product_product once and stored as
+``objects/<sha256[:2]>/<sha256>.pdf``, so identical PDFs share one file.
+``refs/<labtest_id>-<lang>-<version>`` maps a PDF version (see
+labtest_pdf_version()) to its content hash; a changed product gets a new
+version and therefore a new ref, so entries never need invalidation.
+Files are written to a temporary name and renamed into place, which makes
+concurrent materialization by several workers safe.
+"""
+import hashlib
+import logging
+import os
+import tempfile
+from pathlib import Path
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+
+def labtest_pdf_version(labtest_id, lang, info):
+    """Identify a version of a lab test PDF from get_labtest_pdf_info() metadata."""
+    version = info['write_date'].strftime('%Y%m%d%H%M%S%f') if info['write_date'] else '0'
+    return f"{labtest_id}-{lang}-{version}-{info['size']}"
+
+
+def cache_dir():
+    return Path(settings.PDF_CACHE['dir'])
+
+
+def get_cached_pdf(labtest_id, lang, info, chunks):
+    """
+    Get the path of a cached lab test PDF, materializing it on a miss.
+    
+    Args:
+        labtest_id: Lab test (product_product) ID
+        lang: 'eng' or 'geo'
+        info: Result of get_labtest_pdf_info()
+        chunks: Callable returning an iterable of the PDF's bytes, used on a miss
+        
+    Returns:
+        Path of the PDF, relative to cache_dir()
+    """
+    root = cache_dir()
+    ref_path = root / 'refs' / labtest_pdf_version(labtest_id, lang, info)
+    
+    try:
+        relative_path = Path(ref_path.read_text().strip())
+        if (root / relative_path).is_file():
+            return relative_path
+    except FileNotFoundError:
+        pass
+    
+    relative_path = _store(root, chunks(), info['size'])
+    _write_atomic(ref_path, str(relative_path).encode())
+    logger.info(f"get_cached_pdf({labtest_id}, {lang}) materialized {relative_path}")
+    return relative_path
+
+
+def _store(root, chunks, expected_size):
+    """Write chunks to the object store under their SHA-256 and return the relative path."""
+    objects = root / 'objects'
+    objects.mkdir(parents=True, exist_ok=True)
+    digest = hashlib.sha256()
+    fd, tmp_name = tempfile.mkstemp(dir=objects, suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as tmp:
+            size = 0
+            for chunk in chunks:
+                digest.update(chunk)
+                tmp.write(chunk)
+                size += len(chunk)
+        if size != expected_size:
+            raise OSError(f'PDF is {size} bytes instead of {expected_size}, it changed while being read')
+        relative_path = Path('objects') / digest.hexdigest()[:2] / f'{digest.hexdigest()}.pdf'
+        (root / relative_path).parent.mkdir(exist_ok=True)
+        os.chmod(tmp_name, 0o644)
+        os.replace(tmp_name, root / relative_path)
+    except BaseException:
+        os.unlink(tmp_name)
+        raise
+    return relative_path
+
+
+def _write_atomic(path, data):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp_name = tempfile.mkstemp(dir=path.parent, suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as tmp:
+            tmp.write(data)
+        os.replace(tmp_name, path)
+    except BaseException:
+        os.unlink(tmp_name)
+        raise
+
+
+def iter_file_range(path, start, end, chunk_size=256 * 1024):
+    """Yield bytes start..end (inclusive) of a cached PDF."""
+    remaining = end - start + 1
+    with open(path, 'rb') as f:
+        f.seek(start)
+        while remaining > 0:
+            chunk = f.read(min(chunk_size, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            yield chunk
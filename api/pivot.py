@@ -0,0 +1,70 @@
+"""
+Single-pass pivot of lab order parameter rows into the pivot table format
+returned by /api/patient/pivot/ (parameters as rows, lab orders as columns).
+"""
+
+FILL_VALUE = '-'
+
+
+def pivot_parameter_rows(rows, max_results=None, fill_value=FILL_VALUE):
+    """
+    Pivot parameter rows into columns (lab orders) and rows (parameters).
+
+    Matches the semantics of the pandas.pivot_table based implementation it
+    replaces:
+    - rows with a NULL value or a NULL key are skipped,
+    - columns are ordered by (laborder_id, date) and rows by
+      (param_id_uom, parameter, orderby),
+    - only the last max_results columns are kept, but every parameter with
+      at least one value remains as a row,
+    - missing cells are filled with fill_value.
+
+    If a parameter occurs more than once in the same column, the last value wins.
+
+    Args:
+        rows: Iterable of (laborder_id, date, param_id_uom, parameter, orderby, value)
+              tuples, e.g. a cursor
+        max_results: Number of most recent columns to keep (None keeps all)
+        fill_value: Value for cells without a result (default: '-')
+
+    Returns:
+        Tuple (columns, rows):
+        - columns: [{'laborderId': int, 'date': str}, ...]
+        - rows: [{'parameterIdUom', 'parameter', 'orderby', 'values': {'col_0': ...}}, ...]
+    """
+    cells = {}  # (param_id_uom, parameter, orderby) -> {(laborder_id, date): value}
+    column_keys = set()
+
+    for laborder_id, date, param_id_uom, parameter, orderby, value in rows:
+        if value is None or laborder_id is None or date is None \
+                or param_id_uom is None or parameter is None or orderby is None:
+            continue
+        column_key = (laborder_id, date)
+        column_keys.add(column_key)
+        cells.setdefault((param_id_uom, parameter, orderby), {})[column_key] = value
+
+    column_keys = sorted(column_keys)
+    if max_results is not None:
+        column_keys = column_keys[-max_results:]
+
+    columns = [
+        {'laborderId': int(laborder_id), 'date': str(date)}
+        for laborder_id, date in column_keys
+    ]
+    value_keys = [f'col_{idx}' for idx in range(len(column_keys))]
+
+    pivot_rows = []
+    for row_key in sorted(cells):
+        param_id_uom, parameter, orderby = row_key
+        row_cells = cells[row_key]
+        pivot_rows.append({
+            'parameterIdUom': param_id_uom,
+            'parameter': parameter,
+            'orderby': int(orderby),
+            'values': {
+                value_key: row_cells.get(column_key, fill_value)
+                for value_key, column_key in zip(value_keys, column_keys)
+            },
+        })
+
+    return columns, pivot_rows
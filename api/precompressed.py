@@ -0,0 +1,157 @@
+"""
+Pre-encoded and pre-compressed responses for the public catalog endpoints.
+
+Catalog responses are identical for every caller, so the JSON body is encoded
+once, hashed into a strong ETag and kept in the catalog response cache together
+with its gzip and brotli variants. A request is then answered with 304 when its
+If-None-Match matches, or with the stored bytes in the best encoding it
+accepts. Vary and Cache-Control are set so nginx and browsers may cache them.
+
+The cache has its own TTL (OERP_CACHE['catalog_response_ttl']) and is used
+even without the NOTIFY listener, so 304s and repeat requests skip the queries.
+
+brotli is optional: without the package only gzip and identity are served.
+"""
+import gzip
+import hashlib
+import threading
+
+from django.conf import settings
+from django.http import HttpResponse, HttpResponseNotModified
+from django.utils.cache import patch_vary_headers
+from django.utils.http import parse_etags
+from rest_framework.response import Response
+
+from .cache import get_cache, catalog_response_cache_ttl
+from .renderers import FastJSONRenderer, RawJSON
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Bodies smaller than this are not worth compressing
+MIN_COMPRESS_SIZE = 512
+
+# coding -> (compress for cached bodies, compress for one-off bodies when the cache is disabled)
+_COMPRESSORS = {
+    'gzip': (
+        lambda content: gzip.compress(content, compresslevel=9, mtime=0),
+        lambda content: gzip.compress(content, compresslevel=6, mtime=0),
+    ),
+}
+if brotli is not None:
+    _COMPRESSORS['br'] = (
+        lambda content: brotli.compress(content, quality=11),
+        lambda content: brotli.compress(content, quality=5),
+    )
+
+# Preferred order when a client accepts several codings equally
+_CODING_PREFERENCE = ('br', 'gzip')
+
+
+class PrecompressedBody:
+    """
+    Encoded JSON body with its strong ETag and its compressed variants.
+    Variants are compressed on first use, so only the encodings clients ask for are built.
+    """
+    __slots__ = ('content', 'digest', 'best', '_variants', '_lock')
+
+    def __init__(self, content, best=True):
+        self.content = content
+        self.digest = hashlib.sha256(content).hexdigest()[:32]
+        self.best = best
+        self._variants = {'identity': content}
+        self._lock = threading.Lock()
+
+    def etag(self, coding='identity'):
+        # Every content-coding is a different representation, so it gets its own strong ETag
+        return f'"{self.digest}"' if coding == 'identity' else f'"{self.digest}-{coding}"'
+
+    def variant(self, coding):
+        data = self._variants.get(coding)
+        if data is None:
+            with self._lock:
+                data = self._variants.get(coding)
+                if data is None:
+                    best, fast = _COMPRESSORS[coding]
+                    data = self._variants[coding] = (best if self.best else fast)(self.content)
+        return data
+
+    def matches(self, if_none_match):
+        """Weak comparison of If-None-Match with the ETags of every variant (RFC 9110 13.1.2)."""
+        if not if_none_match:
+            return False
+        etags = parse_etags(if_none_match)
+        if '*' in etags:
+            return True
+        digest = f'"{self.digest}'
+        return any(
+            etag.removeprefix('W/') == self.etag(coding)
+            for etag in etags if etag.removeprefix('W/').startswith(digest)
+            for coding in ('identity', *_COMPRESSORS)
+        )
+
+
+def negotiate_coding(accept_encoding, size):
+    """Pick the content-coding of a response body from the Accept-Encoding header."""
+    if size < MIN_COMPRESS_SIZE or not accept_encoding:
+        return 'identity'
+    qualities = {}
+    for part in accept_encoding.split(','):
+        coding, _, params = part.partition(';')
+        quality = 1.0
+        params = params.strip()
+        if params.startswith('q='):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        qualities[coding.strip().lower()] = quality
+
+    best, best_quality = 'identity', 0.0
+    for coding in _CODING_PREFERENCE:
+        if coding not in _COMPRESSORS:
+            continue
+        quality = qualities.get(coding, qualities.get('*', 0.0))
+        if quality > best_quality:
+            best, best_quality = coding, quality
+    return best
+
+
+def precompressed_response(request, key, build):
+    """
+    Serve a public JSON response from the pre-compressed catalog response cache.
+
+    Args:
+        request: DRF request
+        key: Cache key identifying the response (view and query options)
+        build: Callable returning (data, tags) on a cache miss: the response data
+               and the cache tags that evict it
+
+    Returns:
+        HttpResponse with the stored bytes, 304 if If-None-Match matches, or a
+        DRF Response wrapping the bytes when a non-JSON renderer (browsable API) was negotiated
+    """
+    cache = get_cache('catalog_responses', maxsize=64, ttl=catalog_response_cache_ttl())
+    body = cache.get(key)
+    if body is None:
+        generation = cache.generation
+        data, tags = build()
+        body = PrecompressedBody(FastJSONRenderer().render(data), best=cache.enabled)
+        cache.set(key, body, tags, generation=generation)
+
+    if getattr(request, 'accepted_renderer', None) is not None and request.accepted_renderer.format != 'json':
+        return Response(RawJSON(body.content))
+
+    coding = negotiate_coding(request.META.get('HTTP_ACCEPT_ENCODING', ''), len(body.content))
+    if body.matches(request.META.get('HTTP_IF_NONE_MATCH')):
+        response = HttpResponseNotModified()
+    else:
+        response = HttpResponse(body.variant(coding), content_type='application/json')
+        if coding != 'identity':
+            response['Content-Encoding'] = coding
+    response['ETag'] = body.etag(coding)
+    response['Cache-Control'] = f"public, max-age={settings.CATALOG_HTTP_MAX_AGE}"
+    patch_vary_headers(response, ('Accept', 'Accept-Encoding'))
+    return response
@@ -0,0 +1,149 @@
+"""
+Typed records for the rows of hot OpenERP queries.
+
+A record type declares the columns a query selects (in cursor order) plus any
+fields filled in afterwards, and stores them in ``__slots__`` instead of a
+per-row dict. The row decoder of each type is generated once, so decoding a
+row is a single constructor call, optionally converting numeric columns to
+float on the way.
+
+Records are mappings over their declared fields, with item assignment,
+so existing code (``row['id']``, ``row.get(...)``, serializers built
+with ``data=row``) works unchanged. Extra fields that have not been set are
+absent, like missing dict keys.
+
+Example:
+    LabOrderStatRow = record_type('LabOrderStatRow', ['laborder_id', 'value'])
+    cursor.execute(sql, params)
+    stats = fetch_records(cursor, LabOrderStatRow)
+"""
+from collections.abc import Mapping
+
+
+class Record(Mapping):
+    """Base class of record types created by record_type()."""
+    __slots__ = ()
+
+    _columns = ()  # Columns selected by the query, in cursor order
+    _extra = ()  # Fields filled in after the query
+    _names = frozenset()  # Columns and extra fields
+    _floats = frozenset()  # Numeric columns decoded as float when requested
+    _decoders = None
+
+    def __getitem__(self, key):
+        if key in self._names:
+            try:
+                return getattr(self, key)
+            except AttributeError:
+                pass
+        raise KeyError(key)
+
+    def __setitem__(self, key, value):
+        if key not in self._names:
+            raise KeyError(key)
+        setattr(self, key, value)
+
+    def get(self, key, default=None):
+        if key in self._names:
+            return getattr(self, key, default)
+        return default
+
+    def __contains__(self, key):
+        return key in self._names and hasattr(self, key)
+
+    def __iter__(self):
+        yield from self._columns
+        for name in self._extra:
+            if hasattr(self, name):
+                yield name
+
+    def __len__(self):
+        return len(self._columns) + sum(1 for name in self._extra if hasattr(self, name))
+
+    def __repr__(self):
+        return f"{type(self).__name__}({', '.join(f'{k}={v!r}' for k, v in self.items())})"
+
+
+def record_type(name, columns, extra=(), floats=()):
+    """
+    Create a record type for the rows of a query.
+
+    Args:
+        name: Class name, e.g. 'LabOrderRow'
+        columns: Column names selected by the query, in cursor order
+        extra: Names of fields set after the query (absent until set)
+        floats: Numeric columns to decode as float when fetch_records(..., floats=True)
+
+    Returns:
+        A Record subclass with __slots__ for every column and extra field
+    """
+    columns = tuple(columns)
+    extra = tuple(extra)
+    cls = type(name, (Record,), {
+        '__slots__': columns + extra,
+        '__module__': __name__,
+        '_columns': columns,
+        '_extra': extra,
+        '_names': frozenset(columns + extra),
+        '_floats': frozenset(floats),
+    })
+
+    # Positional constructor assigning every column slot, generated once per type
+    args = ', '.join(columns)
+    body = ''.join(f'\n    self.{column} = {column}' for column in columns) or '\n    pass'
+    namespace = {}
+    exec(f'def __init__(self, {args}):{body}', namespace)
+    cls.__init__ = namespace['__init__']
+    cls._decoders = {}
+    return cls
+
+
+def _compile_decoder(cls, floats):
+    """Generate the function turning a cursor row into an instance of cls."""
+    if not floats or not cls._floats:
+        return lambda row: cls(*row)
+
+    values = ', '.join(
+        f'(None if row[{idx}] is None else float(row[{idx}]))' if column in cls._floats else f'row[{idx}]'
+        for idx, column in enumerate(cls._columns)
+    )
+    namespace = {'cls': cls}
+    exec(f'def decode(row):\n    return cls({values})', namespace)
+    return namespace['decode']
+
+
+def row_decoder(cls, floats=False):
+    """Get the (cached) row decoder of a record type."""
+    decoder = cls._decoders.get(floats)
+    if decoder is None:
+        decoder = cls._decoders[floats] = _compile_decoder(cls, floats)
+    return decoder
+
+
+def _check_columns(cursor, cls):
+    columns = tuple(col[0] for col in cursor.description)
+    if columns != cls._columns:
+        raise ValueError(f"{cls.__name__} expects columns {cls._columns}, the query returned {columns}")
+
+
+def fetch_records(cursor, cls, floats=False):
+    """
+    Fetch all remaining rows of an executed cursor as records of type cls.
+
+    Args:
+        cursor: Cursor of an executed query selecting exactly cls's columns
+        cls: Record type created by record_type()
+        floats: Decode the record type's numeric columns as float instead of Decimal
+
+    Returns:
+        List of records
+    """
+    _check_columns(cursor, cls)
+    return list(map(row_decoder(cls, floats), cursor.fetchall()))
+
+
+def fetch_record(cursor, cls, floats=False):
+    """Fetch the next row of an executed cursor as a record of type cls, or None."""
+    _check_columns(cursor, cls)
+    row = cursor.fetchone()
+    return row_decoder(cls, floats)(row) if row is not None else None
@@ -0,0 +1,128 @@
+"""
+JSON renderer with a selectable encoder backend and support for pre-encoded fragments.
+
+Wrap already-encoded JSON (e.g. a cached catalog list) in RawJSON and put it
+anywhere in the response data; it is spliced into the output as-is instead of
+being decoded and re-encoded:
+
+    return Response({'results': RawJSON(cached_bytes)})
+
+The backend is chosen with settings.JSON_RENDERER_BACKEND:
+- 'json': the standard library, as DRF's JSONRenderer (default)
+- 'orjson': orjson (must be installed); indented output (e.g. the browsable API)
+  still uses the standard library
+"""
+import functools
+import json
+import re
+import secrets
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from rest_framework.compat import SHORT_SEPARATORS, LONG_SEPARATORS, INDENT_SEPARATORS
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils import encoders
+
+
+class RawJSON:
+    """Already-encoded JSON value to splice into a rendered response."""
+    __slots__ = ('data',)
+
+    def __init__(self, data):
+        self.data = data.encode() if isinstance(data, str) else bytes(data)
+
+    def __repr__(self):
+        return f'RawJSON({self.data[:40]!r}...)'
+
+
+class _Fragments:
+    """
+    Replaces RawJSON values with unique placeholder strings while encoding and
+    splices the fragments back into the encoded bytes afterwards. Placeholders
+    contain NUL, which every backend escapes as \\u0000, and a per-render nonce.
+    """
+    _drf_encoder = encoders.JSONEncoder()
+
+    def __init__(self):
+        self.fragments = []
+        self.nonce = secrets.token_hex(8)
+
+    def default(self, obj):
+        if isinstance(obj, RawJSON):
+            self.fragments.append(obj.data)
+            return f'\x00{self.nonce}:{len(self.fragments) - 1}\x00'
+        return self._drf_encoder.default(obj)
+
+    def splice(self, encoded):
+        if not self.fragments:
+            return encoded
+        pattern = re.compile(rb'"\\u0000' + self.nonce.encode() + rb':(\d+)\\u0000"')
+        return pattern.sub(lambda match: self.fragments[int(match.group(1))], encoded)
+
+
+def _dumps_json(data, default, indent, renderer):
+    if indent is None:
+        separators = SHORT_SEPARATORS if renderer.compact else LONG_SEPARATORS
+    else:
+        separators = INDENT_SEPARATORS
+    ret = json.dumps(
+        data, cls=renderer.encoder_class, default=default,
+        indent=indent, ensure_ascii=renderer.ensure_ascii,
+        allow_nan=not renderer.strict, separators=separators
+    )
+    # Same escaping as DRF's JSONRenderer, to output a strict javascript subset
+    ret = ret.replace('\u2028', '\\u2028').replace('\u2029', '\\u2029')
+    return ret.encode()
+
+
+def _orjson_dumps():
+    try:
+        import orjson
+    except ImportError:
+        raise ImproperlyConfigured("JSON_RENDERER_BACKEND is 'orjson' but the orjson package is not installed")
+
+    # Datetimes go through DRF's encoder so they are formatted exactly like the stdlib backend
+    option = orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS
+
+    def dumps(data, default, indent, renderer):
+        if indent is not None or renderer.ensure_ascii:
+            return _dumps_json(data, default, indent, renderer)
+        ret = orjson.dumps(data, default=default, option=option)
+        return ret.replace('\u2028'.encode(), b'\\u2028').replace('\u2029'.encode(), b'\\u2029')
+
+    return dumps
+
+
+def get_backend():
+    """Get the dumps(data, default, indent, renderer) function of the configured backend."""
+    # The setting is read on every call so overriding it (e.g. override_settings) takes effect
+    return _load_backend(getattr(settings, 'JSON_RENDERER_BACKEND', 'json'))
+
+
+@functools.cache
+def _load_backend(backend):
+    if backend == 'json':
+        return _dumps_json
+    if backend == 'orjson':
+        return _orjson_dumps()
+    raise ImproperlyConfigured(f"Unknown JSON_RENDERER_BACKEND '{backend}', expected 'json' or 'orjson'")
+
+
+class FastJSONRenderer(JSONRenderer):
+    """JSONRenderer using the configured backend and splicing RawJSON fragments."""
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+
+        renderer_context = renderer_context or {}
+        indent = self.get_indent(accepted_media_type, renderer_context)
+
+        fragments = _Fragments()
+        encoded = get_backend()(data, fragments.default, indent, self)
+        return fragments.splice(encoded)
+
+
+def json_fragment(data):
+    """Encode data once with the configured backend, for reuse as a RawJSON fragment."""
+    return RawJSON(FastJSONRenderer().render(data))
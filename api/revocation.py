@@ -0,0 +1,77 @@
+"""
+In-memory revoked access tokens for PatientJWTAuthentication.
+
+Expiry is part of the signed JWT, so the only thing authentication needs from
+PatientToken is whether the token was revoked. Each process keeps the jtis of
+the revoked, unexpired access tokens together with the TokenRevocationVersion
+they were loaded at. The version is re-read at most every
+TOKEN_REVOCATION_SYNC_INTERVAL seconds and the set is reloaded only when it
+changed; revocations made by this process mark it stale immediately. The
+database is therefore only queried for a token that is in the set, or when
+the set has to be reloaded.
+
+Access tokens without a PatientToken row are accepted until they expire, so
+deleting a row does not invalidate its token; revoke it instead (the admin
+revokes unexpired tokens it is asked to delete).
+"""
+import logging
+import threading
+import time
+
+from django.conf import settings
+from django.utils import timezone
+
+from .models import PatientToken, TokenRevocationVersion
+
+logger = logging.getLogger(__name__)
+
+_revoked = frozenset()
+_version = None
+_checked_at = None  # time.monotonic() of the last version check, None when stale
+_lock = threading.Lock()
+
+
+def mark_stale():
+    """Re-read the revocation version on the next check."""
+    global _checked_at
+    _checked_at = None
+
+
+def _is_fresh():
+    return _checked_at is not None and time.monotonic() - _checked_at < settings.TOKEN_REVOCATION_SYNC_INTERVAL
+
+
+def _sync():
+    global _revoked, _version, _checked_at
+
+    if _is_fresh():
+        return
+    with _lock:
+        if _is_fresh():
+            return
+        checked_at = time.monotonic()
+        # Read the version before the tokens: a revocation in between only causes another reload
+        version = TokenRevocationVersion.current()
+        if version != _version:
+            _revoked = frozenset(PatientToken.objects.filter(
+                token_type='access',
+                is_revoked=True,
+                expires_at__gt=timezone.now()
+            ).values_list('jti', flat=True))
+            _version = version
+            logger.debug(f"Loaded {len(_revoked)} revoked access tokens at revocation version {version}")
+        _checked_at = checked_at
+
+
+def is_possibly_revoked(jti):
+    """
+    Check an access token against the in-memory revoked set.
+
+    Args:
+        jti: JWT ID of the access token
+
+    Returns:
+        bool: True if the token was revoked as of the last sync, to be confirmed against PatientToken
+    """
+    _sync()
+    return jti in _revoked
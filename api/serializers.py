@@ -11,20 +11,34 @@ class OerpSerializerMixin:
     Converts OpenERP's False-for-null convention to None before validation.
     OpenERP v7 returns boolean False for any unset field over XML-RPC.
     """
-    @functools.cached_property
-    def _non_nullable_bool_fields(self):
-        return {
-            name
-            for name, field in self.fields.items()
-            if isinstance(field, serializers.BooleanField) and not field.allow_null
-        }
+    @classmethod
+    def oerp_nullable_fields(cls):
+        """
+        Names of the declared fields whose False means null (all but non-nullable booleans).
+        Computed once per serializer class instead of per instance.
+        """
+        names = cls.__dict__.get('_oerp_nullable_fields')
+        if names is None:
+            names = cls._oerp_nullable_fields = tuple(
+                name
+                for name, field in cls._declared_fields.items()
+                if not (isinstance(field, serializers.BooleanField) and not field.allow_null)
+            )
+        return names
 
     def _fix_oerp_false(self, data):
-        """Convert OpenERP's False-for-null to None, preserving actual boolean False."""
-        return {
-            k: (v if k in self._non_nullable_bool_fields else (None if v is False else v))
-            for k, v in data.items()
-        }
+        """
+        Convert OpenERP's False-for-null to None, preserving actual boolean False.
+        data is only copied when it holds a False to convert, so rows already
+        normalized at the RPC boundary (see utils.oerp_execute) pass through as is.
+        """
+        fixed = data
+        for name in self.oerp_nullable_fields():
+            if fixed.get(name) is False:
+                if fixed is data:
+                    fixed = dict(data)
+                fixed[name] = None
+        return fixed
 
     def to_internal_value(self, data):
         if isinstance(data, dict):
@@ -36,6 +50,35 @@ class OerpSerializerMixin:
             instance = self._fix_oerp_false(instance)
         return super().to_representation(instance)
 
+@functools.cache
+def localized_field_pairs(serializer_class):
+    """
+    Bilingual fields of a serializer class, for the compact single-language responses.
+    Every `<name>`/`<name>_geo` field pair is included, plus the pairs declared in
+    the class's localized_fields attribute (for other naming schemes).
+
+    Returns:
+        Dict mapping the output field name to its (English field, Georgian field)
+    """
+    declared = serializer_class._declared_fields
+    pairs = {
+        name[:-len('_geo')]: (name[:-len('_geo')], name)
+        for name in declared
+        if name.endswith('_geo') and name[:-len('_geo')] in declared
+    }
+    pairs.update(getattr(serializer_class, 'localized_fields', {}))
+    return pairs
+
+
+def expand_localized_fields(serializer_class, fields):
+    """Replace the localized output fields in fields by both of their language fields."""
+    pairs = localized_field_pairs(serializer_class)
+    expanded = set(fields)
+    for name in fields:
+        expanded.update(pairs.get(name, ()))
+    return frozenset(expanded)
+
+
 class ExaminationResultSerializer(OerpSerializerMixin, serializers.Serializer):
     #researchKod = serializers.CharField()
     #researchCode = serializers.CharField()
@@ -125,6 +168,55 @@ class LabTestSerializer(OerpSerializerMixin, serializers.Serializer):
 class LabTestsSerializer(serializers.Serializer):
     results = serializers.ListField(child=LabTestSerializer())
 
+LANGUAGES = ['ka_GE', 'en_US']
+
+class LangQuerySerializer(serializers.Serializer):
+    """
+    Optional `lang` query parameter. Without it responses carry both languages
+    (`name` and `name_geo`, ...); with it every bilingual field is returned once,
+    under its English field name, in that language (falling back to the other one).
+    """
+    lang = serializers.ChoiceField(choices=LANGUAGES, required=False, help_text="Return localized fields once, in this language")
+
+class FieldsetQuerySerializer(LangQuerySerializer):
+    """
+    Optional `fields`/`exclude` query parameters (comma-separated field names)
+    selecting the fields of each item returned by a list endpoint.
+    Subclasses set item_serializer; validated_data['fieldset'] is the frozenset
+    of selected field names, or None when all fields are returned.
+    """
+    item_serializer = None
+
+    fields = serializers.CharField(required=False, help_text="Only return these fields of each item (comma-separated)")
+    exclude = serializers.CharField(required=False, help_text="Return all fields of each item except these (comma-separated)")
+
+    def validate(self, attrs):
+        attrs = super().validate(attrs)
+        if 'fields' in attrs and 'exclude' in attrs:
+            raise serializers.ValidationError("Use either fields or exclude, not both.")
+
+        available = [name for name, field in self.item_serializer().fields.items() if not field.write_only]
+        if attrs.get('lang'):
+            # Only the output name of each bilingual field pair exists in single-language responses
+            pairs = localized_field_pairs(self.item_serializer)
+            hidden = {name for pair in pairs.values() for name in pair}.difference(pairs)
+            available = [name for name in available if name not in hidden]
+        fieldset = None
+        for param in ('fields', 'exclude'):
+            if param not in attrs:
+                continue
+            names = {name.strip() for name in attrs.pop(param).split(',') if name.strip()}
+            unknown = names.difference(available)
+            if unknown:
+                raise serializers.ValidationError({param: f"Unknown field(s): {', '.join(sorted(unknown))}"})
+            fieldset = frozenset(names if param == 'fields' else set(available) - names)
+        attrs['fieldset'] = fieldset
+        return attrs
+
+class LabTestsQuerySerializer(FieldsetQuerySerializer):
+    """Optional query parameters of the lab test list endpoints."""
+    item_serializer = LabTestSerializer
+
 class LabTestCategorySerializer(OerpSerializerMixin, serializers.Serializer):
     id = serializers.IntegerField()
     name = serializers.CharField(allow_null=True)
@@ -188,6 +280,37 @@ class GetPatientResponseSerializer(serializers.Serializer):
 class GetPatientResponseListSerializer(serializers.Serializer):
     patients = GetPatientResponseSerializer(many=True)
 
+class GetPatientsBatchRequestSerializer(serializers.Serializer):
+    personalNumbers = serializers.ListField(
+        child=serializers.CharField(),
+        min_length=1,
+        max_length=1000,
+        help_text="Personal numbers to look up (max 1000)"
+    )
+
+    def validate_personalNumbers(self, value):
+        """
+        Sanitize and validate every personal number to ensure it contains exactly 11 digits.
+        Duplicates are removed, keeping the first occurrence.
+        """
+        sanitized_numbers = []
+        for idx, personal_number in enumerate(value):
+            sanitized = ''.join(filter(str.isdigit, str(personal_number)))
+            if len(sanitized) != 11:
+                raise serializers.ValidationError(
+                    f"Personal number at index {idx} must be exactly 11 digits. Received {len(sanitized)} digits."
+                )
+            sanitized_numbers.append(sanitized)
+        return list(dict.fromkeys(sanitized_numbers))
+
+class PatientsByPersonalNumberSerializer(serializers.Serializer):
+    personalNumber = serializers.CharField()
+    patients = GetPatientResponseSerializer(many=True)
+
+class GetPatientsBatchResponseSerializer(serializers.Serializer):
+    results = PatientsByPersonalNumberSerializer(many=True, help_text="Patients grouped by personal number, in request order")
+    totalFound = serializers.IntegerField(help_text="Number of personal numbers with at least one patient")
+
 class CheckPatientExistsRequestSerializer(serializers.Serializer):
     personalNumber = serializers.CharField()
     mobilePhone = serializers.CharField()
@@ -261,10 +384,10 @@ class RevokeTokenResponseSerializer(serializers.Serializer):
 
 class PatientSessionSerializer(serializers.Serializer):
     sessionId = serializers.UUIDField(help_text="Unique session identifier")
-    deviceName = serializers.CharField(help_text="Device/browser that created this session")
+    deviceName = serializers.CharField(allow_null=True, help_text="Device/browser that created this session")
     createdAt = serializers.DateTimeField(help_text="When the session was created", default_timezone=tzTBS)
-    lastUsedAt = serializers.DateTimeField(help_text="When the session was last used", default_timezone=tzTBS)
-    clientIp = serializers.CharField(help_text="IP address of the device")
+    lastUsedAt = serializers.DateTimeField(allow_null=True, help_text="When the session was last used", default_timezone=tzTBS)
+    clientIp = serializers.CharField(allow_null=True, help_text="IP address of the device")
     isActive = serializers.BooleanField(help_text="Whether the session has active (non-revoked, non-expired) tokens")
 
 class GetSessionsResponseSerializer(serializers.Serializer):
@@ -280,6 +403,8 @@ class RevokeSessionResponseSerializer(serializers.Serializer):
     message = serializers.CharField()
 
 class LabOrderParameterSerializer(serializers.Serializer):
+    localized_fields = {'comment': ('commenten', 'comment')}
+
     id = serializers.IntegerField()
     parameter_id = serializers.IntegerField()
     parameter_name = serializers.CharField(allow_null=True, required=False)
@@ -331,6 +456,8 @@ class LabOrderPDFSerializer(serializers.Serializer):
 
 class LabOrderDetailSerializer(serializers.Serializer):
     """Serializer for lab order. Can include optional parameters field."""
+    localized_fields = {'comment_inside': ('comment_inside_en', 'comment_inside')}
+
     id = serializers.IntegerField()
     name = serializers.CharField(max_length=64)
     state = serializers.CharField(allow_null=True, required=False)
@@ -361,12 +488,28 @@ class LabOrderDetailSerializer(serializers.Serializer):
     pregnancy_week = serializers.CharField(allow_null=True, required=False, allow_blank=True, help_text="Pregnancy week information (if applicable)")
     pregnancy_week_geo = serializers.CharField(allow_null=True, required=False, allow_blank=True, help_text="Pregnancy week information in Georgian (if applicable)")
 
+class LabOrdersFilterSerializer(FieldsetQuerySerializer):
+    """Optional query parameters for filtering the lab order list and selecting its fields."""
+    item_serializer = LabOrderDetailSerializer
+
+    dateFrom = serializers.DateField(required=False, help_text="Only orders dated on or after this date (YYYY-MM-DD)")
+    dateTo = serializers.DateField(required=False, help_text="Only orders dated on or before this date (YYYY-MM-DD)")
+    categoryId = serializers.IntegerField(required=False, min_value=1, help_text="Only orders in this product category")
+    userPortalCategoryId = serializers.IntegerField(required=False, min_value=1, help_text="Only orders in this user portal category")
+
+    def validate(self, attrs):
+        if attrs.get('dateFrom') and attrs.get('dateTo') and attrs['dateFrom'] > attrs['dateTo']:
+            raise serializers.ValidationError("dateFrom must not be after dateTo.")
+        return super().validate(attrs)
+
 class LabOrdersSerializer(serializers.Serializer):
     labOrders = LabOrderDetailSerializer(many=True, help_text="List of lab orders for the patient")
     totalLabOrders = serializers.IntegerField(help_text="Total number of lab orders")
 
 
 class LabOrderStatSerializer(serializers.Serializer):
+    localized_fields = {'categ_name': ('categ_name_eng', 'categ_name_geo')}
+
     laborder_id = serializers.IntegerField(help_text="Lab order ID")
     categ_id = serializers.IntegerField(help_text="Category ID")
     categ_name_eng = serializers.CharField(help_text="Category name ENG", allow_null=True)
@@ -480,6 +623,27 @@ class PivotTableResponseSerializer(serializers.Serializer):
     totalRows = serializers.IntegerField(help_text="Total number of parameter rows")
 
 
+class PivotTablesResponseSerializer(serializers.Serializer):
+    pivots = PivotTableResponseSerializer(many=True, help_text="One pivot table per requested category")
+    totalPivots = serializers.IntegerField(help_text="Total number of pivot tables")
+
+
+class ParameterSeriesResponseSerializer(serializers.Serializer):
+    parameterIdUom = serializers.CharField(help_text="Parameter ID and unit of measure ID, as in pivot tables")
+    parameter = serializers.CharField(help_text="Parameter name (localized)")
+    uom = serializers.CharField(allow_null=True, help_text="Unit of measure name")
+    patientId = serializers.IntegerField(help_text="Patient partner ID")
+    points = serializers.ListField(
+        child=serializers.ListField(),
+        help_text="[date, value] pairs ordered by date, downsampled to at most maxPoints"
+    )
+    totalPoints = serializers.IntegerField(help_text="Number of results before downsampling")
+    referenceMin = serializers.FloatField(allow_null=True, help_text="Lower reference bound of the most recent result")
+    referenceMax = serializers.FloatField(allow_null=True, help_text="Upper reference bound of the most recent result")
+    referenceInclude = serializers.BooleanField(help_text="Whether the reference bounds are inclusive")
+    referenceRange = serializers.CharField(help_text="Reference range of the most recent result, formatted for display")
+
+
 class LabTestPDFsSerializer(serializers.Serializer):
     pdf_eng = serializers.CharField(allow_null=True, help_text="Base64-encoded English PDF")
     pdf_eng_filename = serializers.CharField(allow_null=True, help_text="English PDF filename")
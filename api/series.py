@@ -0,0 +1,57 @@
+"""
+Server-side downsampling of parameter time series for trend charts.
+"""
+
+
+def downsample_lttb(points, threshold):
+    """
+    Select the indices of points to keep with the Largest-Triangle-Three-Buckets algorithm.
+
+    The first and last points are always kept. The points in between are split
+    into threshold - 2 buckets and, from each bucket, the point forming the
+    largest triangle with the previously selected point and the average of the
+    next bucket is kept. This preserves the visual shape (peaks and troughs) of
+    the series far better than taking every n-th point.
+
+    Args:
+        points: Sequence of (x, y) numbers, ordered by x
+        threshold: Maximum number of points to keep
+
+    Returns:
+        List of indices into points, in ascending order. All indices are
+        returned if the series is not longer than threshold or threshold < 3.
+    """
+    n = len(points)
+    if threshold >= n or threshold < 3:
+        return list(range(n))
+
+    selected = [0]
+    bucket_size = (n - 2) / (threshold - 2)
+    a = 0
+
+    for i in range(threshold - 2):
+        # Average of the next bucket (the last point for the final bucket)
+        avg_start = int((i + 1) * bucket_size) + 1
+        avg_end = min(int((i + 2) * bucket_size) + 1, n)
+        avg_count = avg_end - avg_start
+        avg_x = sum(points[j][0] for j in range(avg_start, avg_end)) / avg_count
+        avg_y = sum(points[j][1] for j in range(avg_start, avg_end)) / avg_count
+
+        # Point of the current bucket forming the largest triangle
+        ax, ay = points[a]
+        range_start = int(i * bucket_size) + 1
+        range_end = int((i + 1) * bucket_size) + 1
+        max_area = -1.0
+        next_a = range_start
+        for j in range(range_start, range_end):
+            px, py = points[j]
+            area = abs((ax - avg_x) * (py - ay) - (ax - px) * (avg_y - ay))
+            if area > max_area:
+                max_area = area
+                next_a = j
+
+        selected.append(next_a)
+        a = next_a
+
+    selected.append(n - 1)
+    return selected
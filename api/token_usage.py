@@ -0,0 +1,137 @@
+"""
+Write-behind recording of PatientToken.last_used_at.
+
+Authentication used to save last_used_at on every request, a synchronous
+write to the default database in the hot path (and a lock on SQLite). Uses
+are now only recorded when the token's last recorded use is older than
+``min_interval``, buffered in memory, and written by a background thread with
+one bulk UPDATE every ``flush_interval`` seconds, plus one for the sessions
+the tokens belong to. Buffered uses are flushed when the process exits; a
+flush_interval of 0 writes them immediately.
+"""
+import atexit
+import logging
+import os
+import threading
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import close_old_connections
+from django.db.models import Case, DateTimeField, Value, When
+from django.utils import timezone
+
+from .models import PatientToken, PatientSession
+
+logger = logging.getLogger(__name__)
+
+# Tokens updated per UPDATE statement
+FLUSH_BATCH_SIZE = 500
+
+_pending = {}  # jti -> (last use not yet written, session_id)
+_recorded = {}  # jti -> last use written or pending, to throttle writes
+_lock = threading.Lock()
+
+_flusher_pid = None
+_flusher_lock = threading.Lock()
+
+
+def record_token_use(jti, last_used_at=None, session_id=None):
+    """
+    Record that the token with this jti was just used.
+
+    Args:
+        jti: JWT ID of the token
+        last_used_at: The token's stored last_used_at, if known
+        session_id: Session the token belongs to, whose last_used_at is updated too
+    """
+    config = settings.PATIENT_TOKEN_LAST_USED
+    now = timezone.now()
+    with _lock:
+        previous = max(filter(None, (_recorded.get(jti), last_used_at)), default=None)
+        if previous is not None and now - previous < timedelta(seconds=config['min_interval']):
+            return
+        _recorded[jti] = now
+        _pending[jti] = (now, session_id)
+
+    if config['flush_interval']:
+        _ensure_flusher_started(config['flush_interval'])
+    else:
+        flush()
+
+
+def flush():
+    """
+    Write the buffered uses, one UPDATE per FLUSH_BATCH_SIZE tokens.
+    Uses that could not be written are buffered again. Returns the number of tokens written.
+    """
+    min_interval = timedelta(seconds=settings.PATIENT_TOKEN_LAST_USED['min_interval'])
+    with _lock:
+        pending = list(_pending.items())
+        _pending.clear()
+        # Entries older than min_interval no longer throttle anything
+        cutoff = timezone.now() - min_interval
+        for jti in [jti for jti, used_at in _recorded.items() if used_at < cutoff]:
+            del _recorded[jti]
+    if not pending:
+        return 0
+
+    written = 0
+    try:
+        for i in range(0, len(pending), FLUSH_BATCH_SIZE):
+            batch = pending[i:i + FLUSH_BATCH_SIZE]
+            PatientToken.objects.filter(jti__in=[jti for jti, _ in batch]).update(
+                last_used_at=Case(
+                    *(When(jti=jti, then=Value(used_at)) for jti, (used_at, _) in batch),
+                    output_field=DateTimeField(),
+                )
+            )
+            sessions = {}
+            for _, (used_at, session_id) in batch:
+                if session_id and (session_id not in sessions or used_at > sessions[session_id]):
+                    sessions[session_id] = used_at
+            if sessions:
+                PatientSession.objects.filter(session_id__in=sessions).update(
+                    last_used_at=Case(
+                        *(When(session_id=session_id, then=Value(used_at)) for session_id, used_at in sessions.items()),
+                        output_field=DateTimeField(),
+                    )
+                )
+            written += len(batch)
+    except Exception as e:
+        logger.error(f"Failed to write last_used_at of {len(pending) - written} token(s): {e}")
+        with _lock:
+            for jti, use in pending[written:]:
+                # A newer use may have been buffered meanwhile
+                _pending.setdefault(jti, use)
+    logger.debug(f"Wrote last_used_at of {written} token(s)")
+    return written
+
+
+def _flush_forever(interval):
+    while True:
+        time.sleep(interval)
+        close_old_connections()
+        try:
+            flush()
+        except Exception as e:
+            logger.error(f"last_used_at flusher error: {e}")
+
+
+def _ensure_flusher_started(interval):
+    """Start this process's flusher thread (lazily, so it runs in each worker after fork)."""
+    global _flusher_pid
+
+    if _flusher_pid == os.getpid():
+        return
+    with _flusher_lock:
+        if _flusher_pid == os.getpid():
+            return
+        _flusher_pid = os.getpid()
+        threading.Thread(
+            target=_flush_forever,
+            args=(interval,),
+            name='token-last-used-flusher',
+            daemon=True,
+        ).start()
+        atexit.register(flush)
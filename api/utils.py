@@ -1,28 +1,35 @@
+import base64
 import os
+import re
 import subprocess
+import time
 import traceback
 import logging
 from unittest import result
 from xmlrpc import client as rpc_client
 from typing import Generator
 from contextlib import ExitStack
+from itertools import groupby
+from operator import itemgetter
 
 import psycopg2
 from psycopg2.extensions import AsIs
 from django.conf import settings
-from django.db import connections
+from django.db import connections, transaction
 from django.utils import timezone
 
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone as dt_timezone
 
 import uuid
 
 from rest_framework_simplejwt.tokens import RefreshToken
 from rest_framework_simplejwt.exceptions import TokenError, InvalidToken
-from .models import PatientToken
+from .models import PatientToken, PatientSession, PatientPhone, PatientPhoneSync
+from .cache import get_cache, patient_tag, product_tag, CATALOG_TAG, patient_cache_ttl, catalog_cache_ttl, pivot_cache_ttl
 
-import pandas as pd
-from collections import OrderedDict
+from .pivot import pivot_parameter_rows
+from .series import downsample_lttb
+from .records import record_type, fetch_records, fetch_record
 
 logger = logging.getLogger(__name__)
 logger.setLevel(logging.DEBUG)
@@ -32,6 +39,34 @@ DATETIME_FORMAT = settings.DATETIME_FORMAT
 
 PDF_SERVER_URL = 'https://p.mrcheveli.com/'
 
+# Decoded bytes read from the database per round trip when streaming lab test PDFs
+PDF_STREAM_CHUNK_SIZE = 256 * 1024
+# Stored bytes read from the end of a lab test PDF to find its base64 padding and check its last line breaks
+PDF_TAIL_LENGTH = 256
+# Every res_partner record of a patient. OpenERP may hold duplicate partners with the same
+# inno_id, and the orders of all of them belong to the patient.
+PATIENT_PARTNERS_SQL = "SELECT id FROM res_partner WHERE inno_id = %(personal_number)s AND inno_patient = true"
+
+# Row types of the hot lab order queries (see api/records.py). Columns must match the SELECT lists.
+LabOrderRow = record_type('LabOrderRow', [
+    'id', 'name', 'state', 'date_order', 'categ_id', 'user_portal_categ_id', 'user_portal_categ_name',
+    'user_portal_categ_name_geo', 'date_done', 'comment_inside', 'comment_inside_en', 'create_date',
+    'write_date', 'has_details', 'meta_keywords', 'pregnancy_week', 'pregnancy_week_geo',
+], extra=['parameters', 'pdf_files'])
+LabOrderParameterRow = record_type('LabOrderParameterRow', [
+    'id', 'parameter_id', 'parameter_name', 'parameter_name_geo', 'parameter_abbr', 'value', 'value_min',
+    'value_max', 'include', 'value_text', 'value_text_geo', 'value_text_ref', 'value_text_ref_geo',
+    'value_text_arrow', 'uom_id', 'uom_name', 'uom_name_geo', 'state', 'comment', 'commenten', 'sequence',
+    'instrument_name', 'updated_at', 'material_id', 'material_name', 'material_name_geo',
+], extra=['abnormal_indicator', 'reference_range'], floats=['value', 'value_min', 'value_max'])
+LabOrderStatRow = record_type('LabOrderStatRow', [
+    'laborder_id', 'categ_id', 'categ_name_eng', 'categ_name_geo', 'date', 'param_id_uom', 'parameter',
+    'value', 'orderby',
+])
+ParameterSeriesRow = record_type('ParameterSeriesRow', [
+    'date', 'value', 'value_min', 'value_max', 'include',
+], floats=['value', 'value_min', 'value_max'])
+
 # Cache for OpenERP XML-RPC connection parameters
 _oerp_xmlrpc_cache = {}
 
@@ -74,18 +109,36 @@ def _get_oerp_xmlrpc_params():
         _oerp_xmlrpc_cache['password']
     )
 
-# Deprecated and unnecessary function, should be removed
-def _normalize_oerp(value):
+# (model, method) calls whose XML-RPC results oerp_execute() normalizes from False to None,
+# mapped to the fields that hold actual booleans and keep their False.
+# Only calls feeding serializers: values sent back over XML-RPC must stay marshallable (no None).
+OERP_FALSE_TO_NONE_CALLS = {
+    ('product.product', 'get_web_products_data'): frozenset({'active', 'has_pdf'}),
+    ('product.product', 'get_child_product_names'): frozenset(),
+}
+
+
+def _normalize_oerp(value, keep=frozenset()):
     """
     OpenERP v7 returns boolean False for any unset field over XML-RPC.
-    Recursively convert False → None so serializers receive a proper null.
+    Convert False → None in place throughout the dicts and lists of a freshly
+    decoded XML-RPC result, except for the dict keys in keep.
     """
     if value is False:
         return None
     if isinstance(value, dict):
-        return {k: _normalize_oerp(v) for k, v in value.items()}
-    if isinstance(value, list):
-        return [_normalize_oerp(v) for v in value]
+        for k, v in value.items():
+            if v is False:
+                if k not in keep:
+                    value[k] = None
+            elif isinstance(v, (dict, list)):
+                _normalize_oerp(v, keep)
+    elif isinstance(value, list):
+        for i, v in enumerate(value):
+            if v is False:
+                value[i] = None
+            elif isinstance(v, (dict, list)):
+                _normalize_oerp(v, keep)
     return value
 
 
@@ -99,7 +152,8 @@ def oerp_execute(*args):
                Typically: model_name, method_name, [ids], {parameters}
     
     Returns:
-        Result from the OpenERP XML-RPC call
+        Result from the OpenERP XML-RPC call. For calls in OERP_FALSE_TO_NONE_CALLS,
+        False values are already converted to None, so serializers never see them.
         
     Example:
         # Search for partners
@@ -112,6 +166,9 @@ def oerp_execute(*args):
         url, dbname, uid, password = _get_oerp_xmlrpc_params()
         models = rpc_client.ServerProxy(f"{url}/xmlrpc/object")
         result = models.execute_kw(dbname, uid, password, *args)
+        keep = OERP_FALSE_TO_NONE_CALLS.get(args[:2])
+        if keep is not None:
+            result = _normalize_oerp(result, keep)
         logger.debug(f"oerp_execute({args[0]}, {args[1]}) successful")
         return result
     except Exception as e:
@@ -386,31 +443,252 @@ def get_patient_by_personal_number(personal_number):
     Returns:
         List of dictionaries containing patient data, or empty list if not found
     """
-    patients = []
+    patients = get_patients_by_personal_numbers([personal_number])[personal_number]
+    logger.debug(f"get_patient_by_personal_number({personal_number}) found {len(patients)} patient(s)")
+    return patients
+
+
+def get_patients_by_personal_numbers(personal_numbers):
+    """
+    Query OpenERP database for the patients of several personal numbers with one query.
+    
+    Args:
+        personal_numbers: Iterable of 11-digit Georgian personal identification numbers
+        
+    Returns:
+        Dictionary mapping every requested personal number to a list of patient
+        dictionaries (empty if not found), ordered by partner ID
+    """
+    patients = {personal_number: [] for personal_number in personal_numbers}
+    if not patients:
+        return patients
     
     with get_oerp_connection().cursor() as cursor:
         sql = """
-            SELECT id, inno_first_name, inno_last_name, inno_birthdate, 
+            SELECT inno_id, id, inno_first_name, inno_last_name, inno_birthdate, 
                    street, mobile, email, inno_code
             FROM res_partner
-            WHERE inno_id = %s AND inno_patient = true
+            WHERE inno_id = ANY(%s) AND inno_patient = true
+            ORDER BY id
         """
-        cursor.execute(sql, (personal_number,))
+        cursor.execute(sql, (list(patients),))
         
         columns = ['id', 'first_name', 'last_name', 'date_of_birth', 
                   'address', 'mobile_phone', 'email', 'inno_code']
         
         for row in cursor.fetchall():
-            patients.append(dict(zip(columns, row)))
+            patients[row[0]].append(dict(zip(columns, row[1:])))
     
-    logger.debug(f"get_patient_by_personal_number({personal_number}) found {len(patients)} patient(s)")
+    logger.debug(f"get_patients_by_personal_numbers() found patients for {sum(1 for found in patients.values() if found)} of {len(patients)} personal number(s)")
     return patients
 
 
+def get_partner_id(personal_number):
+    """
+    Resolve the res_partner ID of a patient by personal number.
+    The mapping never changes, so resolved IDs are kept in a small LRU.
+    If the patient has duplicate partner records the lowest ID is returned;
+    queries of the patient's orders filter on all of them (PATIENT_PARTNERS_SQL).
+    Tokens carry a partner_id claim, so this is only a fallback for tokens
+    issued before the claim was introduced.
+    
+    Args:
+        personal_number: 11-digit Georgian personal identification number
+        
+    Returns:
+        int: Partner ID, or None if no patient has this personal number
+    """
+    cache = get_cache('partner_ids', maxsize=4096)
+    partner_id = cache.get(personal_number)
+    if partner_id is not None:
+        return partner_id
+    
+    with get_oerp_connection().cursor() as cursor:
+        sql = """
+            SELECT id FROM res_partner 
+            WHERE inno_id = %s AND inno_patient = true
+            ORDER BY id
+            LIMIT 1
+        """
+        cursor.execute(sql, (personal_number,))
+        row = cursor.fetchone()
+    
+    if row:
+        partner_id = row[0]
+        # Misses are not cached, the patient may be created later
+        cache.set(personal_number, partner_id)
+    
+    logger.debug(f"get_partner_id({personal_number}) = {partner_id}")
+    return partner_id
+
+
+def normalize_phone(phone):
+    """
+    Normalize a mobile phone number for matching against res_partner.mobile.
+    Keeps the digits 0-9 only and drops the Georgian country code (995) of 12-digit numbers.
+    check_patient_exists() applies the same rule in SQL (NORMALIZED_PHONE_SQL).
+    
+    Args:
+        phone: Phone number as entered, e.g. '+995 555-12-34-56'
+        
+    Returns:
+        Normalized phone number (e.g. '555123456'), or '' if it has no digits
+    """
+    digits = re.sub(r'[^0-9]', '', phone or '')
+    if len(digits) == 12 and digits.startswith('995'):
+        digits = digits[3:]
+    return digits
+
+
+# normalize_phone() of the SQL expression `digits` (regexp_replace(phone, '[^0-9]', '', 'g'))
+NORMALIZED_PHONE_SQL = "CASE WHEN length(digits) = 12 AND digits LIKE '995%%' THEN substr(digits, 4) ELSE digits END"
+
+
+def split_partner_phones(mobile):
+    """Split res_partner.mobile (comma/semicolon/period separated) into normalized phone numbers."""
+    phones = (normalize_phone(phone) for phone in re.split(r'[,;.]', (mobile or '').strip()))
+    return sorted({phone for phone in phones if phone})
+
+
+def _as_utc(write_date):
+    """OpenERP stores write_date as naive UTC."""
+    return write_date.replace(tzinfo=dt_timezone.utc) if timezone.is_naive(write_date) else write_date
+
+
+def sync_patient_phone_index(full=False):
+    """
+    Update the local patient phone index (PatientPhone) from res_partner.mobile.
+    Run by `manage.py sync_patient_phones` (e.g. from cron), never in a request.
+    Incremental syncs only re-read partners written since the previous sync's
+    watermark minus PHONE_INDEX['overlap'] seconds, so partners committed late
+    with an older write_date are not missed. Deleted partners never show up as
+    written, so their entries are dropped by prune_patient_phone_index() instead.
+    A full sync rebuilds the index and is needed once, before the index is used.
+    The outcome is recorded in PatientPhoneSync; after a failed sync
+    check_patient_exists() ignores the index until a sync succeeds.
+    
+    Args:
+        full: Rebuild the whole index instead of syncing changed partners
+        
+    Returns:
+        Number of partners (re)indexed or removed
+    """
+    state = PatientPhoneSync.get()
+    if not full and state.watermark is None:
+        logger.debug("sync_patient_phone_index() index was never built, full sync required")
+        return 0
+    
+    try:
+        return _sync_patient_phone_index(state, full)
+    except Exception as e:
+        PatientPhoneSync.objects.filter(pk=state.pk).update(last_error=str(e) or repr(e))
+        raise
+
+
+def _sync_patient_phone_index(state, full):
+    with get_oerp_connection().cursor() as cursor:
+        if full:
+            sql = """
+                SELECT id, inno_id, inno_patient, mobile, COALESCE(write_date, create_date)
+                FROM res_partner
+                WHERE inno_patient = true
+            """
+            cursor.execute(sql)
+        else:
+            # Non-patients are read too, so entries of partners that stopped being patients are dropped.
+            # Filters on write_date alone so the index created by `sync_patient_phones --create-index` is used.
+            since = state.watermark - timedelta(seconds=settings.PHONE_INDEX['overlap'])
+            sql = """
+                SELECT id, inno_id, inno_patient, mobile, write_date
+                FROM res_partner
+                WHERE write_date > %s
+            """
+            cursor.execute(sql, (timezone.make_naive(since, dt_timezone.utc),))
+        partners = cursor.fetchall()
+    
+    watermark = state.watermark
+    entries = []
+    for partner_id, personal_number, is_patient, mobile, write_date in partners:
+        if write_date is not None:
+            write_date = _as_utc(write_date)
+            watermark = max(watermark, write_date) if watermark else write_date
+        if not is_patient or not personal_number or len(personal_number) > 11:
+            continue
+        for phone in split_partner_phones(mobile):
+            entries.append(PatientPhone(
+                partner_id=partner_id,
+                personal_number=personal_number,
+                phone=phone,
+                partner_write_date=write_date,
+            ))
+    
+    with transaction.atomic():
+        if full:
+            PatientPhone.objects.all().delete()
+        else:
+            partner_ids = [row[0] for row in partners]
+            for i in range(0, len(partner_ids), 500):
+                PatientPhone.objects.filter(partner_id__in=partner_ids[i:i + 500]).delete()
+        PatientPhone.objects.bulk_create(entries, batch_size=1000)
+        PatientPhoneSync.objects.filter(pk=state.pk).update(
+            watermark=watermark,
+            synced_at=timezone.now(),
+            last_error='',
+        )
+    
+    logger.debug(f"sync_patient_phone_index(full={full}) indexed {len(entries)} phone(s) of {len(partners)} partner(s)")
+    return len(partners)
+
+
+def prune_patient_phone_index(chunk_size=10000):
+    """
+    Drop the PatientPhone entries of partners deleted from res_partner.
+    Looks up every indexed partner, so it is run less often than the incremental
+    sync (`manage.py sync_patient_phones --prune`, e.g. daily).
+    
+    Args:
+        chunk_size: Partner IDs looked up per query
+        
+    Returns:
+        Number of deleted partners whose entries were dropped
+    """
+    indexed_partner_ids = list(PatientPhone.objects.values_list('partner_id', flat=True).distinct())
+    deleted_partner_ids = []
+    with get_oerp_connection().cursor() as cursor:
+        for i in range(0, len(indexed_partner_ids), chunk_size):
+            chunk = indexed_partner_ids[i:i + chunk_size]
+            cursor.execute("SELECT id FROM res_partner WHERE id = ANY(%s)", (chunk,))
+            existing = {row[0] for row in cursor.fetchall()}
+            deleted_partner_ids.extend(partner_id for partner_id in chunk if partner_id not in existing)
+    
+    with transaction.atomic():
+        for i in range(0, len(deleted_partner_ids), 500):
+            PatientPhone.objects.filter(partner_id__in=deleted_partner_ids[i:i + 500]).delete()
+    
+    logger.debug(f"prune_patient_phone_index() removed {len(deleted_partner_ids)} deleted partner(s) "
+                 f"of {len(indexed_partner_ids)} indexed")
+    return len(deleted_partner_ids)
+
+
+def phone_index_is_fresh():
+    """Whether the last phone index sync succeeded within PHONE_INDEX['max_age'] seconds."""
+    state = PatientPhoneSync.objects.filter(pk=1).first()
+    return (
+        state is not None
+        and not state.last_error
+        and state.synced_at is not None
+        and timezone.now() - state.synced_at < timedelta(seconds=settings.PHONE_INDEX['max_age'])
+    )
+
+
 def check_patient_exists(personal_number, mobile_phone):
     """
     Check if a patient exists in OpenERP database with matching personal number and mobile phone.
-    Handles multiple phone numbers separated by comma, semicolon, or period.
+    Handles multiple phone numbers separated by comma, semicolon, or period; numbers on both
+    sides are compared after normalize_phone().
+    The local phone index is checked first while it is fresh (see phone_index_is_fresh); on a
+    miss (e.g. a phone added since the last sync), or when the last sync failed or is too old,
+    the check splits res_partner.mobile in SQL.
     
     Args:
         personal_number: 11-digit Georgian personal identification number
@@ -419,20 +697,30 @@ def check_patient_exists(personal_number, mobile_phone):
     Returns:
         Boolean: True if patient exists with matching phone, False otherwise
     """
+    phone = normalize_phone(mobile_phone)
+    if not phone:
+        logger.debug(f"check_patient_exists({personal_number}, {mobile_phone}) = False (no digits)")
+        return False
+    
+    if phone_index_is_fresh() and PatientPhone.objects.filter(personal_number=personal_number, phone=phone).exists():
+        logger.debug(f"check_patient_exists({personal_number}, {mobile_phone}) = True (phone index)")
+        return True
+    
     with get_oerp_connection().cursor() as cursor:
         # Use regexp_split_to_table to handle comma/semicolon/period separated phone numbers
-        sql = """
+        sql = f"""
             SELECT COUNT(*) 
             FROM res_partner
             WHERE inno_id = %s 
               AND inno_patient = true
               AND EXISTS (
                   SELECT 1 
-                  FROM regexp_split_to_table(trim(mobile), '[,;.]') AS phone
-                  WHERE trim(phone) = %s
+                  FROM regexp_split_to_table(trim(mobile), '[,;.]') AS phone,
+                      regexp_replace(phone, '[^0-9]', '', 'g') AS digits
+                  WHERE {NORMALIZED_PHONE_SQL} = %s
               )
         """
-        cursor.execute(sql, (personal_number, mobile_phone))
+        cursor.execute(sql, (personal_number, phone))
         count = cursor.fetchone()[0]
     
     exists = count > 0
@@ -511,24 +799,55 @@ def generate_reference_range(row):
     else:
         return 'Error'
 
-def get_lab_orders(personal_number, laborder_id=None, include_parameters=False):
+def get_lab_orders(personal_number, laborder_id=None, include_parameters=False,
+                   date_from=None, date_to=None, categ_id=None, user_portal_categ_id=None,
+                   fields=None, translate=True):
     """
     Query OpenERP database for lab orders by patient's personal number.
-    Joins inno_laborder with res_partner to filter by personal number.
+    Filters inno_laborder on the IDs of the patient's partner records (PATIENT_PARTNERS_SQL).
     Optionally fetches a single order with parameters.
+    Results are cached per patient and evicted by the NOTIFY listener when
+    the patient's orders or documents change. Callers must not mutate them.
     
     Args:
         personal_number: 11-digit Georgian personal identification number
         laborder_id: Optional ID of specific lab order to retrieve
         include_parameters: If True, includes parameters from inno_laborder_parameter
+        date_from: Optional date; only orders with date_order on or after it
+        date_to: Optional date; only orders with date_order on or before it
+        categ_id: Optional product category ID (inno_laborder.categ_id)
+        user_portal_categ_id: Optional user portal category ID (user_portal_categ_id in the result)
+        fields: Optional set of LabOrderDetailSerializer field names to compute; other
+                columns are returned as None and the PDF lookup is skipped without pdf_files
+        translate: If False, the ka_GE ir_translation joins are skipped and the *_geo columns are None
         
     Returns:
         If laborder_id is provided: Single dictionary with lab order data (or None if not found)
         Otherwise: List of dictionaries containing lab order data, or empty list if not found
     """
+    cache = get_cache('lab_orders', maxsize=2048, ttl=patient_cache_ttl())
+    filters = {
+        'date_from': date_from,
+        'date_to': date_to,
+        'categ_id': categ_id,
+        'user_portal_categ_id': user_portal_categ_id,
+    }
+    fieldset = None if fields is None else tuple(sorted(fields))
+    return cache.get_or_set(
+        (personal_number, laborder_id, include_parameters, *filters.values(), fieldset, translate),
+        lambda: _query_lab_orders(personal_number, laborder_id, include_parameters,
+                                  fields=fields, translate=translate, **filters),
+        tags=(patient_tag(personal_number),),
+    )
+
+
+def _query_lab_orders(personal_number, laborder_id=None, include_parameters=False,
+                      date_from=None, date_to=None, categ_id=None, user_portal_categ_id=None,
+                      fields=None, translate=True):
+    """Uncached implementation of get_lab_orders()."""
     with get_oerp_connection().cursor() as cursor:
         # Build WHERE clause
-        where_clauses = ["rp.inno_id = %(personal_number)s", "rp.inno_patient = true", "lo.create_date >= '2020-01-01'", "lo.state = 'done'"]
+        where_clauses = [f"lo.partner_id IN ({PATIENT_PARTNERS_SQL})", "lo.create_date >= '2020-01-01'", "lo.state = 'done'"]
 
         # comment_inside and comment_inside_en are only shown for certain categories (parent_id in 15 (ადგილობრივი), 35 (ფილიალები))
         LOCAL_CATEGORY_PARENT_IDS = (15, 35)
@@ -557,52 +876,47 @@ def get_lab_orders(personal_number, laborder_id=None, include_parameters=False):
             'laborder_id': laborder_id,
             'local_category_parent_ids': LOCAL_CATEGORY_PARENT_IDS,
             'no_details_category_ids': NO_DETAILS_CATEGORY_IDS,
+            'date_from': date_from,
+            'date_to': date_to,
+            'categ_id': categ_id,
+            'user_portal_categ_id': user_portal_categ_id,
         }
 
         if laborder_id:
             where_clauses.append("lo.id = %(laborder_id)s")
 
-        sql = f"""
-            WITH category_map AS (
-                SELECT
-                    CASE WHEN wupc.id IS NOT NULL THEN wupc.id ELSE pc.id END AS id,
-                    pc.id as pc_categ_id,
-                    pc.parent_id as parent_id,
-                    CASE WHEN wupc.id IS NOT NULL THEN wupc.name ELSE pc.name END AS name,
-                    CASE WHEN wupc.id IS NOT NULL THEN 'web.user.portal.category,name' ELSE 'product.category,name' END AS it_translation_name
-                FROM product_category pc
-                LEFT JOIN web_user_portal_category wupc
-                    ON wupc.id = pc.web_user_portal_category_id
-            )
-            SELECT 
-                lo.id,
-                lo.name,
-                lo.state,
-                --lo.shop_id,
-                lo.date_order,
-                --lo.partner_id,
-                --lo.add_id,
-                --lo.inno_height,
-                --lo.inno_weight,
-                lo.categ_id as categ_id,
-                cm.id as user_portal_categ_id,
-                cm.name as user_portal_categ_name,
-                it.value as user_portal_categ_name_geo,
-                lo.date_done,
-                --lo.print_urin,
-                --lo.active,
-                CASE WHEN cm.parent_id IN %(local_category_parent_ids)s THEN lo.comment_inside ELSE NULL END as comment_inside,
-                CASE WHEN cm.parent_id IN %(local_category_parent_ids)s THEN lo.comment_inside_en ELSE NULL END as comment_inside_en,
-                --lo.cap_blood,
-                --lo.erythrocyte,
-                --lo.not_read,
-                lo.create_date,
-                lo.write_date,
-                CASE WHEN lo.categ_id IN %(no_details_category_ids)s THEN false ELSE EXISTS (
+        # Optional filters, kept sargable on inno_laborder columns
+        if date_from:
+            where_clauses.append("lo.date_order >= %(date_from)s")
+        if date_to:
+            where_clauses.append("lo.date_order < %(date_to)s::date + 1")
+        if categ_id:
+            where_clauses.append("lo.categ_id = %(categ_id)s")
+        if user_portal_categ_id:
+            where_clauses.append("lo.categ_id IN (SELECT pc_categ_id FROM category_map WHERE id = %(user_portal_categ_id)s)")
+
+        # SELECT expressions of LabOrderRow's columns. Columns outside the requested fields
+        # are selected as NULL, so their joins and correlated subqueries are never computed.
+        # id and categ_id are always needed for the PDF lookup.
+        column_sql = {
+            'id': "lo.id",
+            'name': "lo.name",
+            'state': "lo.state",
+            'date_order': "lo.date_order",
+            'categ_id': "lo.categ_id",
+            'user_portal_categ_id': "cm.id",
+            'user_portal_categ_name': "cm.name",
+            'user_portal_categ_name_geo': "it.value",
+            'date_done': "lo.date_done",
+            'comment_inside': "CASE WHEN cm.parent_id IN %(local_category_parent_ids)s THEN lo.comment_inside ELSE NULL END",
+            'comment_inside_en': "CASE WHEN cm.parent_id IN %(local_category_parent_ids)s THEN lo.comment_inside_en ELSE NULL END",
+            'create_date': "lo.create_date",
+            'write_date': "lo.write_date",
+            'has_details': """CASE WHEN lo.categ_id IN %(no_details_category_ids)s THEN false ELSE EXISTS (
                     SELECT 1 FROM inno_laborder_parameter lp 
                     WHERE lp.laborder_id = lo.id AND lp.active
-                ) END as has_details,
-                (
+                ) END""",
+            'meta_keywords': """(
                     SELECT string_agg(
                         concat_ws(',', NULLIF(ip.name, ''), NULLIF(it_kw.value, ''), NULLIF(ip.abbr, '')),
                         ', '
@@ -612,45 +926,82 @@ def get_lab_orders(personal_number, laborder_id=None, include_parameters=False):
                     LEFT JOIN ir_translation it_kw ON it_kw.res_id = ip.id
                         AND it_kw.lang = 'ka_GE' AND it_kw."type" = 'model' AND it_kw.name = 'inno.parameter,name'
                     WHERE lp.laborder_id = lo.id AND lp.active
-                ) as meta_keywords,
-                isa.name as pregnancy_week,
-                it_add.value as pregnancy_week_geo
-            FROM inno_laborder lo
-                JOIN res_partner rp ON lo.partner_id = rp.id
-                LEFT JOIN category_map cm ON cm.pc_categ_id = lo.categ_id
-                LEFT JOIN ir_translation it ON it.res_id = cm.id 
+                )""",
+            'pregnancy_week': "isa.name",
+            'pregnancy_week_geo': "it_add.value",
+        }
+        selected = set(column_sql) if fields is None else {'id', 'categ_id', *fields}
+        if not translate:
+            selected -= {'user_portal_categ_name_geo', 'pregnancy_week_geo'}
+        select_sql = ',\n                '.join(
+            f"{column_sql[column] if column in selected else 'NULL'} as {column}" for column in LabOrderRow._columns
+        )
+
+        joins = []
+        if selected & {'user_portal_categ_id', 'user_portal_categ_name', 'user_portal_categ_name_geo',
+                       'comment_inside', 'comment_inside_en'}:
+            joins.append("LEFT JOIN category_map cm ON cm.pc_categ_id = lo.categ_id")
+        if 'user_portal_categ_name_geo' in selected:
+            joins.append("""LEFT JOIN ir_translation it ON it.res_id = cm.id 
                     AND it.lang = 'ka_GE' 
-                    AND it.name = cm.it_translation_name
-                LEFT JOIN inno_standard_add isa ON isa.id = lo.add_id
-                LEFT JOIN ir_translation it_add ON it_add.res_id = isa.id 
+                    AND it.name = cm.it_translation_name""")
+        if selected & {'pregnancy_week', 'pregnancy_week_geo'}:
+            joins.append("LEFT JOIN inno_standard_add isa ON isa.id = lo.add_id")
+        if 'pregnancy_week_geo' in selected:
+            joins.append("""LEFT JOIN ir_translation it_add ON it_add.res_id = isa.id 
                     AND it_add.name = 'inno.standard.add,name'
                     AND it_add.lang = 'ka_GE' 
-                    AND it_add.module is null
+                    AND it_add.module is null""")
+        joins_sql = '\n                '.join(joins)
+
+        sql = f"""
+            WITH category_map AS (
+                SELECT
+                    CASE WHEN wupc.id IS NOT NULL THEN wupc.id ELSE pc.id END AS id,
+                    pc.id as pc_categ_id,
+                    pc.parent_id as parent_id,
+                    CASE WHEN wupc.id IS NOT NULL THEN wupc.name ELSE pc.name END AS name,
+                    CASE WHEN wupc.id IS NOT NULL THEN 'web.user.portal.category,name' ELSE 'product.category,name' END AS it_translation_name
+                FROM product_category pc
+                LEFT JOIN web_user_portal_category wupc
+                    ON wupc.id = pc.web_user_portal_category_id
+            )
+            SELECT 
+                {select_sql}
+            FROM inno_laborder lo
+                {joins_sql}
             WHERE {' AND '.join(where_clauses)}
             ORDER BY lo.date_order DESC NULLS LAST, lo.id DESC
         """
         cursor.execute(sql, params_dict)
 
         
-        columns = [col[0] for col in cursor.description]
-        
         if laborder_id:
             # Single order
-            row = cursor.fetchone()
-            if not row:
+            lab_order = fetch_record(cursor, LabOrderRow)
+            if lab_order is None:
                 logger.debug(f"get_lab_orders({personal_number}, {laborder_id}) not found or access denied")
                 return None
             
-            lab_order = dict(zip(columns, row))
-            
             # Fetch parameters if requested
             if include_parameters:
-                sql_params = """
+                translation_joins = """
+                        LEFT JOIN ir_translation it on it.res_id = ip.id and it.lang = 'ka_GE' and it."type" = 'model' and it.name = 'inno.parameter,name'
+                        LEFT JOIN ir_translation it_uom on it_uom.res_id = pu.id and it_uom.lang = 'ka_GE' and it_uom."type" = 'model' and it_uom.name = 'product.uom,name'
+                        LEFT JOIN ir_translation it2 on it2.res_id = itx.id and it2.lang = 'ka_GE' and it2."type" = 'model' and it2.name = 'inno.textvalue,name'
+                        LEFT JOIN ir_translation it3 on it3.res_id = itx2.id and it3.lang = 'ka_GE' and it3."type" = 'model' and it3.name = 'inno.textvalue,name'
+                        LEFT JOIN ir_translation it_mat on it_mat.res_id = pt.id and it_mat.lang = 'ka_GE' and it_mat."type" = 'model' and it_mat.name = 'product.template,name'
+                """ if translate else ''
+
+                def geo(column):
+                    return column if translate else 'NULL'
+
+                sql_params = f"""
                     SELECT 
                         lp.id,
                         lp.parameter_id,
                         ip.name as parameter_name,
-                        it.value as parameter_name_geo,
+                        {geo('it.value')} as parameter_name_geo,
                         ip.abbr as parameter_abbr,
                         -- lp.research_id,
                         -- pp.name_template as research_name,
@@ -659,9 +1010,9 @@ def get_lab_orders(personal_number, laborder_id=None, include_parameters=False):
                         lp.value_max,
                         lp.include,
                         itx.name as value_text,
-                        it2.value as value_text_geo,
+                        {geo('it2.value')} as value_text_geo,
                         itx2.name as value_text_ref,
-                        it3.value as value_text_ref_geo,
+                        {geo('it3.value')} as value_text_ref_geo,
                         itx.arrow as value_text_arrow,
                         --lp.value_auto,
                         --lp.value_1,
@@ -671,7 +1022,7 @@ def get_lab_orders(personal_number, laborder_id=None, include_parameters=False):
                         --lp.value_text_auto,
                         lp.uom_id,
                         pu.name as uom_name,
-                        it_uom.value as uom_name_geo,
+                        {geo('it_uom.value')} as uom_name_geo,
                         lp.state,
                         lp.comment,
                         lp.commenten,
@@ -686,45 +1037,38 @@ def get_lab_orders(personal_number, laborder_id=None, include_parameters=False):
                         --lp.updated_by
                         mat_pp.id as material_id,
                         pt.name as material_name,
-                        it_mat.value as material_name_geo
+                        {geo('it_mat.value')} as material_name_geo
                     FROM inno_laborder_parameter lp
                         LEFT JOIN inno_parameter ip ON lp.parameter_id = ip.id
-                            LEFT JOIN ir_translation it on it.res_id = ip.id and it.lang = 'ka_GE' and it."type" = 'model' and it.name = 'inno.parameter,name'
                         --LEFT JOIN product_product pp ON lp.research_id = pp.id
                         LEFT JOIN product_uom pu ON lp.uom_id = pu.id
-                            LEFT JOIN ir_translation it_uom on it_uom.res_id = pu.id and it_uom.lang = 'ka_GE' and it_uom."type" = 'model' and it_uom.name = 'product.uom,name'
                         LEFT JOIN inno_textvalue itx on itx.id = lp.value_text
-                            LEFT JOIN ir_translation it2 on it2.res_id = itx.id and it2.lang = 'ka_GE' and it2."type" = 'model' and it2.name = 'inno.textvalue,name'
                         LEFT JOIN inno_textvalue itx2 on itx2.id = lp.text_value
-                            LEFT JOIN ir_translation it3 on it3.res_id = itx2.id and it3.lang = 'ka_GE' and it3."type" = 'model' and it3.name = 'inno.textvalue,name'
                         JOIN inno_laborder_material ilm on ilm.laborder_id = lp.laborder_id and ilm.research_id = lp.research_id
                             JOIN product_product mat_pp ON mat_pp.id = ilm.material_id
                             JOIN product_template pt on pt.id = mat_pp.product_tmpl_id
-                            LEFT JOIN ir_translation it_mat on it_mat.res_id = pt.id and it_mat.lang = 'ka_GE' and it_mat."type" = 'model' and it_mat.name = 'product.template,name'
-
+                        {translation_joins}
                    WHERE lp.active and lp.laborder_id = %s
                     ORDER BY lp.sequence NULLS LAST, lp.id
                 """
                 cursor.execute(sql_params, (laborder_id,))
                 
-                param_columns = [col[0] for col in cursor.description]
-                param_columns.append('abnormal_indicator')  # Add computed field to columns list
-                param_columns.append('reference_range')  # Add computed field to columns list
-                parameters = []
-                for param_row in cursor.fetchall():
-                    param_dict = dict(zip(param_columns, param_row))
-                    param_dict['abnormal_indicator'] = get_parameter_abnormal_indicator(param_dict)
-                    param_dict['reference_range'] = generate_reference_range(param_dict)
-                    parameters.append(param_dict)
-
-                lab_order['parameters'] = parameters
+                parameters = fetch_records(cursor, LabOrderParameterRow)
+                for parameter in parameters:
+                    parameter.abnormal_indicator = get_parameter_abnormal_indicator(parameter)
+                    parameter.reference_range = generate_reference_range(parameter)
+
+                lab_order.parameters = parameters
                 
                 logger.debug(f"get_lab_orders({personal_number}, {laborder_id}) found order with {len(parameters)} parameter(s)")
             else:
                 logger.debug(f"get_lab_orders({personal_number}, {laborder_id}) found order")
             
-            if lab_order['categ_id'] in NO_PDF_CATEGORY_IDS:
-                lab_order['pdf_files'] = []  # No PDFs for this category
+            if fields is not None and 'pdf_files' not in fields:
+                return lab_order  # PDFs not requested
+
+            if lab_order.categ_id in NO_PDF_CATEGORY_IDS:
+                lab_order.pdf_files = []  # No PDFs for this category
             else:
                 # Fetch associated PDFs from modulo_document_registry
                 sql_pdfs = """
@@ -737,7 +1081,7 @@ def get_lab_orders(personal_number, laborder_id=None, include_parameters=False):
                 """
                 cursor.execute(sql_pdfs, (laborder_id,))
                 pdf_columns = [col[0] for col in cursor.description]
-                lab_order['pdf_files'] = [
+                lab_order.pdf_files = [
                     {**dict(zip(pdf_columns, row)), 'url': PDF_SERVER_URL + (row[1] or '')}
                     for row in cursor.fetchall()
                 ]
@@ -745,10 +1089,17 @@ def get_lab_orders(personal_number, laborder_id=None, include_parameters=False):
             return lab_order
         else:
             # Multiple orders
-            lab_orders = [dict(zip(columns, row)) for row in cursor.fetchall()]
+            lab_orders = fetch_records(cursor, LabOrderRow)
+            
+            if fields is not None and 'pdf_files' not in fields:
+                logger.debug(f"get_lab_orders({personal_number}) found {len(lab_orders)} lab order(s), PDFs not requested")
+                return lab_orders
+
+            laborder_ids = [o.id for o in lab_orders if o.categ_id not in NO_PDF_CATEGORY_IDS]
+            pdfs_by_order = {}
             
-            if lab_orders:
-                laborder_ids = [o['id'] for o in lab_orders if o['categ_id'] not in NO_PDF_CATEGORY_IDS]
+            # PDFs are only looked up for the orders that passed the filters above
+            if laborder_ids:
                 sql_pdfs = """
                     SELECT uuid, store_fname, name, comment, res_id
                     FROM modulo_document_registry
@@ -758,7 +1109,6 @@ def get_lab_orders(personal_number, laborder_id=None, include_parameters=False):
                     ORDER BY create_date
                 """
                 cursor.execute(sql_pdfs, (laborder_ids,))
-                pdfs_by_order = {}
                 for pdf_row in cursor.fetchall():
                     pdf_uuid, store_fname, pdf_name, pdf_comment, pdf_res_id = pdf_row
                     pdfs_by_order.setdefault(pdf_res_id, []).append({
@@ -768,13 +1118,107 @@ def get_lab_orders(personal_number, laborder_id=None, include_parameters=False):
                         'comment': pdf_comment,
                         'url': PDF_SERVER_URL + (store_fname or ''),
                     })
-                for order in lab_orders:
-                    order['pdf_files'] = pdfs_by_order.get(order['id'], [])
+            
+            for order in lab_orders:
+                order.pdf_files = pdfs_by_order.get(order.id, [])
             
             logger.debug(f"get_lab_orders({personal_number}) found {len(lab_orders)} lab order(s)")
             return lab_orders
 
 
+def get_lab_orders_version(personal_number):
+    """
+    Version of a patient's lab order data, for the ETag of the patient endpoints.
+    A single aggregate over the patient's done orders, their parameter rows and
+    their registry documents, cached per patient like get_lab_orders() and evicted
+    by the same NOTIFY tags. Counts are included so orders leaving the done state
+    (or deleted parameters and documents) change the version too.
+    
+    Args:
+        personal_number: 11-digit Georgian personal identification number
+        
+    Returns:
+        Tuple (orders count, latest order write_date, parameters count, latest parameter write_date,
+        documents count, latest document write_date). write_dates are naive UTC datetimes or None.
+    """
+    cache = get_cache('lab_order_versions', maxsize=4096, ttl=patient_cache_ttl())
+    return cache.get_or_set(
+        personal_number,
+        lambda: _query_lab_orders_version(personal_number),
+        tags=(patient_tag(personal_number),),
+    )
+
+
+def _query_lab_orders_version(personal_number):
+    with get_oerp_connection().cursor() as cursor:
+        # Same order filter as get_lab_orders()
+        cursor.execute(f"""
+            WITH orders AS (
+                SELECT lo.id, lo.write_date
+                FROM inno_laborder lo
+                WHERE lo.partner_id IN ({PATIENT_PARTNERS_SQL}) AND lo.create_date >= '2020-01-01' AND lo.state = 'done'
+            ),
+            parameters AS (
+                SELECT count(*) AS count, max(lp.write_date) AS write_date
+                FROM inno_laborder_parameter lp
+                WHERE lp.laborder_id IN (SELECT id FROM orders)
+            )
+            SELECT
+                (SELECT count(*) FROM orders),
+                (SELECT max(write_date) FROM orders),
+                (SELECT count FROM parameters),
+                (SELECT write_date FROM parameters),
+                count(mdr.id),
+                max(mdr.write_date)
+            FROM modulo_document_registry mdr
+            WHERE mdr.res_model = 'inno.laborder'
+              AND mdr.res_id IN (SELECT id FROM orders)
+        """, {'personal_number': personal_number})
+        version = tuple(cursor.fetchone())
+
+    logger.debug(f"get_lab_orders_version({personal_number}) = {version}")
+    return version
+
+
+# Catalog tables (and their translated names) rendered into the lab order list and stats
+LAB_ORDER_CATALOG_TABLES = (
+    'product_category', 'web_user_portal_category', 'inno_standard_add',
+    'inno_parameter', 'product_uom', 'inno_textvalue',
+)
+LAB_ORDER_CATALOG_TRANSLATIONS = (
+    'product.category,name', 'web.user.portal.category,name', 'inno.standard.add,name',
+    'inno.parameter,name', 'product.uom,name', 'inno.textvalue,name',
+)
+# Seconds a worker reuses the catalog version; not all of these tables have NOTIFY triggers
+LAB_ORDER_CATALOG_VERSION_TTL = 60
+
+
+def get_lab_orders_catalog_version():
+    """
+    Version of the catalog data in lab order responses (category, parameter, unit and
+    text value names and their translations), for the ETag of the patient endpoints.
+    Read from the database so every worker computes the same ETag, and reused for
+    LAB_ORDER_CATALOG_VERSION_TTL seconds (or until the catalog tag is evicted).
+    
+    Returns:
+        Tuple of (count, latest write_date) per table in LAB_ORDER_CATALOG_TABLES,
+        then for the LAB_ORDER_CATALOG_TRANSLATIONS rows of ir_translation
+    """
+    cache = get_cache('lab_order_catalog_version', maxsize=1, ttl=LAB_ORDER_CATALOG_VERSION_TTL)
+    return cache.get_or_set('version', _query_lab_orders_catalog_version, tags=(CATALOG_TAG,))
+
+
+def _query_lab_orders_catalog_version():
+    selects = [f"SELECT count(*), max(write_date) FROM {table}" for table in LAB_ORDER_CATALOG_TABLES]
+    selects.append("SELECT count(*), max(write_date) FROM ir_translation WHERE name = ANY(%s)")
+    with get_oerp_connection().cursor() as cursor:
+        cursor.execute('\nUNION ALL\n'.join(selects), (list(LAB_ORDER_CATALOG_TRANSLATIONS),))
+        version = tuple(tuple(row) for row in cursor.fetchall())
+    
+    logger.debug(f"get_lab_orders_catalog_version() = {version}")
+    return version
+
+
 def get_lab_order_detail(personal_number, laborder_id):
     """
     Query OpenERP database for a single lab order with its parameters.
@@ -792,7 +1236,7 @@ def get_lab_order_detail(personal_number, laborder_id):
     return get_lab_orders(personal_number, laborder_id, include_parameters=True)
 
 
-def get_lab_order_stats(personal_number, categ_id=None):
+def get_lab_order_stats(personal_number, categ_id=None, translate=True):
     """
     Query OpenERP database for lab order statistics by patient's personal number.
     Returns aggregated parameter data across all completed lab orders.
@@ -800,42 +1244,38 @@ def get_lab_order_stats(personal_number, categ_id=None):
     Args:
         personal_number: 11-digit Georgian personal identification number
         categ_id: Optional category ID to filter lab orders by category
+        translate: If False, the ka_GE ir_translation joins are skipped: parameter names are
+                   the English terms and categ_name_geo is None
         
     Returns:
         List of dictionaries containing lab order statistics, or empty list if not found
     """
     with get_oerp_connection().cursor() as cursor:
-        # First get the partner_id for this personal number
-        sql_partner = """
-            SELECT id FROM res_partner 
-            WHERE inno_id = %s AND inno_patient = true
-            LIMIT 1
-        """
-        cursor.execute(sql_partner, (personal_number,))
-        partner_row = cursor.fetchone()
-        
-        if not partner_row:
-            logger.debug(f"get_lab_order_stats({personal_number}) patient not found")
-            return []
-        
-        partner_id = partner_row[0]
-        
         # Build WHERE clause with optional category filter
-        where_clauses = ["ilp.partner_id = %s", "ilp.active", "il.state = 'done'"]
-        params = [partner_id]
+        where_clauses = [f"ilp.partner_id IN ({PATIENT_PARTNERS_SQL})", "ilp.active", "il.state = 'done'"]
+        params = {'personal_number': personal_number}
         
         if categ_id is not None:
-            where_clauses.append("il.categ_id = %s")
-            params.append(categ_id)
+            where_clauses.append("il.categ_id = %(categ_id)s")
+            params['categ_id'] = categ_id
         
+        translation_joins = """
+                LEFT JOIN ir_translation it ON it.res_id = ip.id 
+                    AND it.lang = 'ka_GE' 
+                    AND it.name = 'inno.parameter,name'
+                LEFT JOIN ir_translation it2 ON it2.res_id = pc.id 
+                    AND it2.lang = 'ka_GE' 
+                    AND it2.name = 'product.category,name'
+        """ if translate else ''
+
         # Now run the stats query
         sql = f"""
             SELECT 
                 ilp.laborder_id,
-                il.categ_id, pc.name as categ_name_eng, it2.value as categ_name_geo,
+                il.categ_id, pc.name as categ_name_eng, {'it2.value' if translate else 'NULL'} as categ_name_geo,
                 date(ilp.date_value) as date, 
                 concat_ws('/', ilp.parameter_id, ilp.uom_id) as param_id_uom, 
-                concat_ws(',', coalesce(it.value, ip.name), nullif(pu.name, '.')) as parameter,
+                concat_ws(',', {'coalesce(it.value, ip.name)' if translate else 'ip.name'}, nullif(pu.name, '.')) as parameter,
                 coalesce(nullif(ilp.value, 0)::text, itv.name) as value, 
                 ilp.sequence as orderby
             FROM inno_laborder_parameter ilp
@@ -844,24 +1284,37 @@ def get_lab_order_stats(personal_number, categ_id=None):
                 LEFT JOIN inno_textvalue itv ON ilp.value_text = itv.id
                 LEFT JOIN inno_parameter ip ON ilp.parameter_id = ip.id
                 LEFT JOIN product_uom pu ON ilp.uom_id = pu.id
-                LEFT JOIN ir_translation it ON it.res_id = ip.id 
-                    AND it.lang = 'ka_GE' 
-                    AND it.name = 'inno.parameter,name'
-                LEFT JOIN ir_translation it2 ON it2.res_id = pc.id 
-                    AND it2.lang = 'ka_GE' 
-                    AND it2.name = 'product.category,name'
+                {translation_joins}
             WHERE {' AND '.join(where_clauses)}
             ORDER BY il.categ_id, ilp.date_value, ilp.laborder_id
         """
         cursor.execute(sql, params)
         
-        columns = [col[0] for col in cursor.description]
-        stats = [dict(zip(columns, row)) for row in cursor.fetchall()]
+        stats = fetch_records(cursor, LabOrderStatRow)
         
         logger.debug(f"get_lab_order_stats({personal_number}, categ_id={categ_id}) found {len(stats)} stat record(s)")
         return stats
 
-def get_labtests_rpc(labtest_id=None, web_category_id=None, active_only=False):
+def get_labtests_rpc(labtest_id=None, web_category_id=None, active_only=False, include_subtests=True):
+    """
+    Fetch web lab tests (with subtests) from OpenERP over XML-RPC.
+    Results are cached and evicted by the NOTIFY listener when products change.
+    Without include_subtests the per-test get_child_product_names calls are skipped
+    (unless the tests with subtests are cached already) and 'subtests' is absent.
+    """
+    cache = get_cache('labtests', maxsize=256, ttl=catalog_cache_ttl())
+    if not include_subtests:
+        tests = cache.get((labtest_id, web_category_id, True))
+        if tests is not None:
+            return tests
+    return cache.get_or_set(
+        (labtest_id, web_category_id, include_subtests),
+        lambda: _get_labtests_rpc(labtest_id, web_category_id, include_subtests),
+        tags=lambda tests: {CATALOG_TAG, *(product_tag(test['id']) for test in tests)},
+    )
+
+
+def _get_labtests_rpc(labtest_id=None, web_category_id=None, include_subtests=True):
     kw_dict = {}
     if labtest_id:
         kw_dict['product_id'] = labtest_id
@@ -873,6 +1326,9 @@ def get_labtests_rpc(labtest_id=None, web_category_id=None, active_only=False):
     logger.info(f"get_labtests_rpc() retrieved {len(oerp_tests)} tests from OpenERP with filters: {kw_dict}")
     logger.debug(f"get_labtests_rpc() raw data: {oerp_tests}")
 
+    if not include_subtests:
+        return oerp_tests
+
     for i, test in enumerate(oerp_tests):
         oerp_tests[i]['subtests'] = oerp_execute('product.product', 'get_child_product_names', [test['id'], 'ka_GE'])
         logger.info(f"get_labtests_rpc() test ID {test['id']} has {len(oerp_tests[i]['subtests'])} subtests")
@@ -908,16 +1364,25 @@ def get_labtests(labtest_id=None, active_only=False):
 
 
 # New: Get all web_product_category records
-def get_web_product_categories():
+# translate=False skips the ka_GE ir_translation joins; the *_geo columns are then None
+def get_web_product_categories(translate=True):
     with get_oerp_connection().cursor() as cursor:
-        query = '''
-            SELECT wpc.id, wpc.name, it1.value as name_geo, wpc.country_id, rc.name as country_name, it.value as country_name_geo
-            FROM web_product_category wpc
-            LEFT JOIN res_country rc ON wpc.country_id = rc.id
-            LEFT JOIN ir_translation it on it.res_id = rc.id and it.lang = 'ka_GE' and it."type" = 'model' and it.name = 'res.country,name'
-            LEFT JOIN ir_translation it1 on it1.res_id = wpc.id and it1.lang = 'ka_GE' and it1."type" = 'model' and it1.name = 'web.product.category,name'
-            ORDER BY wpc.id
-        '''
+        if translate:
+            query = '''
+                SELECT wpc.id, wpc.name, it1.value as name_geo, wpc.country_id, rc.name as country_name, it.value as country_name_geo
+                FROM web_product_category wpc
+                LEFT JOIN res_country rc ON wpc.country_id = rc.id
+                LEFT JOIN ir_translation it on it.res_id = rc.id and it.lang = 'ka_GE' and it."type" = 'model' and it.name = 'res.country,name'
+                LEFT JOIN ir_translation it1 on it1.res_id = wpc.id and it1.lang = 'ka_GE' and it1."type" = 'model' and it1.name = 'web.product.category,name'
+                ORDER BY wpc.id
+            '''
+        else:
+            query = '''
+                SELECT wpc.id, wpc.name, NULL as name_geo, wpc.country_id, rc.name as country_name, NULL as country_name_geo
+                FROM web_product_category wpc
+                LEFT JOIN res_country rc ON wpc.country_id = rc.id
+                ORDER BY wpc.id
+            '''
         logger.debug(f'get_web_product_categories() SQL: {query}')
         cursor.execute(query)
         columns = [col[0] for col in cursor.description]
@@ -947,13 +1412,20 @@ def get_labtests_by_web_category(web_category_id):
         res = [dict(zip(columns, row)) for row in cursor.fetchall()]
     return res
 
-def get_labtest_parameters(labtest_id):
+# translate=False skips the ka_GE ir_translation join; name_geo is then None
+def get_labtest_parameters(labtest_id, translate=True):
     with get_oerp_connection().cursor() as cursor:
-        sql = '''select ip.abbr as code, ip.name, it.value as name_geo \
-            from inno_product_parameter ipp \
-                join inno_parameter ip on ipp.parameter_id = ip.id \
-                left join ir_translation it on it.res_id = ip.id and it.lang = 'ka_GE' and it."type" = 'model' and it.name = 'inno.parameter,name' \
-            where ipp.product_id = %s'''
+        if translate:
+            sql = '''select ip.abbr as code, ip.name, it.value as name_geo \
+                from inno_product_parameter ipp \
+                    join inno_parameter ip on ipp.parameter_id = ip.id \
+                    left join ir_translation it on it.res_id = ip.id and it.lang = 'ka_GE' and it."type" = 'model' and it.name = 'inno.parameter,name' \
+                where ipp.product_id = %s'''
+        else:
+            sql = '''select ip.abbr as code, ip.name, NULL as name_geo \
+                from inno_product_parameter ipp \
+                    join inno_parameter ip on ipp.parameter_id = ip.id \
+                where ipp.product_id = %s'''
         
         query = cursor.mogrify(sql, (labtest_id,))
 
@@ -1003,6 +1475,219 @@ def get_labtest_pdfs(labtest_id):
         'pdf_geo_filename': row[3],
     }
 
+
+def get_labtest_pdf_info(labtest_id, lang):
+    """
+    Get the metadata needed to stream one lab test PDF, without transferring it.
+    The PDF is stored base64-encoded in product_product.inno_pdf_<lang>, possibly
+    split into lines (as OpenERP's base64.encodestring does). The decoded size is
+    computed from the stored length, the line layout and the padding, so the PDF
+    is never decoded for it; the length of the first line tells how encoded
+    offsets map to stored offsets, which is what makes byte ranges possible.
+    Results are cached and evicted by the NOTIFY listener when the product changes.
+    
+    Args:
+        labtest_id: Lab test (product_product) ID
+        lang: 'eng' or 'geo'
+        
+    Returns:
+        Dictionary with filename, write_date, size (decoded bytes) and
+        line_length/line_separator (None/0 if the base64 text is not split into
+        lines; line_length is None and line_separator -1 if the layout is irregular),
+        or None if the lab test or its PDF does not exist
+    """
+    if lang not in ('eng', 'geo'):
+        raise ValueError(f"Unsupported PDF language: {lang}")
+    cache = get_cache('labtest_pdfs', maxsize=512, ttl=catalog_cache_ttl())
+    return cache.get_or_set(
+        (labtest_id, lang),
+        lambda: _query_labtest_pdf_info(labtest_id, lang),
+        tags={CATALOG_TAG, product_tag(labtest_id)},
+    )
+
+
+def _query_labtest_pdf_info(labtest_id, lang):
+    column = f'inno_pdf_{lang}'
+    with get_oerp_connection().cursor() as cursor:
+        cursor.execute(
+            f"""
+            SELECT {column}_filename, write_date, octet_length({column}),
+                   substring({column} from 1 for position(decode('0a', 'hex') in {column})),
+                   substring({column} from greatest(octet_length({column}) - %s + 1, 1))
+            FROM product_product
+            WHERE id = %s AND {column} IS NOT NULL
+            """,
+            (PDF_TAIL_LENGTH, labtest_id),
+        )
+        row = cursor.fetchone()
+        if row is None:
+            return None
+        
+        filename, write_date, stored_length, first_line, tail = row
+        tail = bytes(tail or b'')
+        layout = _base64_layout(stored_length, bytes(first_line or b''), tail)
+        if layout is None:
+            # Irregular layout: count the base64 characters instead (still without decoding)
+            cursor.execute(
+                f"""
+                SELECT length(translate(convert_from({column}, 'SQL_ASCII'), E' \\t\\r\\n', ''))
+                FROM product_product
+                WHERE id = %s
+                """,
+                (labtest_id,),
+            )
+            layout = (cursor.fetchone()[0], None, -1)
+    
+    encoded_length, line_length, line_separator = layout
+    encoded_tail = tail.translate(None, b' \t\r\n')
+    padding = min(len(encoded_tail) - len(encoded_tail.rstrip(b'=')), 2)
+    
+    return {
+        'filename': filename,
+        'write_date': write_date,
+        'size': max(encoded_length // 4 * 3 - padding, 0),
+        'line_length': line_length,
+        'line_separator': line_separator,
+    }
+
+
+def _base64_layout(stored_length, first_line, tail):
+    """
+    Work out the line layout of stored base64 text from its length, its first line
+    and its last PDF_TAIL_LENGTH bytes. The line breaks within the tail must sit
+    where lines of the first line's length put them.
+    
+    Returns:
+        (encoded_length, line_length, line_separator), or None if the layout is irregular
+    """
+    if not first_line:
+        # A single unterminated line
+        if any(ch in tail for ch in b' \t\r') or stored_length % 4:
+            return None
+        return stored_length, None, 0
+    
+    line_separator = 2 if first_line.endswith(b'\r\n') else 1
+    line_length = len(first_line) - line_separator
+    if line_length <= 0 or any(ch in first_line[:line_length] for ch in b' \t\r'):
+        return None
+    
+    stride = line_length + line_separator
+    separator = first_line[-line_separator:]
+    body_length = stored_length - (line_separator if tail.endswith(separator) else 0)
+    full_lines = (body_length - 1) // stride
+    if body_length - full_lines * stride > line_length:
+        return None
+    
+    tail_start = stored_length - len(tail)
+    for index, ch in enumerate(tail):
+        position = tail_start + index
+        expected_break = position >= body_length or (position < full_lines * stride and position % stride >= line_length)
+        if ch in b' \t' or (ch in b'\r\n') != expected_break:
+            return None
+    
+    encoded_length = body_length - full_lines * line_separator
+    if encoded_length % 4:
+        return None
+    return encoded_length, line_length, line_separator
+
+
+def _seek_labtest_pdf(cursor, column, labtest_id, info, offset):
+    """
+    Map an offset into the encoded text to an offset into the stored text, reading
+    the line around it to check that the layout of get_labtest_pdf_info() holds there.
+    
+    Returns:
+        The stored offset, or None if the layout does not hold (or is irregular)
+    """
+    line_length, line_separator = info['line_length'], info['line_separator']
+    if line_separator < 0:
+        return None
+    if not line_length or offset < line_length:
+        return offset
+    
+    line, position = divmod(offset, line_length)
+    stride = line_length + line_separator
+    line_start = line * stride
+    # The line break before the line and the one after it
+    cursor.execute(
+        f"SELECT substring({column} from %s for %s) FROM product_product WHERE id = %s",
+        (line_start - line_separator + 1, stride + line_separator, labtest_id),
+    )
+    row = cursor.fetchone()
+    probe = bytes(row[0]) if row and row[0] is not None else b''
+    content = probe[line_separator:]
+    line_end = content.find(b'\n')
+    line_end = len(content) if line_end < 0 else line_end - (line_separator - 1)
+    if probe[:line_separator].strip(b'\r\n'):
+        return None
+    if line_end != line_length and not (len(probe) < stride + line_separator and position < line_end):
+        return None
+    return line_start + position
+
+
+def iter_labtest_pdf(labtest_id, lang, info, start=0, end=None, chunk_size=PDF_STREAM_CHUNK_SIZE):
+    """
+    Stream decoded bytes start..end (inclusive) of a lab test PDF.
+    The stored base64 text is read in slices with substring() and decoded one
+    slice at a time, so neither the database result nor the response is
+    buffered in full. Ranges seek directly to the stored offset where the line
+    layout allows it, and otherwise decode (and drop) everything before start.
+    
+    Args:
+        labtest_id: Lab test (product_product) ID
+        lang: 'eng' or 'geo'
+        info: Result of get_labtest_pdf_info()
+        start: First decoded byte to return
+        end: Last decoded byte to return (default: the last byte)
+        chunk_size: Decoded bytes read per database round trip
+        
+    Yields:
+        bytes chunks of the decoded PDF
+    """
+    column = f'inno_pdf_{lang}'
+    end = info['size'] - 1 if end is None else end
+    remaining = end - start + 1
+    
+    raw_chunk_size = (chunk_size // 3 + 1) * 4
+    carry = b''
+    with get_oerp_connection().cursor() as cursor:
+        # Start at the base64 quad containing the first requested byte
+        quad = start // 3
+        offset = _seek_labtest_pdf(cursor, column, labtest_id, info, quad * 4) if quad else 0
+        if offset is None:
+            logger.warning(f"iter_labtest_pdf({labtest_id}, {lang}) irregular base64 layout, decoding from the start")
+            offset, skip = 0, start
+        else:
+            skip = start - quad * 3
+        
+        while remaining > 0:
+            cursor.execute(
+                f"SELECT substring({column} from %s for %s) FROM product_product WHERE id = %s",
+                (offset + 1, raw_chunk_size, labtest_id),
+            )
+            row = cursor.fetchone()
+            data = bytes(row[0]) if row and row[0] is not None else b''
+            offset += len(data)
+            
+            encoded = carry + data.translate(None, b' \t\r\n')
+            usable = len(encoded) // 4 * 4
+            carry = encoded[usable:]
+            decoded = base64.b64decode(encoded[:usable])
+            if skip:
+                dropped = min(skip, len(decoded))
+                decoded = decoded[dropped:]
+                skip -= dropped
+            decoded = decoded[:remaining]
+            remaining -= len(decoded)
+            if decoded:
+                yield decoded
+            
+            if len(data) < raw_chunk_size:
+                break
+    
+    if remaining > 0:
+        logger.error(f"iter_labtest_pdf({labtest_id}, {lang}) ended {remaining} byte(s) short, PDF changed while streaming?")
+
 # ==================== JWT Token Management Functions ====================
 def parse_device_name(user_agent):
     """
@@ -1045,16 +1730,27 @@ def parse_device_name(user_agent):
     return f"{browser} on {os_name}"
 
 
-def generate_patient_tokens(personal_number, mobile_phone, client_ip=None, user_agent=None):
+def set_partner_id_claim(token, partner_id):
+    """Set the partner_id claim of a token, or remove it (e.g. copied from a refresh token) if partner_id is None."""
+    if partner_id is not None:
+        token['partner_id'] = partner_id
+    elif 'partner_id' in token:
+        del token['partner_id']
+
+
+def generate_patient_tokens(personal_number, mobile_phone, client_ip=None, user_agent=None, partner_id=None):
     """
     Generate access and refresh tokens for a patient.
     Creates a new session and stores tokens in PatientToken model.
+    The patient's partner ID, if the patient exists, is embedded as the
+    partner_id claim and reported as patientId without a res_partner lookup.
     
     Args:
         personal_number: Patient's 11-digit personal identification number
         mobile_phone: Patient's 9-digit mobile phone number
         client_ip: IP address of the client (optional)
         user_agent: User agent string (optional)
+        partner_id: Patient's partner ID (optional, resolved from personal_number if not given)
         
     Returns:
         dict: {
@@ -1071,6 +1767,8 @@ def generate_patient_tokens(personal_number, mobile_phone, client_ip=None, user_
     # Parse device name from user agent
     device_name = parse_device_name(user_agent)
     
+    partner_id = partner_id or get_partner_id(personal_number)
+    
     # Create refresh token (which automatically creates access token)
     refresh = RefreshToken()
     
@@ -1079,6 +1777,7 @@ def generate_patient_tokens(personal_number, mobile_phone, client_ip=None, user_
     refresh['mobile_phone'] = mobile_phone
     refresh['patient_type'] = 'patient'  # Use different claim name to avoid conflict
     refresh['session_id'] = str(session_id)  # Add session ID to token claims
+    set_partner_id_claim(refresh, partner_id)
     
     # Get access token from refresh
     access = refresh.access_token
@@ -1086,6 +1785,7 @@ def generate_patient_tokens(personal_number, mobile_phone, client_ip=None, user_
     access['mobile_phone'] = mobile_phone
     access['patient_type'] = 'patient'  # Use different claim name to avoid conflict
     access['session_id'] = str(session_id)
+    set_partner_id_claim(access, partner_id)
     
     # Calculate expiration times
     access_lifetime = settings.SIMPLE_JWT['ACCESS_TOKEN_LIFETIME']
@@ -1095,31 +1795,41 @@ def generate_patient_tokens(personal_number, mobile_phone, client_ip=None, user_
     access_expires_at = now + access_lifetime
     refresh_expires_at = now + refresh_lifetime
     
-    # Store access token in database
-    PatientToken.objects.create(
-        jti=str(access['jti']),
-        personal_number=personal_number,
-        mobile_phone=mobile_phone,
-        token_type='access',
-        session_id=session_id,
-        device_name=device_name,
-        expires_at=access_expires_at,
-        client_ip=client_ip,
-        user_agent=user_agent
-    )
-    
-    # Store refresh token in database
-    PatientToken.objects.create(
-        jti=str(refresh['jti']),
-        personal_number=personal_number,
-        mobile_phone=mobile_phone,
-        token_type='refresh',
-        session_id=session_id,
-        device_name=device_name,
-        expires_at=refresh_expires_at,
-        client_ip=client_ip,
-        user_agent=user_agent
-    )
+    # Store both tokens in database with a single INSERT, and the session they belong to
+    with transaction.atomic():
+        PatientSession.objects.create(
+            session_id=session_id,
+            personal_number=personal_number,
+            device_name=device_name,
+            client_ip=client_ip,
+            last_used_at=now,
+            expires_at=refresh_expires_at,
+            token_count=2
+        )
+        PatientToken.objects.bulk_create([
+            PatientToken(
+                jti=str(access['jti']),
+                personal_number=personal_number,
+                mobile_phone=mobile_phone,
+                token_type='access',
+                session_id=session_id,
+                device_name=device_name,
+                expires_at=access_expires_at,
+                client_ip=client_ip,
+                user_agent=user_agent
+            ),
+            PatientToken(
+                jti=str(refresh['jti']),
+                personal_number=personal_number,
+                mobile_phone=mobile_phone,
+                token_type='refresh',
+                session_id=session_id,
+                device_name=device_name,
+                expires_at=refresh_expires_at,
+                client_ip=client_ip,
+                user_agent=user_agent
+            ),
+        ])
     
     logger.info(f"Generated tokens for patient {personal_number}, session_id={session_id}, device={device_name}")
     
@@ -1173,6 +1883,8 @@ def refresh_patient_token(refresh_token_string):
         personal_number = refresh.get('personal_number')
         mobile_phone = refresh.get('mobile_phone')
         session_id = refresh.get('session_id', patient_token.session_id)  # Preserve session_id
+        # Refresh tokens issued before the partner_id claim was introduced fall back to a lookup
+        partner_id = refresh.get('partner_id') or get_partner_id(personal_number)
         
         # Generate new access token
         access = refresh.access_token
@@ -1180,13 +1892,14 @@ def refresh_patient_token(refresh_token_string):
         access['mobile_phone'] = mobile_phone
         access['patient_type'] = 'patient'  # Use different claim name to avoid conflict
         access['session_id'] = str(session_id)
+        set_partner_id_claim(access, partner_id)
         
         # Calculate expiration
         access_lifetime = settings.SIMPLE_JWT['ACCESS_TOKEN_LIFETIME']
         access_expires_at = timezone.now() + access_lifetime
         
-        # Store new access token (preserve session_id and device info)
-        PatientToken.objects.create(
+        # New access token (preserve session_id and device info)
+        new_tokens = [PatientToken(
             jti=str(access['jti']),
             personal_number=personal_number,
             mobile_phone=mobile_phone,
@@ -1196,7 +1909,7 @@ def refresh_patient_token(refresh_token_string):
             expires_at=access_expires_at,
             client_ip=patient_token.client_ip,
             user_agent=patient_token.user_agent
-        )
+        )]
         
         result = {
             'access_token': str(access),
@@ -1210,12 +1923,13 @@ def refresh_patient_token(refresh_token_string):
             new_refresh['mobile_phone'] = mobile_phone
             new_refresh['patient_type'] = 'patient'  # Use different claim name to avoid conflict
             new_refresh['session_id'] = str(session_id)
+            set_partner_id_claim(new_refresh, partner_id)
             
             refresh_lifetime = settings.SIMPLE_JWT['REFRESH_TOKEN_LIFETIME']
             refresh_expires_at = timezone.now() + refresh_lifetime
             
-            # Store new refresh token (preserve session info)
-            PatientToken.objects.create(
+            # New refresh token (preserve session info)
+            new_tokens.append(PatientToken(
                 jti=str(new_refresh['jti']),
                 personal_number=personal_number,
                 mobile_phone=mobile_phone,
@@ -1225,13 +1939,20 @@ def refresh_patient_token(refresh_token_string):
                 expires_at=refresh_expires_at,
                 client_ip=patient_token.client_ip,
                 user_agent=patient_token.user_agent
-            )
-            
-            # Revoke old refresh token
-            patient_token.revoke(reason='Token rotated')
-            
+            ))
             result['refresh_token'] = str(new_refresh)
         
+        # Store the new tokens, revoke the rotated refresh token and update the session in one transaction
+        with transaction.atomic():
+            PatientToken.objects.bulk_create(new_tokens)
+            if 'refresh_token' in result:
+                patient_token.revoke(reason='Token rotated')
+            PatientSession.record_tokens(
+                patient_token.session_id,
+                len(new_tokens),
+                expires_at=refresh_expires_at if 'refresh_token' in result else None
+            )
+        
         logger.info(f"Refreshed token for patient {personal_number}, session_id={session_id}")
         
         return result
@@ -1276,16 +1997,211 @@ def cleanup_expired_tokens(days_old=30):
     return deleted_count
 
 
-def generate_pivot_table(personal_number, category_id, max_results=5, lang='ka_GE'):
+def get_pivot_categories(lang='ka_GE'):
+    """
+    Get all product categories with their names localized to lang.
+    The table is small and rarely changes, so it is cached per language like
+    the rest of the catalog and evicted by the NOTIFY listener when categories change.
+    
+    Args:
+        lang: Language code for translations (default: 'ka_GE')
+        
+    Returns:
+        Dictionary mapping category ID to {'name': localized name, 'abbr': inno_abbr}
+    """
+    cache = get_cache('pivot_categories', maxsize=8, ttl=catalog_cache_ttl())
+    return cache.get_or_set(lang, lambda: _query_pivot_categories(lang), tags=(CATALOG_TAG,))
+
+
+def _query_pivot_categories(lang):
+    with get_oerp_connection().cursor() as cursor:
+        sql_categ = """
+            SELECT pc.id, pc.name, pc.inno_abbr, it.value as name_geo
+            FROM product_category pc
+            LEFT JOIN ir_translation it ON it.res_id = pc.id 
+                AND it.lang = %s 
+                AND it.name = 'product.category,name'
+        """
+        cursor.execute(sql_categ, (lang,))
+        categories = {
+            categ_id: {'name': categ_name_geo if categ_name_geo else categ_name_eng, 'abbr': categ_abbr}
+            for categ_id, categ_name_eng, categ_abbr, categ_name_geo in cursor.fetchall()
+        }
+    logger.debug(f"get_pivot_categories({lang}) loaded {len(categories)} categories")
+    return categories
+
+
+def _query_pivots(cursor, personal_number, category_ids, categories, max_results, lang):
+    """
+    Fetch and pivot the parameters of the last max_results orders of each category.
+    Returns a dict mapping category ID to (columns, rows); categories without data are absent.
+    """
+    # CBC categories only include orders after a cut-off date (special date filter in OpenERP)
+    cbc_category_ids = [
+        categ_id for categ_id in category_ids
+        if categories[categ_id]['abbr'] and 'CBC' in categories[categ_id]['abbr']
+    ]
+    
+    # Query lab order parameters, limited in SQL to the last max_results orders
+    # per category that have at least one result, so the cost is bounded by the
+    # request rather than by the length of the patient's history
+    sql_params = f"""
+        WITH ranked_orders AS (
+            SELECT il.id, il.categ_id,
+                ROW_NUMBER() OVER (
+                    PARTITION BY il.categ_id
+                    ORDER BY il.date_order DESC NULLS LAST, il.id DESC
+                ) AS rn
+            FROM inno_laborder il
+            WHERE il.partner_id IN ({PATIENT_PARTNERS_SQL})
+                AND il.categ_id = ANY(%(category_ids)s)
+                AND il.state = 'done'
+                AND (il.categ_id <> ALL(%(cbc_category_ids)s) OR il.date_order > '2024-09-01')
+                AND EXISTS (
+                    SELECT 1 FROM inno_laborder_parameter lp
+                    WHERE lp.laborder_id = il.id
+                        AND lp.active
+                        AND (NULLIF(lp.value, 0) IS NOT NULL OR lp.value_text IS NOT NULL)
+                )
+        )
+        SELECT 
+            ro.categ_id,
+            ilp.laborder_id, 
+            DATE(ilp.date_value) as date, 
+            CONCAT_WS('/', ilp.parameter_id, ilp.uom_id) as param_id_uom, 
+            CONCAT_WS(',', COALESCE(it.value, ip.name), NULLIF(pu.name, '.')) as parameter,
+            ilp.sequence as orderby,
+            COALESCE(NULLIF(ilp.value, 0)::text, itv.name) as value
+        FROM ranked_orders ro
+        JOIN inno_laborder_parameter ilp ON ilp.laborder_id = ro.id
+        LEFT JOIN inno_textvalue itv ON ilp.value_text = itv.id
+        LEFT JOIN inno_parameter ip ON ilp.parameter_id = ip.id
+        LEFT JOIN product_uom pu ON ilp.uom_id = pu.id
+        LEFT JOIN ir_translation it ON it.res_id = ip.id 
+            AND it.lang = %(lang)s 
+            AND it.name = 'inno.parameter,name'
+        WHERE ro.rn <= %(max_results)s
+            AND ilp.active
+        ORDER BY ro.categ_id, ilp.date_value, ilp.laborder_id
+    """
+    cursor.execute(sql_params, {
+        'lang': lang,
+        'personal_number': personal_number,
+        'category_ids': category_ids,
+        'cbc_category_ids': cbc_category_ids,
+        'max_results': max_results,
+    })
+    
+    # Pivot each category in a single pass over its rows. max_results still caps the
+    # columns in case an order's parameters carry more than one date.
+    pivots = {}
+    for categ_id, categ_rows in groupby(cursor, key=itemgetter(0)):
+        pivots[categ_id] = pivot_parameter_rows((row[1:] for row in categ_rows), max_results)
+    
+    return pivots
+
+
+def generate_pivot_tables(personal_number, category_ids, max_results=5, lang='ka_GE', partner_id=None):
+    """
+    Generate pivot tables of lab order parameters for several categories with one query.
+    Parameters of the last max_results orders of every category are fetched together,
+    partitioned by il.categ_id, and pivoted per category.
+    Only the max_results most recent orders with results are read per category,
+    so parameters that do not occur in them are not listed.
+    Computed pivots are cached and reused while the patient's done orders in the
+    category and their parameter rows are unchanged.
+    
+    Args:
+        personal_number: 11-digit Georgian personal identification number
+        category_ids: Lab test category IDs to include
+        max_results: Maximum number of most recent test results per category (default: 5)
+        lang: Language code for translations (default: 'ka_GE')
+        partner_id: Patient's partner ID (patientId in the result) from the token; resolved from personal_number if not given
+        
+    Returns:
+        List with one pivot dictionary (see generate_pivot_table) per known category,
+        in the order of category_ids. Unknown categories are skipped.
+        Returns None if the patient is not found.
+    """
+    partner_id = partner_id or get_partner_id(personal_number)
+    if partner_id is None:
+        logger.debug(f"generate_pivot_tables({personal_number}) patient not found")
+        return None
+    
+    categories = get_pivot_categories(lang)
+    category_ids = [categ_id for categ_id in dict.fromkeys(category_ids) if categ_id in categories]
+    if not category_ids:
+        logger.debug(f"generate_pivot_tables() none of the requested categories exist")
+        return []
+    
+    # Pivots are cached per (patient, category, max_results, lang) and validated by
+    # the latest write_date and count of the patient's done orders in the category and
+    # of their parameter rows (results can change without touching the order),
+    # so a repeat view costs one indexed aggregate instead of the parameter query
+    cache = get_cache('pivots', maxsize=4096, ttl=pivot_cache_ttl())
+    pivots = {}
+    versions = {}
+    
+    with get_oerp_connection().cursor() as cursor:
+        if cache.enabled:
+            sql_versions = f"""
+                SELECT il.categ_id, MAX(il.write_date), COUNT(DISTINCT il.id), MAX(lp.write_date), COUNT(lp.id)
+                FROM inno_laborder il
+                    LEFT JOIN inno_laborder_parameter lp ON lp.laborder_id = il.id
+                WHERE il.partner_id IN ({PATIENT_PARTNERS_SQL})
+                    AND il.categ_id = ANY(%(category_ids)s)
+                    AND il.state = 'done'
+                GROUP BY il.categ_id
+            """
+            cursor.execute(sql_versions, {'personal_number': personal_number, 'category_ids': category_ids})
+            versions = {categ_id: tuple(version) for categ_id, *version in cursor.fetchall()}
+            
+            for categ_id in category_ids:
+                cached = cache.get((personal_number, categ_id, max_results, lang))
+                if cached is not None and cached[0] == versions.get(categ_id):
+                    pivots[categ_id] = cached[1]
+        
+        missing_category_ids = [categ_id for categ_id in category_ids if categ_id not in pivots]
+        if missing_category_ids:
+            computed = _query_pivots(cursor, personal_number, missing_category_ids, categories, max_results, lang)
+            for categ_id in missing_category_ids:
+                pivots[categ_id] = computed.get(categ_id, ([], []))
+                cache.set(
+                    (personal_number, categ_id, max_results, lang),
+                    (versions.get(categ_id), pivots[categ_id]),
+                    tags=(patient_tag(personal_number),),
+                )
+        
+        logger.debug(f"generate_pivot_tables() {len(category_ids) - len(missing_category_ids)} cached, {len(missing_category_ids)} computed")
+    
+    results = []
+    for categ_id in category_ids:
+        columns_list, rows_list = pivots.get(categ_id, ([], []))
+        results.append({
+            'categoryId': categ_id,
+            'categoryName': categories[categ_id]['name'],
+            'patientId': partner_id,
+            'columns': columns_list,
+            'rows': rows_list,
+            'totalRows': len(rows_list)
+        })
+    
+    logger.debug(f"generate_pivot_tables() generated {len(results)} pivot(s) for categories {category_ids}")
+    return results
+
+
+def generate_pivot_table(personal_number, category_id, max_results=5, lang='ka_GE', partner_id=None):
     """
     Generate a pivot table of lab order parameters for a patient.
     Converts lab order parameters into a pivot table with dates as columns and parameters as rows.
+    Single-category form of generate_pivot_tables().
     
     Args:
         personal_number: 11-digit Georgian personal identification number
         category_id: Lab test category ID to filter results
         max_results: Maximum number of most recent test results to include (default: 5)
         lang: Language code for translations (default: 'ka_GE')
+        partner_id: Patient's partner ID (patientId in the result) from the token; resolved from personal_number if not given
         
     Returns:
         Dictionary containing:
@@ -1296,156 +2212,123 @@ def generate_pivot_table(personal_number, category_id, max_results=5, lang='ka_G
         - rows: List of parameter rows with values [{parameter, orderby, values: {...}}, ...]
         - totalRows: Total number of parameter rows
         
-        Returns None if patient not found or no data available
+        Returns None if patient or category not found
     """
+    pivots = generate_pivot_tables(personal_number, [category_id], max_results, lang, partner_id=partner_id)
+    return pivots[0] if pivots else None
 
-    with get_oerp_connection().cursor() as cursor:
-        # First get the partner_id for this personal number
-        sql_partner = """
-            SELECT id FROM res_partner 
-            WHERE inno_id = %s AND inno_patient = true
-            LIMIT 1
-        """
-        cursor.execute(sql_partner, (personal_number,))
-        partner_row = cursor.fetchone()
-        
-        if not partner_row:
-            logger.debug(f"generate_pivot_table({personal_number}) patient not found")
-            return None
+
+def get_parameter_series(personal_number, parameter_id, uom_id=None, max_points=200, lang='ka_GE', partner_id=None):
+    """
+    Get the numeric results of a single parameter over time for a trend chart.
+    Long series are downsampled to max_points with Largest-Triangle-Three-Buckets,
+    which keeps the first and last results and the visually significant extremes.
+    Results are cached per patient and evicted by the NOTIFY listener.
+    
+    Args:
+        personal_number: 11-digit Georgian personal identification number
+        parameter_id: Parameter ID (inno_parameter.id)
+        uom_id: Unit of measure ID; None selects results recorded without a unit
+        max_points: Maximum number of points to return (default: 200)
+        lang: Language code for translations (default: 'ka_GE')
+        partner_id: Patient's partner ID (patientId in the result) from the token; resolved from personal_number if not given
         
-        partner_id = partner_row[0]
+    Returns:
+        Dictionary containing:
+        - parameterIdUom: '<parameter_id>/<uom_id>' as in pivot tables
+        - parameter: Localized parameter name
+        - uom: Unit of measure name (or None)
+        - patientId: Patient partner ID
+        - points: [[date, value], ...] ordered by date
+        - totalPoints: Number of results before downsampling
+        - referenceMin / referenceMax / referenceInclude / referenceRange:
+          Reference bounds of the most recent result
         
-        # Check if the category is CBC (includes special date filter in OpenERP)
-        sql_categ = """
-            SELECT pc.name, pc.inno_abbr, it.value as name_geo
-            FROM product_category pc
-            LEFT JOIN ir_translation it ON it.res_id = pc.id 
-                AND it.lang = %s 
-                AND it.name = 'product.category,name'
-            WHERE pc.id = %s
+        Returns None if the patient or parameter is not found
+    """
+    cache = get_cache('parameter_series', maxsize=2048, ttl=patient_cache_ttl())
+    return cache.get_or_set(
+        (personal_number, parameter_id, uom_id, max_points, lang),
+        lambda: _query_parameter_series(personal_number, parameter_id, uom_id, max_points, lang, partner_id),
+        tags=(patient_tag(personal_number),),
+    )
+
+
+def _query_parameter_series(personal_number, parameter_id, uom_id, max_points, lang, partner_id):
+    """Uncached implementation of get_parameter_series()."""
+    partner_id = partner_id or get_partner_id(personal_number)
+    if partner_id is None:
+        logger.debug(f"get_parameter_series({personal_number}) patient not found")
+        return None
+    
+    params = {
+        'personal_number': personal_number,
+        'parameter_id': parameter_id,
+        'uom_id': uom_id,
+        'lang': lang,
+    }
+    
+    with get_oerp_connection().cursor() as cursor:
+        sql_parameter = """
+            SELECT COALESCE(it.value, ip.name), NULLIF(pu.name, '.')
+            FROM inno_parameter ip
+            LEFT JOIN product_uom pu ON pu.id = %(uom_id)s
+            LEFT JOIN ir_translation it ON it.res_id = ip.id 
+                AND it.lang = %(lang)s 
+                AND it.name = 'inno.parameter,name'
+            WHERE ip.id = %(parameter_id)s
         """
-        cursor.execute(sql_categ, (lang, category_id))
-        categ_row = cursor.fetchone()
-        
-        if not categ_row:
-            logger.debug(f"generate_pivot_table() category {category_id} not found")
+        cursor.execute(sql_parameter, params)
+        row = cursor.fetchone()
+        if not row:
+            logger.debug(f"get_parameter_series() parameter {parameter_id} not found")
             return None
+        parameter_name, uom_name = row
         
-        categ_name_eng, categ_abbr, categ_name_geo = categ_row
-        categ_name = categ_name_geo if categ_name_geo else categ_name_eng
-        
-        is_cbc_test = 'CBC' in categ_abbr if categ_abbr else False
-        cbc_date_filter = "AND il.date_order > '2024-09-01'" if is_cbc_test else ''
-        
-        # Query lab order parameters
-        sql_params = f"""
+        # Same numeric values as the pivot table (0 means "no value" in OpenERP)
+        uom_clause = "ilp.uom_id = %(uom_id)s" if uom_id is not None else "ilp.uom_id IS NULL"
+        sql_series = f"""
             SELECT 
-                ilp.laborder_id, 
-                DATE(ilp.date_value) as date, 
-                CONCAT_WS('/', ilp.parameter_id, ilp.uom_id) as param_id_uom, 
-                CONCAT_WS(',', COALESCE(it.value, ip.name), NULLIF(pu.name, '.')) as parameter,
-                COALESCE(NULLIF(ilp.value, 0)::text, itv.name) as value, 
-                ilp.sequence as orderby
+                DATE(ilp.date_value) as date,
+                ilp.value,
+                ilp.value_min,
+                ilp.value_max,
+                ilp.include
             FROM inno_laborder_parameter ilp
-            JOIN inno_laborder il ON ilp.laborder_id = il.id
-            LEFT JOIN inno_textvalue itv ON ilp.value_text = itv.id
-            LEFT JOIN inno_parameter ip ON ilp.parameter_id = ip.id
-            LEFT JOIN product_uom pu ON ilp.uom_id = pu.id
-            LEFT JOIN ir_translation it ON it.res_id = ip.id 
-                AND it.lang = %s 
-                AND it.name = 'inno.parameter,name'
-            WHERE ilp.partner_id = %s 
-                AND ilp.active
-                AND il.categ_id = %s
+            JOIN inno_laborder il ON il.id = ilp.laborder_id
+            WHERE il.partner_id IN ({PATIENT_PARTNERS_SQL})
                 AND il.state = 'done'
-                {cbc_date_filter}
+                AND ilp.active
+                AND ilp.parameter_id = %(parameter_id)s
+                AND {uom_clause}
+                AND NULLIF(ilp.value, 0) IS NOT NULL
+                AND ilp.date_value IS NOT NULL
             ORDER BY ilp.date_value, ilp.laborder_id
         """
-        cursor.execute(sql_params, (lang, partner_id, category_id))
-        
-        # Fetch results into a pandas DataFrame
-        columns = [col[0] for col in cursor.description]
-        rows = cursor.fetchall()
-        
-        if not rows:
-            logger.debug(f"generate_pivot_table() no data found for partner_id={partner_id}, category_id={category_id}")
-            return {
-                'categoryId': category_id,
-                'categoryName': categ_name,
-                'patientId': partner_id,
-                'columns': [],
-                'rows': [],
-                'totalRows': 0
-            }
-        
-        raw_df = pd.DataFrame(rows, columns=columns)
-        
-        # Create pivot table
-        pivot_df = pd.pivot_table(
-            raw_df, 
-            values='value', 
-            index=['param_id_uom', 'parameter', 'orderby'], 
-            columns=['laborder_id', 'date'], 
-            aggfunc=lambda x: x, 
-            fill_value='-'
-        )
-        
-        # Keep last N results
-        pivot_df = pivot_df.iloc[:, -max_results:]
-        
-        if pivot_df.empty:
-            logger.debug(f"generate_pivot_table() pivot table is empty")
-            return {
-                'categoryId': category_id,
-                'categoryName': categ_name,
-                'patientId': partner_id,
-                'columns': [],
-                'rows': [],
-                'totalRows': 0
-            }
-        
-        # Build columns list (dates)
-        columns_list = []
-        laborder_id_map = {}
-        
-        for idx, col_tuple in enumerate(pivot_df.columns):
-            laborder_id, date = col_tuple
-            columns_list.append({
-                'laborderId': int(laborder_id),
-                'date': str(date)
-            })
-            laborder_id_map[laborder_id] = idx
-        
-        # Convert pivot to dictionary and build rows
-        pivot_dict = pivot_df.where(pd.notnull(pivot_df), None).to_dict(orient='index', into=OrderedDict)
-        
-        rows_list = []
-        for param_tuple, param_data in pivot_dict.items():
-            param_id_uom, parameter_name, orderby = param_tuple
-            
-            # Build values dict for this parameter across all dates
-            values = {}
-            for col_tuple, value in param_data.items():
-                laborder_id, date = col_tuple
-                col_idx = laborder_id_map[laborder_id]
-                values[f'col_{col_idx}'] = value
-            
-            rows_list.append({
-                'parameterIdUom': param_id_uom,
-                'parameter': parameter_name,
-                'orderby': int(orderby) if orderby is not None else 999,
-                'values': values
-            })
-        
-        result = {
-            'categoryId': category_id,
-            'categoryName': categ_name,
-            'patientId': partner_id,
-            'columns': columns_list,
-            'rows': rows_list,
-            'totalRows': len(rows_list)
-        }
-        
-        logger.debug(f"generate_pivot_table() generated pivot with {len(columns_list)} columns and {len(rows_list)} rows")
-        return result
-
+        cursor.execute(sql_series, params)
+        rows = fetch_records(cursor, ParameterSeriesRow, floats=True)
+    
+    points = [(row.date.toordinal(), row.value) for row in rows]
+    selected = downsample_lttb(points, max_points)
+    
+    # Reference bounds of the most recent result, as shown on its lab order
+    reference = {'value_min': None, 'value_max': None, 'include': False}
+    if rows:
+        latest = rows[-1]
+        reference = {'value_min': latest.value_min, 'value_max': latest.value_max, 'include': bool(latest.include)}
+    
+    result = {
+        'parameterIdUom': f'{parameter_id}/{uom_id}' if uom_id is not None else str(parameter_id),
+        'parameter': parameter_name,
+        'uom': uom_name,
+        'patientId': partner_id,
+        'points': [[str(rows[idx].date), points[idx][1]] for idx in selected],
+        'totalPoints': len(rows),
+        'referenceMin': float(reference['value_min']) if reference['value_min'] else None,
+        'referenceMax': float(reference['value_max']) if reference['value_max'] else None,
+        'referenceInclude': reference['include'],
+        'referenceRange': generate_reference_range(reference),
+    }
+    
+    logger.debug(f"get_parameter_series({personal_number}, {result['parameterIdUom']}) {len(selected)} of {len(rows)} point(s)")
+    return result
@@ -3,11 +3,15 @@ from django.shortcuts import render
 # Create your views here.
 
 import base64
+import hashlib
 import logging
 import traceback
 from datetime import datetime, time
 
-from django.http import FileResponse
+from django.conf import settings
+from django.http import FileResponse, StreamingHttpResponse
+from django.utils.cache import get_conditional_response, patch_cache_control, patch_vary_headers
+from django.utils.http import content_disposition_header, parse_etags, quote_etag
 from django.views import View
 from django.http import HttpResponse, HttpRequest
 from django.template.response import TemplateResponse
@@ -21,29 +25,48 @@ from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
-from .models import PatientToken
+from .models import PatientToken, PatientSession
 from .serializers import LabTestSerializer, LabTestsSerializer, LabTestCategoriesSerializer, LabTestParametersSerializer, \
     GetPatientRequestSerializer, GetPatientResponseListSerializer, \
+    GetPatientsBatchRequestSerializer, GetPatientsBatchResponseSerializer, \
     CheckPatientExistsRequestSerializer, CheckPatientExistsResponseSerializer, \
     TokenRefreshRequestSerializer, TokenRefreshResponseSerializer, \
     RevokeTokenRequestSerializer, RevokeTokenResponseSerializer, \
     PatientSessionSerializer, GetSessionsResponseSerializer, \
     RevokeSessionRequestSerializer, RevokeSessionResponseSerializer, \
-    LabOrdersSerializer, LabOrderDetailSerializer, LabOrderStatsSerializer, \
+    LabOrdersSerializer, LabOrdersFilterSerializer, LabOrderDetailSerializer, LabOrderStatsSerializer, \
     CreatePatientRequestSerializer, CreatePatientResponseSerializer, \
     CreateOrderRequestSerializer, CreateOrderResponseSerializer, \
-    PivotTableRequestSerializer, PivotTableResponseSerializer, LabTestPDFsSerializer
+    PivotTableRequestSerializer, PivotTableResponseSerializer, PivotTablesResponseSerializer, \
+    ParameterSeriesResponseSerializer, LabTestPDFsSerializer, LabTestsQuerySerializer, LangQuerySerializer, \
+    LabTestCategorySerializer, LabTestParameterSerializer, expand_localized_fields
 
 from .authentication import PatientJWTAuthentication
+from .cache import product_tag, CATALOG_TAG
+from .encoders import encode
+from .pdf_cache import labtest_pdf_version, get_cached_pdf, cache_dir, iter_file_range
+from .precompressed import precompressed_response
 
-from .utils import get_labtests, get_labtest_parameters, get_patient_by_personal_number, check_patient_exists, \
+from .utils import get_labtests, get_labtest_parameters, get_patient_by_personal_number, get_patients_by_personal_numbers, \
+    check_patient_exists, \
     get_web_product_categories, get_labtests_by_web_category, \
     generate_patient_tokens, refresh_patient_token, revoke_patient_tokens, get_lab_orders, get_lab_order_stats, \
-    create_partner, get_or_create_patient, create_sale_order, generate_pivot_table, \
-    get_labtests_rpc, get_labtest_pdfs
+    get_lab_orders_version, get_lab_orders_catalog_version, \
+    create_partner, get_or_create_patient, create_sale_order, generate_pivot_table, generate_pivot_tables, \
+    get_labtests_rpc, get_labtest_pdfs, get_labtest_pdf_info, iter_labtest_pdf, get_parameter_series
 
 logger = logging.getLogger(__name__)
 
+# Maximum number of categories in a single /api/patient/pivot request
+MAX_PIVOT_CATEGORIES = 20
+
+# Accepted <lang> values of /api/labtests/<id>/pdfs/<lang>/ and the PDF column they select
+PDF_LANGUAGES = {'eng': 'eng', 'en': 'eng', 'en_US': 'eng', 'geo': 'geo', 'ka': 'geo', 'ka_GE': 'geo'}
+
+# Default and maximum number of points returned by /api/patient/parameters/.../series
+DEFAULT_SERIES_POINTS = 200
+MAX_SERIES_POINTS = 2000
+
 def get_client_ip(request):
     x_forwarded_for = request.META.get('HTTP_X_FORWARDED_FOR')
     if x_forwarded_for:
@@ -52,10 +75,33 @@ def get_client_ip(request):
         ip = request.META.get('REMOTE_ADDR')
     return ip
 
+def lab_orders_validators(request):
+    """
+    Weak ETag of the authenticated patient's lab order data (see utils.get_lab_orders_version)
+    and of the catalog names rendered with it (see utils.get_lab_orders_catalog_version).
+    The ETag also covers the patient and the full path, so query options get their own.
+    There is no Last-Modified: the latest write_date goes backwards when the latest order
+    leaves the done state, which would answer If-Modified-Since with a stale 304.
+    """
+    personal_number = request.auth.get('personal_number')
+    version = (get_lab_orders_version(personal_number), get_lab_orders_catalog_version())
+    digest = hashlib.sha256(repr((personal_number, request.get_full_path(), version)).encode()).hexdigest()[:32]
+    return f'W/"{digest}"'
+
+def set_lab_orders_validators(response, etag):
+    """Add the ETag to a patient response; clients must revalidate before reusing it."""
+    if etag:
+        response['ETag'] = etag
+    patch_cache_control(response, private=True, no_cache=True)
+    patch_vary_headers(response, ('Authorization',))
+    return response
+
 @extend_schema(
     tags=['LabTests'],
+    parameters=[LabTestsQuerySerializer],
     responses={
-        200: LabTestsSerializer(many=True)
+        200: LabTestsSerializer(many=True),
+        400: None,
     },
 )
 class LabTestsList(APIView):
@@ -63,23 +109,31 @@ class LabTestsList(APIView):
     authentication_classes = []
 
     def get(self, request):
-        # results = get_labtests(active_only=False)
-        results = get_labtests_rpc()
-        logger.debug(f'{len(results)} laboratory tests found')
-        
-        response_serializer = LabTestsSerializer(data={'results':results})
-        
-        if response_serializer.is_valid():
-            return Response(response_serializer.data)
-        
-        return Response(response_serializer.errors)
+        query_serializer = LabTestsQuerySerializer(data=request.query_params)
+        if not query_serializer.is_valid():
+            return Response(query_serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        fieldset = query_serializer.validated_data['fieldset']
+        lang = query_serializer.validated_data.get('lang')
+
+        def build():
+            # results = get_labtests(active_only=False)
+            results = get_labtests_rpc(include_subtests=fieldset is None or 'subtests' in fieldset)
+            logger.debug(f'{len(results)} laboratory tests found')
+            data = {'results': encode(LabTestSerializer, results, many=True, fields=fieldset, lang=lang)}
+            return data, {CATALOG_TAG, *(product_tag(test['id']) for test in results)}
+
+        # Encoded and compressed once per catalog change, answered with 304 on a matching ETag
+        key = ('labtests', None if fieldset is None else tuple(sorted(fieldset)), lang)
+        return precompressed_response(request, key, build)
 
 
 # Return a specific lab test by id
 @extend_schema(
     tags=['LabTests'],
+    parameters=[LangQuerySerializer],
     responses={
         200: LabTestSerializer(),
+        400: None,
         404: None
     },
 )
@@ -88,9 +142,16 @@ class LabTestDetail(APIView):
     authentication_classes = []
 
     def get(self, request, id):
+        lang_serializer = LangQuerySerializer(data=request.query_params)
+        if not lang_serializer.is_valid():
+            return Response(lang_serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        lang = lang_serializer.validated_data.get('lang')
+
         # result = get_labtests(labtest_id=id, active_only=False)
         result = get_labtests_rpc(labtest_id=id)
 
+        if result and lang:
+            return Response(encode(LabTestSerializer, result[0], lang=lang))
         if result:
             serializer = LabTestSerializer(result[0])
             return Response(serializer.data)
@@ -117,11 +178,146 @@ class LabTestPDFs(APIView):
             return Response(serializer.data)
         return Response(serializer.errors, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
+
+def parse_byte_range(header, size):
+    """
+    Parse a single-range "Range: bytes=..." header.
+    
+    Returns:
+        (start, end) inclusive, None if the header should be ignored (missing,
+        malformed or multiple ranges), or False if the range is not satisfiable
+    """
+    if not header or not header.startswith('bytes=') or ',' in header:
+        return None
+    first, sep, last = header[len('bytes='):].strip().partition('-')
+    if not sep:
+        return None
+    try:
+        if first:
+            start = int(first)
+            end = int(last) if last else size - 1
+        else:
+            # Suffix range: the last N bytes
+            start = max(size - int(last), 0)
+            end = size - 1
+    except ValueError:
+        return None
+    if start >= size:
+        return False
+    if start < 0 or end < start:
+        return None
+    return start, min(end, size - 1)
+
+
+@extend_schema(
+    tags=['LabTests'],
+    parameters=[
+        OpenApiParameter(
+            name='lang',
+            type=str,
+            location=OpenApiParameter.PATH,
+            enum=list(PDF_LANGUAGES),
+            description='PDF language'
+        ),
+    ],
+    responses={
+        (200, 'application/pdf'): bytes,
+        (206, 'application/pdf'): bytes,
+        304: None,
+        404: None,
+        416: None,
+    },
+    description="""
+    Stream one lab test PDF as `application/pdf`.
+    
+    PDFs are decoded from the database once and then served from an on-disk cache.
+    
+    The response carries an `ETag`; send it back in `If-None-Match` to get `304 Not Modified`
+    while the PDF is unchanged. Single byte ranges (`Range: bytes=0-65535`) are answered with
+    `206 Partial Content`, honouring `If-Range`.
+    """
+)
+class LabTestPDF(APIView):
+    """
+    Stream the English or Georgian PDF attachment of a lab test.
+    PDFs are served from the on-disk PDF cache (through nginx when X-Accel-Redirect
+    is configured) and streamed from the database if the cache is disabled or unavailable.
+    """
+    authentication_classes = []
+
+    def get(self, request, id, lang):
+        lang = PDF_LANGUAGES.get(lang)
+        if lang is None:
+            return Response({'detail': 'Not found'}, status=status.HTTP_404_NOT_FOUND)
+        
+        info = get_labtest_pdf_info(id, lang)
+        if info is None:
+            return Response({'detail': 'Not found'}, status=status.HTTP_404_NOT_FOUND)
+        
+        etag = quote_etag(labtest_pdf_version(id, lang, info))
+        
+        if_none_match = request.headers.get('If-None-Match')
+        if if_none_match and (etag in parse_etags(if_none_match) or if_none_match.strip() == '*'):
+            response = HttpResponse(status=status.HTTP_304_NOT_MODIFIED)
+            response['ETag'] = etag
+            return response
+        
+        relative_path = None
+        if settings.PDF_CACHE['dir']:
+            try:
+                relative_path = get_cached_pdf(id, lang, info, lambda: iter_labtest_pdf(id, lang, info))
+            except OSError as e:
+                logger.error(f"/api/labtests/{id}/pdfs/{lang} PDF cache unavailable: {str(e)}")
+        
+        if relative_path is not None and settings.PDF_CACHE['accel_redirect']:
+            # nginx serves the file from an internal location, including Range requests
+            response = HttpResponse(content_type='application/pdf')
+            response['X-Accel-Redirect'] = f"{settings.PDF_CACHE['accel_redirect'].rstrip('/')}/{relative_path.as_posix()}"
+        else:
+            response = self._range_response(request, id, lang, info, etag, relative_path)
+        
+        response['ETag'] = etag
+        filename = info['filename'] or f'labtest_{id}_{lang}.pdf'
+        response['Content-Disposition'] = content_disposition_header(False, filename)
+        return response
+
+    def _range_response(self, request, id, lang, info, etag, relative_path):
+        """Serve the PDF (or a single byte range of it) from the cache file or the database."""
+        size = info['size']
+        path = cache_dir() / relative_path if relative_path is not None else None
+        
+        byte_range = None
+        if request.headers.get('If-Range', etag) == etag:
+            byte_range = parse_byte_range(request.headers.get('Range'), size)
+        
+        if byte_range is False:
+            response = HttpResponse(status=status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE)
+            response['Content-Range'] = f'bytes */{size}'
+            return response
+        
+        start, end = byte_range or (0, size - 1)
+        if path is not None and not byte_range:
+            response = FileResponse(open(path, 'rb'), content_type='application/pdf')
+        else:
+            chunks = iter_file_range(path, start, end) if path is not None else iter_labtest_pdf(id, lang, info, start, end)
+            response = StreamingHttpResponse(
+                chunks,
+                content_type='application/pdf',
+                status=status.HTTP_206_PARTIAL_CONTENT if byte_range else status.HTTP_200_OK,
+            )
+        response['Content-Length'] = str(end - start + 1)
+        if byte_range:
+            response['Content-Range'] = f'bytes {start}-{end}/{size}'
+        response['Accept-Ranges'] = 'bytes'
+        return response
+
 # New: List all web_product_category
 @extend_schema(
     tags=['LabTests'],
+    parameters=[LangQuerySerializer],
     responses={
-        200: LabTestCategoriesSerializer(many=True)
+        200: LabTestCategoriesSerializer(many=True),
+        400: None,
     },
 )
 class LabTestWebCategoriesList(APIView):
@@ -129,18 +325,25 @@ class LabTestWebCategoriesList(APIView):
     authentication_classes = []
 
     def get(self, request):
-        results = get_web_product_categories()
-        logger.debug(f'{len(results)} web product categories found')
-        response_serializer = LabTestCategoriesSerializer(data={'results':results})
-        if response_serializer.is_valid():
-            return Response(response_serializer.data)
-        return Response(response_serializer.errors)
+        lang_serializer = LangQuerySerializer(data=request.query_params)
+        if not lang_serializer.is_valid():
+            return Response(lang_serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        lang = lang_serializer.validated_data.get('lang')
+
+        def build():
+            results = get_web_product_categories(translate=lang != 'en_US')
+            logger.debug(f'{len(results)} web product categories found')
+            return {'results': encode(LabTestCategorySerializer, results, many=True, lang=lang)}, {CATALOG_TAG}
+
+        return precompressed_response(request, ('labtest-categories', lang), build)
 
 # New: List all product_product under a web_category
 @extend_schema(
     tags=['LabTests'],
+    parameters=[LabTestsQuerySerializer],
     responses={
-        200: LabTestsSerializer(many=True)
+        200: LabTestsSerializer(many=True),
+        400: None,
     },
 )
 class LabTestWebCategoryDetail(APIView):
@@ -148,18 +351,26 @@ class LabTestWebCategoryDetail(APIView):
     authentication_classes = []
 
     def get(self, request, web_category_id):
+        query_serializer = LabTestsQuerySerializer(data=request.query_params)
+        if not query_serializer.is_valid():
+            return Response(query_serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        fieldset = query_serializer.validated_data['fieldset']
+        lang = query_serializer.validated_data.get('lang')
+
         # results = get_labtests_by_web_category(web_category_id)
-        results = get_labtests_rpc(web_category_id=web_category_id)
+        results = get_labtests_rpc(
+            web_category_id=web_category_id,
+            include_subtests=fieldset is None or 'subtests' in fieldset,
+        )
         logger.debug(f'{len(results)} products found for web_category_id={web_category_id}')
-        response_serializer = LabTestsSerializer(data={'results':results})
-        if response_serializer.is_valid():
-            return Response(response_serializer.data)
-        return Response(response_serializer.errors)
+        return Response({'results': encode(LabTestSerializer, results, many=True, fields=fieldset, lang=lang)})
 
 @extend_schema(
     tags=['LabTests'],
+    parameters=[LangQuerySerializer],
     responses={
-        200: LabTestParametersSerializer(many=True)
+        200: LabTestParametersSerializer(many=True),
+        400: None,
     },
 )
 class LabTestParametersDetail(APIView):
@@ -167,8 +378,15 @@ class LabTestParametersDetail(APIView):
     authentication_classes = []
 
     def get(self, request, id):
-        results = get_labtest_parameters(id)
+        lang_serializer = LangQuerySerializer(data=request.query_params)
+        if not lang_serializer.is_valid():
+            return Response(lang_serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        lang = lang_serializer.validated_data.get('lang')
+
+        results = get_labtest_parameters(id, translate=lang != 'en_US')
         logger.debug(f'{len(results)} laboratory test parameters found for labtest_id:{id}')
+        if lang:
+            return Response({'results': encode(LabTestParameterSerializer, results, many=True, lang=lang)})
         
         response_serializer = LabTestParametersSerializer(data={'results':results})
         if response_serializer.is_valid():
@@ -237,6 +455,54 @@ class GetPatient(APIView):
                 return Response({'error': 'Patient not found'}, status=status.HTTP_404_NOT_FOUND)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
+@extend_schema(
+    tags=['Patient'],
+    request=GetPatientsBatchRequestSerializer,
+    responses={
+        200: GetPatientsBatchResponseSerializer,
+        400: None,
+        401: None
+    },
+    description="""
+    Get patient information for up to 1000 personal numbers with a single query.
+    
+    Intended for partner systems reconciling their patient lists. Results are grouped
+    by personal number in request order; personal numbers without a patient have an
+    empty `patients` list.
+    
+    **Authentication Required:** Django session or basic authentication (patient tokens are not accepted).
+    """
+)
+class GetPatientsBatch(APIView):
+    serializer_class = GetPatientsBatchRequestSerializer
+    authentication_classes = [SessionAuthentication, BasicAuthentication]
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request):
+        serializer = self.serializer_class(data=request.data)
+        if not serializer.is_valid():
+            logger.error(f"/api/patient/batch validation errors: {serializer.errors}")
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        
+        personal_numbers = serializer.validated_data['personalNumbers']
+        logger.info(f"/api/patient/batch request by {request.user} for {len(personal_numbers)} personal number(s)")
+        
+        patients = get_patients_by_personal_numbers(personal_numbers)
+        results = [
+            {'personalNumber': personal_number, 'patients': patients[personal_number]}
+            for personal_number in personal_numbers
+        ]
+        total_found = sum(1 for result in results if result['patients'])
+        
+        response_serializer = GetPatientsBatchResponseSerializer(data={'results': results, 'totalFound': total_found})
+        if response_serializer.is_valid():
+            logger.info(f"/api/patient/batch found patients for {total_found} of {len(personal_numbers)} personal number(s)")
+            return Response(response_serializer.data)
+        
+        logger.error(f"/api/patient/batch serializer errors: {response_serializer.errors}")
+        return Response(response_serializer.errors, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
 @extend_schema(
     tags=['Patient'],
     request=CheckPatientExistsRequestSerializer,
@@ -429,8 +695,15 @@ class GetPatientSessions(APIView):
             # Get personal_number from authenticated token
             personal_number = request.auth.get('personal_number')
             
-            # Get active sessions using model method
-            sessions_data = PatientToken.get_active_sessions(personal_number)
+            # One row per active session, no aggregation over the token history
+            sessions_data = [{
+                'sessionId': session['session_id'],
+                'deviceName': session['device_name'],
+                'createdAt': session['created_at'],
+                'lastUsedAt': session['last_used_at'],
+                'clientIp': session['client_ip'],
+                'isActive': True,
+            } for session in PatientSession.get_active_sessions(personal_number)]
             
             response_data = {
                 'sessions': sessions_data,
@@ -520,8 +793,11 @@ class RevokePatientSession(APIView):
 
 @extend_schema(
     tags=['Patient'],
+    parameters=[LabOrdersFilterSerializer],
     responses={
         200: LabOrdersSerializer,
+        304: None,
+        400: None,
         401: None,
         404: None
     },
@@ -532,6 +808,19 @@ class RevokePatientSession(APIView):
     Click the 'Authorize' button at the top of this page and enter your token in the format: `Bearer <your_access_token>`
     
     Returns all lab orders associated with the authenticated patient's personal number, ordered by date (most recent first).
+    
+    **Query Parameters (all optional, filtered in the database):**
+    - `dateFrom` / `dateTo`: Only orders dated within this range (YYYY-MM-DD, inclusive)
+    - `categoryId`: Only orders in this product category
+    - `userPortalCategoryId`: Only orders in this user portal category
+    - `fields` / `exclude`: Comma-separated lab order fields to return (or to leave out), e.g.
+      `fields=id,name,date_order,user_portal_categ_name,pdf_files`. Unrequested columns are not computed.
+    - `lang` (`ka_GE` or `en_US`): Return each bilingual field once, in this language
+      (e.g. `user_portal_categ_name` instead of `user_portal_categ_name` and `user_portal_categ_name_geo`)
+    
+    Responses carry a weak `ETag`; send it back in `If-None-Match` to get `304 Not Modified`
+    when the patient's orders have not changed. Renamed categories, parameters and their
+    translations change the ETag within a minute.
     """
 )
 class GetPatientLabOrders(APIView):
@@ -553,24 +842,42 @@ class GetPatientLabOrders(APIView):
                 status=status.HTTP_401_UNAUTHORIZED
             )
         
+        filter_serializer = LabOrdersFilterSerializer(data=request.query_params)
+        if not filter_serializer.is_valid():
+            logger.error(f"/api/patient/laborders invalid filters: {filter_serializer.errors}")
+            return Response(filter_serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        filters = filter_serializer.validated_data
+        fieldset, lang = filters['fieldset'], filters.get('lang')
+        
         personal_number = request.auth.get('personal_number')
-        logger.info(f"/api/patient/laborders fetching lab orders for personal_number: {personal_number}")
+        logger.info(f"/api/patient/laborders fetching lab orders for personal_number: {personal_number}, filters: {filters}")
         
         try:
-            lab_orders = get_lab_orders(personal_number)
+            # Validators come from a cheap aggregate, so an unchanged list costs no lab order query
+            etag = lab_orders_validators(request)
+            not_modified = get_conditional_response(request, etag=etag)
+            if not_modified is not None:
+                logger.info(f'/api/patient/laborders not modified ({not_modified.status_code})')
+                return set_lab_orders_validators(not_modified, etag)
+
+            lab_orders = get_lab_orders(
+                personal_number,
+                date_from=filters.get('dateFrom'),
+                date_to=filters.get('dateTo'),
+                categ_id=filters.get('categoryId'),
+                user_portal_categ_id=filters.get('userPortalCategoryId'),
+                fields=expand_localized_fields(LabOrderDetailSerializer, fieldset) if fieldset and lang else fieldset,
+                translate=lang != 'en_US',
+            )
             
+            # Same as encode(LabOrdersSerializer, ...), with the lab orders restricted to the requested fields
             response_data = {
-                'labOrders': lab_orders,
+                'labOrders': encode(LabOrderDetailSerializer, lab_orders, many=True, fields=fieldset, lang=lang),
                 'totalLabOrders': len(lab_orders)
             }
             
-            response_serializer = LabOrdersSerializer(data=response_data)
-            if response_serializer.is_valid():
-                logger.info(f'/api/patient/laborders found {len(lab_orders)} lab order(s)')
-                return Response(response_serializer.data)
-            
-            logger.error(f'/api/patient/laborders serializer errors: {response_serializer.errors}')
-            return Response(response_serializer.errors, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+            logger.info(f'/api/patient/laborders found {len(lab_orders)} lab order(s)')
+            return set_lab_orders_validators(Response(response_data), etag)
             
         except Exception as e:
             logger.error(f"/api/patient/laborders error: {str(e)}", exc_info=True)
@@ -582,8 +889,10 @@ class GetPatientLabOrders(APIView):
 
 @extend_schema(
     tags=['Patient'],
+    parameters=[LangQuerySerializer],
     responses={
         200: LabOrderDetailSerializer,
+        400: None,
         401: None,
         403: None,
         404: None
@@ -617,11 +926,17 @@ class GetPatientLabOrderDetail(APIView):
                 status=status.HTTP_401_UNAUTHORIZED
             )
         
+        lang_serializer = LangQuerySerializer(data=request.query_params)
+        if not lang_serializer.is_valid():
+            return Response(lang_serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        lang = lang_serializer.validated_data.get('lang')
+
         personal_number = request.auth.get('personal_number')
         logger.info(f"/api/patient/laborders/{id} fetching lab order for personal_number: {personal_number}")
         
         try:
-            lab_order = get_lab_orders(personal_number, laborder_id=id, include_parameters=True)
+            lab_order = get_lab_orders(personal_number, laborder_id=id, include_parameters=True,
+                                       translate=lang != 'en_US')
             
             if not lab_order:
                 logger.warning(f'/api/patient/laborders/{id} not found or access denied for personal_number: {personal_number}')
@@ -630,6 +945,10 @@ class GetPatientLabOrderDetail(APIView):
                     status=status.HTTP_404_NOT_FOUND
                 )
             
+            if lang:
+                logger.info(f'/api/patient/laborders/{id} found order with {len(lab_order.get("parameters", []))} parameter(s)')
+                return Response(encode(LabOrderDetailSerializer, lab_order, lang=lang))
+
             response_serializer = LabOrderDetailSerializer(data=lab_order)
             if response_serializer.is_valid():
                 logger.info(f'/api/patient/laborders/{id} found order with {len(lab_order.get("parameters", []))} parameter(s)')
@@ -648,8 +967,11 @@ class GetPatientLabOrderDetail(APIView):
 
 @extend_schema(
     tags=['Patient'],
+    parameters=[LangQuerySerializer],
     responses={
         200: LabOrderStatsSerializer,
+        304: None,
+        400: None,
         401: None
     },
     description="""
@@ -664,6 +986,10 @@ class GetPatientLabOrderDetail(APIView):
     **Usage:**
     - `/api/patient/laborders/stats/` - Get all lab order statistics
     - `/api/patient/laborders/stats/{categ_id}/` - Get statistics filtered by category ID
+    - `?lang=ka_GE|en_US` - Return `categ_name` and `parameter` in this language only
+    
+    Supports conditional requests (`If-None-Match`, answered with `304`). Renamed categories,
+    parameters and their translations change the ETag within a minute.
     """
 )
 class GetPatientLabOrderStats(APIView):
@@ -685,24 +1011,32 @@ class GetPatientLabOrderStats(APIView):
                 status=status.HTTP_401_UNAUTHORIZED
             )
         
+        lang_serializer = LangQuerySerializer(data=request.query_params)
+        if not lang_serializer.is_valid():
+            return Response(lang_serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        lang = lang_serializer.validated_data.get('lang')
+
         personal_number = request.auth.get('personal_number')
         logger.info(f"/api/patient/laborders/stats fetching stats for personal_number: {personal_number}, categ_id: {categ_id}")
         
         try:
-            stats = get_lab_order_stats(personal_number, categ_id=categ_id)
+            etag = lab_orders_validators(request)
+            not_modified = get_conditional_response(request, etag=etag)
+            if not_modified is not None:
+                logger.info(f'/api/patient/laborders/stats not modified ({not_modified.status_code})')
+                return set_lab_orders_validators(not_modified, etag)
+
+            stats = get_lab_order_stats(personal_number, categ_id=categ_id, translate=lang != 'en_US')
             
             response_data = {
                 'stats': stats,
                 'totalRecords': len(stats)
             }
             
-            response_serializer = LabOrderStatsSerializer(data=response_data)
-            if response_serializer.is_valid():
-                logger.info(f'/api/patient/laborders/stats found {len(stats)} stat record(s)')
-                return Response(response_serializer.data)
-            
-            logger.error(f'/api/patient/laborders/stats serializer errors: {response_serializer.errors}')
-            return Response(response_serializer.errors, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+            logger.info(f'/api/patient/laborders/stats found {len(stats)} stat record(s)')
+            return set_lab_orders_validators(
+                Response(encode(LabOrderStatsSerializer, response_data, lang=lang)), etag
+            )
             
         except Exception as e:
             logger.error(f"/api/patient/laborders/stats error: {str(e)}", exc_info=True)
@@ -910,10 +1244,11 @@ class CreateOrder(APIView):
     parameters=[
         OpenApiParameter(
             name='categoryId',
-            type=int,
+            type={'type': 'array', 'items': {'type': 'integer'}},
             location=OpenApiParameter.QUERY,
             required=True,
-            description='Lab test category ID'
+            explode=True,
+            description='Lab test category ID. Repeat (or comma-separate) to get several pivots at once (max 20)'
         ),
         OpenApiParameter(
             name='maxResults',
@@ -936,7 +1271,9 @@ class CreateOrder(APIView):
     into a pivot table format with dates as columns and parameters as rows.
     
     **Query Parameters:**
-    - `categoryId` (required): The lab test category ID to filter results
+    - `categoryId` (required): The lab test category ID to filter results.
+      Pass several (`?categoryId=1&categoryId=2` or `?categoryId=1,2`) to fetch all of them with one query;
+      the response is then `{"pivots": [<pivot>, ...], "totalPivots": n}` with one pivot per known category.
     - `maxResults` (optional): Maximum number of most recent test results to include (default: 5, max: 50)
     
     **Response Format:**
@@ -993,12 +1330,17 @@ class GetPatientPivotTable(APIView):
         
         personal_number = request.auth.get('personal_number')
         
-        # Get query parameters
-        category_id = request.query_params.get('categoryId')
+        # Get query parameters (categoryId may be repeated or comma-separated)
+        category_ids = [
+            value.strip()
+            for param in request.query_params.getlist('categoryId')
+            for value in param.split(',')
+            if value.strip()
+        ]
         max_results = request.query_params.get('maxResults', 5)
         
         # Validate categoryId
-        if not category_id:
+        if not category_ids:
             logger.error("/api/patient/pivot missing categoryId parameter")
             return Response(
                 {'error': 'categoryId parameter is required'},
@@ -1006,14 +1348,22 @@ class GetPatientPivotTable(APIView):
             )
         
         try:
-            category_id = int(category_id)
+            # Repeated values are dropped, so they do not switch to the multi-category response
+            category_ids = list(dict.fromkeys(int(category_id) for category_id in category_ids))
         except ValueError:
-            logger.error(f"/api/patient/pivot invalid categoryId: {category_id}")
+            logger.error(f"/api/patient/pivot invalid categoryId: {category_ids}")
             return Response(
                 {'error': 'categoryId must be an integer'},
                 status=status.HTTP_400_BAD_REQUEST
             )
         
+        if len(category_ids) > MAX_PIVOT_CATEGORIES:
+            logger.error(f"/api/patient/pivot too many categoryId values: {len(category_ids)}")
+            return Response(
+                {'error': f'At most {MAX_PIVOT_CATEGORIES} categoryId values are allowed'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
         # Validate maxResults
         try:
             max_results = int(max_results)
@@ -1030,7 +1380,7 @@ class GetPatientPivotTable(APIView):
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        logger.info(f"/api/patient/pivot generating pivot for personal_number: {personal_number}, categoryId: {category_id}, maxResults: {max_results}")
+        logger.info(f"/api/patient/pivot generating pivot for personal_number: {personal_number}, categoryId: {category_ids}, maxResults: {max_results}")
         
         try:
             # Get preferred language from request (default to Georgian)
@@ -1038,7 +1388,12 @@ class GetPatientPivotTable(APIView):
             if lang not in ['ka_GE', 'en_US']:
                 lang = 'ka_GE'
             
-            pivot_data = generate_pivot_table(personal_number, category_id, max_results, lang)
+            if len(category_ids) > 1:
+                return self._multi_category_response(request, personal_number, category_ids, max_results, lang)
+            
+            category_id = category_ids[0]
+            pivot_data = generate_pivot_table(personal_number, category_id, max_results, lang,
+                                              partner_id=request.auth.get('partner_id'))
             
             if pivot_data is None:
                 logger.warning(f"/api/patient/pivot patient or category not found")
@@ -1047,17 +1402,146 @@ class GetPatientPivotTable(APIView):
                     status=status.HTTP_404_NOT_FOUND
                 )
             
-            response_serializer = PivotTableResponseSerializer(data=pivot_data)
+            logger.info(f"/api/patient/pivot generated pivot with {pivot_data['totalRows']} rows")
+            return Response(encode(PivotTableResponseSerializer, pivot_data))
+            
+        except Exception as e:
+            logger.error(f"/api/patient/pivot error: {str(e)}", exc_info=True)
+            return Response(
+                {'error': 'Failed to generate pivot table'},
+                status=status.HTTP_500_INTERNAL_SERVER_ERROR
+            )
+
+    def _multi_category_response(self, request, personal_number, category_ids, max_results, lang):
+        """Answer a multi-category request with one pivot per category from a single query."""
+        pivots = generate_pivot_tables(personal_number, category_ids, max_results, lang,
+                                       partner_id=request.auth.get('partner_id'))
+        
+        if pivots is None:
+            logger.warning(f"/api/patient/pivot patient not found")
+            return Response(
+                {'error': 'Patient not found'},
+                status=status.HTTP_404_NOT_FOUND
+            )
+        
+        logger.info(f"/api/patient/pivot generated {len(pivots)} pivot(s) for categories {category_ids}")
+        return Response(encode(PivotTablesResponseSerializer, {
+            'pivots': pivots,
+            'totalPivots': len(pivots)
+        }))
+
+
+@extend_schema(
+    tags=['Patient'],
+    parameters=[
+        OpenApiParameter(
+            name='maxPoints',
+            type=int,
+            location=OpenApiParameter.QUERY,
+            required=False,
+            description=f'Maximum number of points to return (default: {DEFAULT_SERIES_POINTS}, min: 3, max: {MAX_SERIES_POINTS})'
+        ),
+    ],
+    responses={
+        200: ParameterSeriesResponseSerializer,
+        400: None,
+        401: None,
+        404: None
+    },
+    description="""
+    Get the results of a single parameter over time for the authenticated patient.
+    
+    The parameter is addressed by its `parameterIdUom` from the pivot table
+    (`/api/patient/parameters/10/1/series/`, or `/api/patient/parameters/10/series/`
+    for a parameter without a unit). Only numeric results are included.
+    
+    Long series are downsampled on the server to `maxPoints` points with
+    Largest-Triangle-Three-Buckets, which keeps the first and last results and
+    the peaks and troughs of the curve.
+    
+    **Example Response:**
+    ```json
+    {
+        "parameterIdUom": "10/1",
+        "parameter": "ჰემოგლობინი",
+        "uom": "გ/ლ",
+        "patientId": 456,
+        "points": [["2024-01-15", 145.0], ["2024-02-20", 148.0]],
+        "totalPoints": 2,
+        "referenceMin": 120.0,
+        "referenceMax": 160.0,
+        "referenceInclude": true,
+        "referenceRange": "120.0 - 160.0"
+    }
+    ```
+    
+    Requires patient JWT authentication.
+    """
+)
+class GetPatientParameterSeries(APIView):
+    """
+    Get a downsampled time series of one parameter for the authenticated patient.
+    Requires patient JWT authentication.
+    """
+    authentication_classes = [PatientJWTAuthentication]
+    permission_classes = []
+
+    def get(self, request, parameter_id, uom_id=None):
+        logger.info(f"/api/patient/parameters/{parameter_id}/{uom_id}/series request")
+        
+        if not request.auth:
+            logger.error("/api/patient/parameters/series authentication failed: request.auth is None")
+            return Response(
+                {'error': 'Authentication required'},
+                status=status.HTTP_401_UNAUTHORIZED
+            )
+        
+        personal_number = request.auth.get('personal_number')
+        
+        # Validate maxPoints
+        max_points = request.query_params.get('maxPoints', DEFAULT_SERIES_POINTS)
+        try:
+            max_points = int(max_points)
+            if max_points < 3 or max_points > MAX_SERIES_POINTS:
+                logger.error(f"/api/patient/parameters/series maxPoints out of range: {max_points}")
+                return Response(
+                    {'error': f'maxPoints must be between 3 and {MAX_SERIES_POINTS}'},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+        except ValueError:
+            logger.error(f"/api/patient/parameters/series invalid maxPoints: {max_points}")
+            return Response(
+                {'error': 'maxPoints must be an integer'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        try:
+            # Get preferred language from request (default to Georgian)
+            lang = request.headers.get('Accept-Language', 'ka_GE')
+            if lang not in ['ka_GE', 'en_US']:
+                lang = 'ka_GE'
+            
+            series = get_parameter_series(personal_number, parameter_id, uom_id, max_points, lang,
+                                          partner_id=request.auth.get('partner_id'))
+            
+            if series is None:
+                logger.warning(f"/api/patient/parameters/series patient or parameter not found")
+                return Response(
+                    {'error': 'Patient or parameter not found'},
+                    status=status.HTTP_404_NOT_FOUND
+                )
+            
+            response_serializer = ParameterSeriesResponseSerializer(data=series)
             if response_serializer.is_valid():
-                logger.info(f"/api/patient/pivot generated pivot with {pivot_data['totalRows']} rows")
+                logger.info(f"/api/patient/parameters/series returned {len(series['points'])} of {series['totalPoints']} point(s)")
                 return Response(response_serializer.data)
             
-            logger.error(f"/api/patient/pivot serializer errors: {response_serializer.errors}")
+            logger.error(f"/api/patient/parameters/series serializer errors: {response_serializer.errors}")
             return Response(response_serializer.errors, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
             
         except Exception as e:
-            logger.error(f"/api/patient/pivot error: {str(e)}", exc_info=True)
+            logger.error(f"/api/patient/parameters/series error: {str(e)}", exc_info=True)
             return Response(
-                {'error': 'Failed to generate pivot table'},
+                {'error': 'Failed to get parameter series'},
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
@@ -23,6 +23,54 @@ OERP_XMLRPC = {
     'pdf_location': env('OERP_PDF_LOCATION', default='/pdf/1/'),
 }
 
+# Process-local caches for OpenERP data (see api/cache.py).
+# With the NOTIFY listener enabled (triggers installed via `manage.py install_cache_triggers`)
+# entries are evicted as soon as the underlying rows change, so TTLs can be long.
+# A TTL of 0 disables the corresponding cache.
+_oerp_cache_listener = env.bool('OERP_CACHE_LISTENER', default=False)
+OERP_CACHE = {
+    'listener': _oerp_cache_listener,
+    'channel': env('OERP_CACHE_CHANNEL', default='modulo_api_invalidate'),
+    'patient_ttl': env.int('OERP_CACHE_PATIENT_TTL', default=60*60*24 if _oerp_cache_listener else 0),
+    'catalog_ttl': env.int('OERP_CACHE_CATALOG_TTL', default=60*60*24 if _oerp_cache_listener else 0),
+    # Pivot entries are validated against the patient's done orders in the category and their parameter rows on
+    # every read, so results are never stale; without the listener parameter names and units can be for up to pivot_ttl
+    'pivot_ttl': env.int('OERP_CACHE_PIVOT_TTL', default=60*60*24),
+    # Encoded and compressed catalog responses (api/precompressed.py). Cached without the listener too, since
+    # clients already see them up to CATALOG_HTTP_MAX_AGE seconds old; 0 rebuilds them on every request
+    'catalog_response_ttl': env.int('OERP_CACHE_CATALOG_RESPONSE_TTL', default=60*60*24 if _oerp_cache_listener else 60),
+}
+
+# Write-behind PatientToken.last_used_at updates (see api/token_usage.py): a token's use is only
+# recorded if its last recorded use is older than min_interval seconds, and buffered uses are
+# written every flush_interval seconds (0 writes them immediately)
+PATIENT_TOKEN_LAST_USED = {
+    'min_interval': env.int('PATIENT_TOKEN_LAST_USED_MIN_INTERVAL', default=5*60),
+    'flush_interval': env.int('PATIENT_TOKEN_LAST_USED_FLUSH_INTERVAL', default=30),
+}
+
+# Seconds between checks of the token revocation version (see api/revocation.py). Revocations made by
+# another worker take up to this long to be enforced; 0 checks the version on every authenticated request
+TOKEN_REVOCATION_SYNC_INTERVAL = env.int('TOKEN_REVOCATION_SYNC_INTERVAL', default=5)
+
+# Number of verified access tokens cached per process until they expire (0 verifies every request)
+VERIFIED_TOKEN_CACHE_SIZE = env.int('VERIFIED_TOKEN_CACHE_SIZE', default=10000)
+
+# Local patient phone index (see api/utils.py sync_patient_phone_index), synced by `manage.py sync_patient_phones`.
+# check_patient_exists() falls back to OpenERP when the last successful sync is older than max_age seconds;
+# incremental syncs re-read partners written up to overlap seconds before the previous sync's watermark.
+PHONE_INDEX = {
+    'max_age': env.int('PHONE_INDEX_MAX_AGE', default=5*60),
+    'overlap': env.int('PHONE_INDEX_SYNC_OVERLAP', default=10*60),
+}
+
+# Content-addressed on-disk cache of lab test PDFs (see api/pdf_cache.py). An empty dir (the default) disables it.
+# Set accel_redirect to the internal nginx location aliasing dir to let nginx serve the files.
+PDF_CACHE = {
+    'dir': env('PDF_CACHE_DIR', default=''),
+    'accel_redirect': env('PDF_CACHE_ACCEL_REDIRECT', default=''),
+}
+
 DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
@@ -89,8 +137,18 @@ REST_FRAMEWORK = {
         'django_filters.rest_framework.DjangoFilterBackend'
     ],
     'DEFAULT_SCHEMA_CLASS': 'drf_spectacular.openapi.AutoSchema',
+    'DEFAULT_RENDERER_CLASSES': [
+        'api.renderers.FastJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
 }
 
+# JSON encoder used by api.renderers.FastJSONRenderer: 'json' (standard library) or 'orjson' (requires the orjson package)
+JSON_RENDERER_BACKEND = env('JSON_RENDERER_BACKEND', default='json')
+
+# Cache-Control max-age (seconds) of the public, pre-compressed catalog responses (api.precompressed)
+CATALOG_HTTP_MAX_AGE = env.int('CATALOG_HTTP_MAX_AGE', default=300)
+
 # DRF Spectacular settings for Swagger/OpenAPI
 SPECTACULAR_SETTINGS = {
     'TITLE': 'LIMS Proxy API',
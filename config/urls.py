@@ -23,10 +23,10 @@ from rest_framework import routers
 from drf_spectacular.views import SpectacularAPIView, SpectacularSwaggerView
 
 from api.views import ( 
-    LabTestsList, LabTestDetail, LabTestPDFs, LabTestWebCategoriesList, LabTestWebCategoryDetail, LabTestParametersDetail,
-    GetPatient, CheckPatientExists, RefreshPatientToken, RevokePatientTokens,
+    LabTestsList, LabTestDetail, LabTestPDFs, LabTestPDF, LabTestWebCategoriesList, LabTestWebCategoryDetail, LabTestParametersDetail,
+    GetPatient, GetPatientsBatch, CheckPatientExists, RefreshPatientToken, RevokePatientTokens,
     GetPatientSessions, RevokePatientSession, GetPatientLabOrders, GetPatientLabOrderDetail, GetPatientLabOrderStats,
-    CreatePatient, CreateOrder, GetPatientPivotTable
+    CreatePatient, CreateOrder, GetPatientPivotTable, GetPatientParameterSeries
 )
 
 # Manual URL patterns for APIView classes
@@ -38,12 +38,14 @@ urlpatterns = [
         path('labtests/', LabTestsList.as_view(), name='labtests'),
         path('labtests/<int:id>/', LabTestDetail.as_view(), name='labtest-detail'),
         path('labtests/<int:id>/pdfs/', LabTestPDFs.as_view(), name='labtest-pdfs'),
+        path('labtests/<int:id>/pdfs/<str:lang>/', LabTestPDF.as_view(), name='labtest-pdf'),
         path('labtest-categories/', LabTestWebCategoriesList.as_view(), name='labtest-categories'),
         path('labtest-category/<int:web_category_id>/', LabTestWebCategoryDetail.as_view(), name='labtest-category'),
         path('labtest-parameters/<int:id>/', LabTestParametersDetail.as_view(), name='labtest-parameters'),
         
         # Patient endpoints
         path('patient/', GetPatient.as_view(), name='patient'),
+        path('patient/batch/', GetPatientsBatch.as_view(), name='patient-batch'),
         path('patient/check/', CheckPatientExists.as_view(), name='patient-check'),
         path('patient/create/', CreatePatient.as_view(), name='patient-create'),
         path('patient/refresh/', RefreshPatientToken.as_view(), name='patient-refresh'),
@@ -55,6 +57,8 @@ urlpatterns = [
         path('patient/laborders/stats/<int:categ_id>/', GetPatientLabOrderStats.as_view(), name='patient-laborders-stats-category'),
         path('patient/laborders/<int:id>/', GetPatientLabOrderDetail.as_view(), name='patient-laborder-detail'),
         path('patient/pivot/', GetPatientPivotTable.as_view(), name='patient-pivot-table'),
+        path('patient/parameters/<int:parameter_id>/series/', GetPatientParameterSeries.as_view(), name='patient-parameter-series-nouom'),
+        path('patient/parameters/<int:parameter_id>/<int:uom_id>/series/', GetPatientParameterSeries.as_view(), name='patient-parameter-series'),
         
         # Orders
         path('orders/', CreateOrder.as_view(), name='orders-create'),